@@ -0,0 +1,182 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import models
+from django.db.models import Q
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from redis import Redis
+from rest_framework.utils.encoders import JSONEncoder
+from popit import documents
+from popit.serializers import prefetch
+from popit_search.consts import ES_MODEL_MAP
+from popit_search.utils.dependency import node_name
+
+
+# Rendered document of the detail endpoint, per entity, id and language. Reads are most of our traffic, and a nested
+# person or organization cost dozens of queries to serialize. A document is dropped whenever a row rendered in it
+# change, found by walking up the same lookups it is prefetched with.
+
+
+class LocalMemoryBackend(object):
+    """
+    LRU cache in the process memory. Invalidation only reach the process doing the write, so other processes can
+    serve a stale document until it expire, use RedisBackend when running more than one process.
+    """
+
+    def __init__(self, max_entries=None, timeout=None):
+        self.max_entries = max_entries or settings.RENDER_CACHE_MAX_ENTRIES
+        self.timeout = timeout or settings.RENDER_CACHE_TIMEOUT
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is None:
+                return None
+            value, expire = item
+            if expire < time.time():
+                return None
+            # Most recently used at the end
+            self._data[key] = item
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, time.time() + self.timeout)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend(object):
+    """
+    Cache shared by every process. Entries expire after timeout, for LRU eviction configure redis with
+    maxmemory-policy allkeys-lru.
+    """
+    prefix = "render:"
+
+    def __init__(self, store=None, timeout=None):
+        self.store = store or Redis.from_url(settings.RENDER_CACHE_URL)
+        self.timeout = timeout or settings.RENDER_CACHE_TIMEOUT
+
+    def get(self, key):
+        return self.store.get(self.prefix + key)
+
+    def set(self, key, value):
+        self.store.set(self.prefix + key, value, ex=self.timeout)
+
+    def delete_many(self, keys):
+        if keys:
+            self.store.delete(*[self.prefix + key for key in keys])
+
+    def clear(self):
+        keys = list(self.store.scan_iter(self.prefix + "*"))
+        if keys:
+            self.store.delete(*keys)
+
+
+_lock = threading.Lock()
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if not settings.RENDER_CACHE_BACKEND:
+        return None
+    with _lock:
+        if _backend is None:
+            _backend = import_string(settings.RENDER_CACHE_BACKEND)()
+        return _backend
+
+
+@receiver(setting_changed)
+def reset_backend(setting, **kwargs):
+    global _backend
+    if setting.startswith("RENDER_CACHE_"):
+        with _lock:
+            _backend = None
+
+
+def enabled():
+    return bool(settings.RENDER_CACHE_BACKEND)
+
+
+def cache_key(entity, entity_id, language):
+    return "%s:%s:%s" % (entity, entity_id, language)
+
+
+def get_document(entity, entity_id, language):
+    backend = get_backend()
+    if not backend:
+        return None
+    data = backend.get(cache_key(entity, entity_id, language))
+    if data is None:
+        return None
+    return json.loads(data)
+
+
+def set_document(entity, entity_id, language, data):
+    backend = get_backend()
+    if not backend:
+        return
+    backend.set(cache_key(entity, entity_id, language), json.dumps(data, cls=JSONEncoder))
+
+
+def dependent_nodes(entities):
+    """
+    Every node whose document embed one of entities, entities being model instances or (entity, entity_id). Documents
+    are found with the lookups of popit.views.conditional, the same the ETag and updated_since are computed with, so
+    an area reach the organizations, posts and memberships it is in, and an organization the posts of its children.
+    """
+    changed = {}
+    nodes = set()
+    for entity in entities:
+        if isinstance(entity, models.Model):
+            model, entity_id = entity.__class__, entity.id
+        else:
+            model, entity_id = ES_MODEL_MAP[entity[0]], entity[1]
+        changed.setdefault(model, set()).add(entity_id)
+        nodes.add((node_name(model), entity_id))
+
+    def match(model):
+        if model in changed:
+            return Q(id__in=changed[model])
+        return None
+
+    for model in prefetch.PREFETCH_MAP:
+        tree = documents.lookup_tree(model, documents.DOCUMENT_LOOKUPS[model])
+        query = documents.embedding_query(model, tree, match)
+        if query is None:
+            continue
+        ids = model.objects.untranslated().filter(query).values_list("id", flat=True)
+        nodes.update((node_name(model), entity_id) for entity_id in ids)
+    return nodes
+
+
+def invalidate_nodes(nodes):
+    backend = get_backend()
+    if not backend:
+        return
+    languages = [language for language, name in settings.LANGUAGES]
+    keys = [cache_key(node[0], node[1], language) for node in nodes for language in languages]
+    backend.delete_many(keys)
+
+
+def invalidate(entities):
+    if not enabled() or not entities:
+        return
+    invalidate_nodes(dependent_nodes(entities))
@@ -0,0 +1,175 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F
+from django.db.models import Q
+from django.db.models import Sum
+from django.utils import timezone
+from popit.models import Link
+from popit.models import CitationCoverage
+from popit.signals import batch
+from popit import dates
+
+
+# Citation coverage index. Each entity with at least one citation have a CitationCoverage row, a bitmap of which of
+# its fields are cited. It is kept up to date whenever a link is written, so that "which person have no citation for
+# birth_date" is answered from the bitmaps instead of going through Link. Bits follow the order of the fields in the
+# model, run the rebuild_citation_coverage command after a citable field is added or removed.
+
+NOT_CITABLE = set(["id", "created_at", "updated_at", "language_code", "master_id"])
+
+_fields = {}
+
+
+def citation_fields(model):
+    """
+    Field of model that can be cited, in bit order. Same as the fields listed by the field citation view.
+    """
+    fields = _fields.get(model)
+    if fields is None:
+        # Date bounds are derived from a date, which is the one cited
+        derived = dates.bound_fields(model)
+        fields = [field.attname for field in model._meta.fields
+                  if field.attname not in NOT_CITABLE and field.attname not in derived]
+        fields.extend(field.attname for field in model._meta.translations_model._meta.fields
+                      if field.attname not in NOT_CITABLE)
+        _fields[model] = fields
+    return fields
+
+
+def field_mask(model, fields):
+    """
+    Bitmap of fields, raise ValueError for a field that cannot be cited.
+    """
+    citable = citation_fields(model)
+    mask = 0
+    for field in fields:
+        if field not in citable:
+            raise ValueError("%s is not a field of %s" % (field, model._meta.model_name))
+        mask |= 1 << citable.index(field)
+    return mask
+
+
+def cited_fields(model, bitmap):
+    return [field for index, field in enumerate(citation_fields(model)) if bitmap & (1 << index)]
+
+
+def owner_of(link):
+    return link.content_type_id, link.object_id
+
+
+def touch(owners):
+    """
+    Links of owners, (content type id, object id), changed. Their coverage is updated now, or once for the whole
+    batch when there is one.
+    """
+    if batch.active():
+        for content_type_id, object_id in owners:
+            batch.add("citations", content_type_id, object_id)
+        return
+    update_coverage(owners)
+
+
+def owners_query(owners):
+    grouped = {}
+    for content_type_id, object_id in owners:
+        grouped.setdefault(content_type_id, []).append(object_id)
+    query = Q()
+    for content_type_id, object_ids in grouped.items():
+        query |= Q(content_type_id=content_type_id, object_id__in=object_ids)
+    return query
+
+
+def compute(links):
+    # {(content type id, object id): bitmap} of the owners of links, owner without a cited field is not in it
+    bitmaps = {}
+    cited = links.exclude(field=None).order_by().values_list("content_type_id", "object_id", "field").distinct()
+    for content_type_id, object_id, field in cited:
+        citable = citation_fields(ContentType.objects.get_for_id(content_type_id).model_class())
+        if field in citable:
+            owner = (content_type_id, object_id)
+            bitmaps[owner] = bitmaps.get(owner, 0) | 1 << citable.index(field)
+    return bitmaps
+
+
+def update_coverage(owners):
+    """
+    Recompute the bitmap of owners from their links. One query for the links, one for the current rows, and a write
+    per distinct bitmap that changed.
+    """
+    owners = set(owners)
+    if not owners:
+        return
+    query = owners_query(owners)
+    bitmaps = compute(Link.objects.untranslated().filter(query))
+    rows = dict((owner_of(row), row) for row in CitationCoverage.objects.filter(query))
+
+    created = []
+    changed = {}
+    removed = []
+    for owner in owners:
+        bitmap = bitmaps.get(owner, 0)
+        row = rows.get(owner)
+        if row is None:
+            if bitmap:
+                created.append(CitationCoverage(content_type_id=owner[0], object_id=owner[1], fields=bitmap))
+        elif not bitmap:
+            removed.append(row.id)
+        elif row.fields != bitmap:
+            changed.setdefault(bitmap, []).append(row.id)
+
+    if created:
+        CitationCoverage.objects.bulk_create(created)
+    if removed:
+        CitationCoverage.objects.filter(id__in=removed).delete()
+    now = timezone.now()
+    for bitmap, ids in changed.items():
+        CitationCoverage.objects.filter(id__in=ids).update(fields=bitmap, updated_at=now)
+
+
+def rebuild(chunk_size=1000):
+    """
+    Drop the index and build it again from every link.
+    """
+    CitationCoverage.objects.all().delete()
+    bitmaps = compute(Link.objects.untranslated().all())
+    rows = [
+        CitationCoverage(content_type_id=owner[0], object_id=owner[1], fields=bitmap)
+        for owner, bitmap in bitmaps.items()
+    ]
+    CitationCoverage.objects.bulk_create(rows, batch_size=chunk_size)
+    return len(rows)
+
+
+def coverage_rows(model):
+    return CitationCoverage.objects.filter(content_type=ContentType.objects.get_for_model(model))
+
+
+def filter_cited(model, queryset, cited=(), uncited=()):
+    """
+    Entities of queryset with a citation for every field in cited, and none for every field in uncited.
+    """
+    if cited:
+        mask = field_mask(model, cited)
+        ids = coverage_rows(model).annotate(bits=F("fields").bitand(mask)).filter(bits=mask)
+        queryset = queryset.filter(id__in=ids.values("object_id"))
+    if uncited:
+        mask = field_mask(model, uncited)
+        ids = coverage_rows(model).annotate(bits=F("fields").bitand(mask)).exclude(bits=0)
+        queryset = queryset.exclude(id__in=ids.values("object_id"))
+    return queryset
+
+
+def field_counts(model):
+    """
+    {field: number of entities with a citation for it}, in one query over the index.
+    """
+    citable = citation_fields(model)
+    aggregates = dict(
+        (field, Sum(F("fields").bitand(1 << index))) for index, field in enumerate(citable)
+    )
+    totals = coverage_rows(model).aggregate(**aggregates)
+    return dict((field, (totals[field] or 0) >> index) for index, field in enumerate(citable))
+
+
+def entity_bitmaps(model, ids):
+    rows = coverage_rows(model).filter(object_id__in=ids).values_list("object_id", "fields")
+    return dict(rows)
@@ -0,0 +1,89 @@
+import calendar
+import datetime
+import re
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+
+# Dates are kept as entered, YYYY, YYYY-MM or YYYY-MM-DD, because that is all we know most of the time. Each of them
+# also have a lower and an upper bound column, the first and the last day it can be, so that "membership active on
+# date" is an indexed range query instead of parsing every row. Models list their partial dates in partial_dates, the
+# bounds are set on pre_save, and by the bulk writes that bypass save().
+# Time of the day, in rows older than the validators, is ignored
+PARTIAL_DATE = re.compile(r"^([0-9]{4})(?:-([0-9]{2}))?(?:-([0-9]{2})(?:T.*)?)?$")
+
+
+def bound_field(verbose_name):
+    # Not editable nor serialized, it is not part of the API, the fixtures, or what get cited
+    return models.DateField(null=True, blank=True, editable=False, serialize=False, db_index=True,
+                            verbose_name=verbose_name)
+
+
+def date_bounds(value):
+    """
+    (first day, last day) of partial date value, i.e 2010-02 is (2010-02-01, 2010-02-28). (None, None) when value is
+    empty or is not a date.
+    """
+    if not value:
+        return None, None
+    match = PARTIAL_DATE.match("%s" % value)
+    if not match:
+        return None, None
+    year, month, day = match.groups()
+    year = int(year)
+    try:
+        if day:
+            date = datetime.date(year, int(month), int(day))
+            return date, date
+        if month:
+            month = int(month)
+            last = calendar.monthrange(year, month)[1]
+            return datetime.date(year, month, 1), datetime.date(year, month, last)
+        return datetime.date(year, 1, 1), datetime.date(year, 12, 31)
+    except ValueError:
+        return None, None
+
+
+def lower_field(field):
+    return "%s_lower" % field
+
+
+def upper_field(field):
+    return "%s_upper" % field
+
+
+def bound_fields(model):
+    fields = set()
+    for field in getattr(model, "partial_dates", ()):
+        fields.add(lower_field(field))
+        fields.add(upper_field(field))
+    return fields
+
+
+def bound_values(instance):
+    """
+    {bound column: date} of the partial dates of instance.
+    """
+    values = {}
+    for field in getattr(instance, "partial_dates", ()):
+        lower, upper = date_bounds(getattr(instance, field))
+        values[lower_field(field)] = lower
+        values[upper_field(field)] = upper
+    return values
+
+
+def set_bounds(instance):
+    for field, value in bound_values(instance).items():
+        setattr(instance, field, value)
+
+
+def index_date(value):
+    """
+    Partial date as indexed in elasticsearch, its lower bound, i.e 2010 is 2010-01-01T000000. Value that is not a
+    date is left as it is.
+    """
+    lower, upper = date_bounds(value)
+    if lower is None:
+        return value
+    # Not strftime, it does not take year before 1900 in python 2
+    return "%sT000000" % lower.isoformat()
@@ -0,0 +1,66 @@
+from django.contrib.contenttypes.fields import GenericRelation
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+from popit.models import ContactDetail
+from popit.models import Identifier
+from popit.models import Link
+from popit.models import OtherName
+from popit.serializers import prefetch
+
+
+# What a document is made of, the rows rendered in the document of each model, as the lookups it is prefetched with.
+# ETag and Last-Modified, updated_since and the render cache invalidation all walk it, so they agree on what change a
+# document.
+def unprefixed(prefix, lookups):
+    return tuple(lookup[len(prefix) + 2:] for lookup in lookups)
+
+
+DOCUMENT_LOOKUPS = dict(prefetch.PREFETCH_MAP)
+DOCUMENT_LOOKUPS.update({
+    ContactDetail: unprefixed("contact_details", prefetch.CONTACT_DETAILS_PREFETCH),
+    OtherName: unprefixed("other_names", prefetch.OTHER_NAMES_PREFETCH),
+    Identifier: unprefixed("identifiers", prefetch.IDENTIFIERS_PREFETCH),
+    Link: unprefixed("links", prefetch.LINKS_PREFETCH),
+})
+
+
+def lookup_tree(model, lookups):
+    tree = {}
+    for lookup in lookups:
+        node = tree
+        current = model
+        for field_name in lookup.split("__"):
+            # Translation have no timestamp, but hvad save the master along with it
+            if field_name == getattr(current._meta, "translations_accessor", None):
+                break
+            node = node.setdefault(field_name, {})
+            current = current._meta.get_field(field_name).related_model
+    return tree
+
+
+def embedding_query(model, tree, match):
+    """
+    Q of the rows of model with a matching row in their document, model itself included. tree is from lookup_tree,
+    match(model) return the Q of the rows of a model that match, or None when none can. Walk up from the embedded
+    rows with a subquery per relation, relations where nothing can match are skipped. None when nothing can match.
+    """
+    query = match(model)
+    for name, subtree in tree.items():
+        field = model._meta.get_field(name)
+        related = field.related_model
+        related_query = embedding_query(related, subtree, match)
+        if related_query is None:
+            continue
+        if field.many_to_one and field.concrete:
+            ids = related.objects.filter(related_query).values_list("id", flat=True)
+            related_query = Q(**{field.attname + "__in": ids})
+        elif isinstance(field, GenericRelation):
+            owner_ids = related.objects.filter(related_query).filter(**{
+                field.content_type_field_name: ContentType.objects.get_for_model(model)
+            }).values_list(field.object_id_field_name, flat=True)
+            related_query = Q(id__in=owner_ids)
+        else:
+            owner_ids = related.objects.filter(related_query).values_list(field.field.attname, flat=True)
+            related_query = Q(id__in=owner_ids)
+        query = related_query if query is None else query | related_query
+    return query
@@ -0,0 +1,49 @@
+import time
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+from popit.models import Person
+from popit.views import PersonDetail
+from popit.profiling import percentile
+from popit.management.commands.generate_benchmark_data import BENCHMARK_NAME
+
+
+class Command(BaseCommand):
+    help = ("Time the person detail endpoint on the persons made by generate_benchmark_data. To see what the generic "
+            "relation indexes are worth, run it with them (manage.py migrate popit) and without them "
+            "(manage.py migrate popit 0056).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--language", type=str, default="en")
+
+    def handle(self, *args, **options):
+        language = options["language"]
+        persons = Person.objects.language(language).filter(name__startswith=BENCHMARK_NAME)
+        ids = [person.id for person in persons[:options["requests"]]]
+        if not ids:
+            raise CommandError("No benchmark data, run generate_benchmark_data first")
+
+        factory = APIRequestFactory()
+        view = PersonDetail.as_view()
+        durations = []
+        queries = 0
+        # Every request has to be served from the database
+        with override_settings(RENDER_CACHE_BACKEND=None):
+            for pk in ids:
+                request = factory.get("/%s/persons/%s" % (language, pk))
+                with CaptureQueriesContext(connection) as context:
+                    started = time.time()
+                    response = view(request, language=language, pk=pk)
+                    response.render()
+                    durations.append((time.time() - started) * 1000)
+                queries += len(context.captured_queries)
+
+        durations.sort()
+        self.stdout.write("requests: %s" % len(durations))
+        self.stdout.write("queries per request: %.1f" % (float(queries) / len(durations)))
+        for percent in (50, 95, 99):
+            self.stdout.write("p%s: %.2f ms" % (percent, percentile(durations, percent)))
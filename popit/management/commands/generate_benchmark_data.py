@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from popit.models import *
+from popit.serializers.bulk import BulkWriter
+from popit import coverage
+
+
+# Name of every person made here, benchmark_person_detail look them up with it
+BENCHMARK_NAME = "Benchmark person"
+
+# Children of each kind per person, every one of them and the person get links
+CHILDREN = 2
+CHUNK_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = ("Fill the database with persons, their other names, identifiers and contact details, and links on all of "
+            "them, --links in total. No reindex, no citation coverage, run rebuild_citation_coverage if needed.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--links", type=int, default=100000)
+        parser.add_argument("--persons", type=int, default=1000)
+        parser.add_argument("--language", type=str, default="en")
+
+    def handle(self, *args, **options):
+        persons = options["persons"]
+        language = options["language"]
+        owners = persons * (1 + 3 * CHILDREN)
+        per_owner, remainder = divmod(options["links"], owners)
+
+        created = 0
+        for start in range(0, persons, CHUNK_SIZE):
+            writer = BulkWriter(batch_size=500)
+            for number in range(start, min(start + CHUNK_SIZE, persons)):
+                person = writer.add(Person, language, {"name": "%s %s" % (BENCHMARK_NAME, number)})
+                children = [person]
+                for index in range(CHILDREN):
+                    children.append(writer.add(OtherName, language, {
+                        "name": "Other name %s" % index, "content_object": person}))
+                    children.append(writer.add(Identifier, language, {
+                        "scheme": "benchmark", "identifier": "%s-%s" % (number, index), "content_object": person}))
+                    children.append(writer.add(ContactDetail, language, {
+                        "type": "email", "value": "person%s@example.com" % number, "content_object": person}))
+
+                for owner in children:
+                    count = per_owner
+                    if remainder:
+                        count += 1
+                        remainder -= 1
+                    fields = coverage.citation_fields(owner.__class__)
+                    for index in range(count):
+                        writer.add(Link, language, {
+                            "url": "http://example.com/%s/%s" % (owner.id, index),
+                            "field": fields[index % len(fields)],
+                            "content_object": owner,
+                        })
+                        created += 1
+            with transaction.atomic():
+                writer.flush(notify=False)
+            self.stdout.write("%s persons, %s links" % (min(start + CHUNK_SIZE, persons), created))
@@ -0,0 +1,10 @@
+from popit import coverage
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Build the citation coverage index again from every link"
+
+    def handle(self, *args, **options):
+        count = coverage.rebuild()
+        self.stdout.write("%s entities with citations" % count)
@@ -0,0 +1,63 @@
+from django.db import transaction
+from rest_framework.permissions import SAFE_METHODS
+from popit.signals import batch
+from popit import cache
+from popit import profiling
+from popit import coverage
+from popit.tasks import reindex_entities
+
+
+class ReindexBatchMiddleware(object):
+    """
+    Collect every entity saved or deleted during a write request, and dispatch one reindex job for all of them once
+    the request is committed. Without it each save start its own job, possibly before the data is committed.
+    """
+
+    def process_request(self, request):
+        if request.method not in SAFE_METHODS:
+            batch.start()
+
+    def process_response(self, request, response):
+        self.dispatch()
+        return response
+
+    def dispatch(self):
+        touched = batch.finish()
+        if not touched:
+            return
+        if touched["citations"]:
+            coverage.update_coverage(touched["citations"])
+        if touched["invalidate"]:
+            invalidated = sorted(touched["invalidate"])
+            cache.invalidate(invalidated)
+            # Again once committed, a read in between could have cached the document we are replacing
+            transaction.on_commit(lambda: cache.invalidate(invalidated))
+        if not touched["update"] and not touched["delete"]:
+            return
+        roots = sorted(touched["update"])
+        deleted = sorted(touched["delete"])
+        graph = sorted(touched["delete_graph"])
+        transaction.on_commit(lambda: reindex_entities.apply_async((roots, deleted, graph)))
+
+
+class ProfilingMiddleware(object):
+    """
+    Record SQL, elasticsearch and serialization cost of every request per url name, see popit.profiling. Opt-in, put
+    it first in MIDDLEWARE_CLASSES so that the other middleware are accounted for too. Report is at /profiling.
+    """
+
+    def process_request(self, request):
+        profiling.start()
+
+    def process_response(self, request, response):
+        trace = profiling.finish()
+        if trace is None:
+            return response
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            name = "unresolved"
+        else:
+            name = match.url_name or match.view_name
+        profiling.record(name, trace, method=request.method, path=request.get_full_path(),
+                         status=response.status_code)
+        return response
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.2 on 2026-10-17 14:28
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('popit', '0055_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CitationCoverage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.CharField(max_length=255)),
+                ('fields', models.BigIntegerField(default=0, verbose_name='fields')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.ContentType')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='citationcoverage',
+            unique_together=set([('content_type', 'object_id')]),
+        ),
+    ]
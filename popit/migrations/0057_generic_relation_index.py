@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.2 on 2026-10-17 14:33
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('popit', '0056_citation_coverage'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='link',
+            options={'ordering': ('created_at', 'id')},
+        ),
+        migrations.AlterIndexTogether(
+            name='contactdetail',
+            index_together=set([('content_type', 'object_id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='identifier',
+            index_together=set([('content_type', 'object_id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='link',
+            index_together=set([('content_type', 'object_id', 'field')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='othername',
+            index_together=set([('content_type', 'object_id')]),
+        ),
+    ]
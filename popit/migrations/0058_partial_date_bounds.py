@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.2 on 2026-10-17 14:47
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from popit.dates import date_bounds
+from popit.dates import lower_field
+from popit.dates import upper_field
+
+
+PARTIAL_DATES = {
+    "contactdetail": ("valid_from", "valid_until"),
+    "membership": ("start_date", "end_date"),
+    "organization": ("founding_date", "dissolution_date"),
+    "othername": ("start_date", "end_date"),
+    "person": ("birth_date", "death_date"),
+    "post": ("start_date", "end_date"),
+}
+
+
+def set_bounds(apps, schema_editor):
+    # One update per distinct date, there are far less of them than rows
+    for model_name, fields in PARTIAL_DATES.items():
+        model = apps.get_model("popit", model_name)
+        for field in fields:
+            values = model.objects.exclude(**{field: None}).order_by().values_list(field, flat=True).distinct()
+            for value in values:
+                lower, upper = date_bounds(value)
+                if lower is None:
+                    continue
+                model.objects.filter(**{field: value}).update(**{lower_field(field): lower, upper_field(field): upper})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('popit', '0057_generic_relation_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactdetail',
+            name='valid_from_lower',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='valid from lower bound'),
+        ),
+        migrations.AddField(
+            model_name='contactdetail',
+            name='valid_from_upper',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='valid from upper bound'),
+        ),
+        migrations.AddField(
+            model_name='contactdetail',
+            name='valid_until_lower',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='valid until lower bound'),
+        ),
+        migrations.AddField(
+            model_name='contactdetail',
+            name='valid_until_upper',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='valid until upper bound'),
+        ),
+        migrations.AddField(
+            model_name='membership',
+            name='end_date_lower',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='end date lower bound'),
+        ),
+        migrations.AddField(
+            model_name='membership',
+            name='end_date_upper',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='end date upper bound'),
+        ),
+        migrations.AddField(
+            model_name='membership',
+            name='start_date_lower',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='start date lower bound'),
+        ),
+        migrations.AddField(
+            model_name='membership',
+            name='start_date_upper',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='start date upper bound'),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='dissolution_date_lower',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='dissolution date lower bound'),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='dissolution_date_upper',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='dissolution date upper bound'),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='founding_date_lower',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='founding date lower bound'),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='founding_date_upper',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='founding date upper bound'),
+        ),
+        migrations.AddField(
+            model_name='othername',
+            name='end_date_lower',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='end date lower bound'),
+        ),
+        migrations.AddField(
+            model_name='othername',
+            name='end_date_upper',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='end date upper bound'),
+        ),
+        migrations.AddField(
+            model_name='othername',
+            name='start_date_lower',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='start date lower bound'),
+        ),
+        migrations.AddField(
+            model_name='othername',
+            name='start_date_upper',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='start date upper bound'),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='birth_date_lower',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='birth date lower bound'),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='birth_date_upper',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='birth date upper bound'),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='death_date_lower',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='death date lower bound'),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='death_date_upper',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='death date upper bound'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='end_date_lower',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='end date lower bound'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='end_date_upper',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='end date upper bound'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='start_date_lower',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='start date lower bound'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='start_date_upper',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, serialize=False, verbose_name='start date upper bound'),
+        ),
+        migrations.RunPython(set_bounds, migrations.RunPython.noop),
+    ]
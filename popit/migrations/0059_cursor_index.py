@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.2 on 2026-10-17 15:28
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('popit', '0058_partial_date_bounds'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='membership',
+            index_together=set([('created_at', 'id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='organization',
+            index_together=set([('created_at', 'id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='person',
+            index_together=set([('created_at', 'id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='post',
+            index_together=set([('created_at', 'id')]),
+        ),
+    ]
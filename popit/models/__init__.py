@@ -5,6 +5,8 @@ from misc import Contact
 from misc import ContactDetail
 from misc import OtherName
 from misc import Area
+from misc import Tombstone
+from misc import CitationCoverage
 from person import Person
 from organization import Organization
 from post import Post
@@ -5,6 +5,7 @@ from django.utils.translation import ugettext_lazy as _
 from django.contrib.contenttypes.fields import GenericRelation
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
+from popit.dates import bound_field
 from popit.models.exception import PopItFieldNotExist
 from popit.models import Person
 from popit.models import Organization
@@ -16,6 +17,7 @@ import uuid
 
 
 class Membership(TranslatableModel):
+    partial_dates = ("start_date", "end_date")
     id = models.CharField(max_length=255, blank=True, primary_key=True)
     translated = TranslatedFields(
         label = models.CharField(max_length=255, blank=True, null=True, verbose_name=_("Label")),
@@ -40,11 +42,19 @@ class Membership(TranslatableModel):
                                       RegexValidator("^[0-9]{4}(-[0-9]{2}){0,2}$")
                                   ]
                                 )
+    start_date_lower = bound_field(_("start date lower bound"))
+    start_date_upper = bound_field(_("start date upper bound"))
+    end_date_lower = bound_field(_("end date lower bound"))
+    end_date_upper = bound_field(_("end date upper bound"))
     contact_details = GenericRelation(ContactDetail)
     links = GenericRelation(Link)
 
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("created at"))
-    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("updated at"))
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name=_("updated at"))
+
+    class Meta:
+        # Keyset pagination order, see utils.PopitPaginator
+        index_together = (("created_at", "id"),)
 
     def add_citation(self, field, url, note):
         if not hasattr(self, field):
@@ -75,13 +85,14 @@ class Membership(TranslatableModel):
 
     def clean(self):
         # This never get called, but we override save anyway for the uuid thingy
-        if not self.post and not self.organization:
+        if not self.post_id and not self.organization_id:
             raise ValidationError("A person must be a member of a post or organization")
 
-        if self.post and self.organization:
-            post_org = self.post.organization
-            if post_org:
-                if post_org != self.organization:
+        # Compare ids, so that only the post is loaded, if it is not already
+        if self.post_id and self.organization_id:
+            post_org_id = self.post.organization_id
+            if post_org_id:
+                if post_org_id != self.organization_id:
                     raise ValidationError("An organization for membership should match organization of a post")
 
         super(Membership, self).clean()
@@ -6,6 +6,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.fields import GenericRelation
 from django.core.validators import RegexValidator
+from popit.dates import bound_field
 from django.utils.translation import ugettext_lazy as _
 import uuid
 from popit.models.exception import PopItFieldNotExist
@@ -29,7 +30,12 @@ class Link(TranslatableModel):
     content_type = models.ForeignKey(ContentType)
     content_object = GenericForeignKey("content_type", "object_id")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("created at"))
-    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("updated at"))
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name=_("updated at"))
+
+    class Meta:
+        index_together = (("content_type", "object_id", "field"),)
+        # Otherwise the order is whatever index the database pick
+        ordering = ("created_at", "id")
 
     def save(self, *args, **kwargs):
         if not self.id:
@@ -98,6 +104,7 @@ class Contact(TranslatableModel):
 
 
 class ContactDetail(TranslatableModel):
+    partial_dates = ("valid_from", "valid_until")
     id = models.CharField(max_length=255, primary_key=True, blank=True)
     translation = TranslatedFields(
         label = models.CharField(max_length=255, verbose_name=_("label"), null=True, blank=True), # hopefully people won't be searching via label :-/
@@ -113,12 +120,19 @@ class ContactDetail(TranslatableModel):
                                         validators=[
                                               RegexValidator("^[0-9]{4}(-[0-9]{2}){0,2}$")
                                           ])
+    valid_from_lower = bound_field(_("valid from lower bound"))
+    valid_from_upper = bound_field(_("valid from upper bound"))
+    valid_until_lower = bound_field(_("valid until lower bound"))
+    valid_until_upper = bound_field(_("valid until upper bound"))
     object_id = models.CharField(max_length=255)
     content_type = models.ForeignKey(ContentType)
     content_object = GenericForeignKey("content_type", "object_id")
     links = GenericRelation(Link)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("created at"))
-    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("updated at"))
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name=_("updated at"))
+
+    class Meta:
+        index_together = (("content_type", "object_id"),)
 
     def save(self, *args, **kwargs):
         if not self.id:
@@ -164,7 +178,10 @@ class Identifier(TranslatableModel):
     links = GenericRelation(Link)
 
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("created at"))
-    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("updated at"))
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name=_("updated at"))
+
+    class Meta:
+        index_together = (("content_type", "object_id"),)
 
     def save(self, *args, **kwargs):
         if not self.id:
@@ -198,6 +215,7 @@ class Identifier(TranslatableModel):
 # In media, only translated name is used not name in original language
 # unless name uses a different character than in original language :-/
 class OtherName(TranslatableModel):
+    partial_dates = ("start_date", "end_date")
     id = models.CharField(max_length=255, primary_key=True, blank=True)
     translations = TranslatedFields(
         name = models.CharField(max_length=255, verbose_name=_("name")),
@@ -219,6 +237,10 @@ class OtherName(TranslatableModel):
                                         validators=[
                                               RegexValidator("^[0-9]{4}(-[0-9]{2}){0,2}$")
                                           ])
+    start_date_lower = bound_field(_("start date lower bound"))
+    start_date_upper = bound_field(_("start date upper bound"))
+    end_date_lower = bound_field(_("end date lower bound"))
+    end_date_upper = bound_field(_("end date upper bound"))
 
     object_id = models.CharField(max_length=255)
     content_type = models.ForeignKey(ContentType)
@@ -227,10 +249,13 @@ class OtherName(TranslatableModel):
     links = GenericRelation(Link)
 
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("created at"))
-    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("updated at"))
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name=_("updated at"))
 
     note = models.TextField(null=True, blank=True)
 
+    class Meta:
+        index_together = (("content_type", "object_id"),)
+
     def save(self, *args, **kwargs):
         if not self.id:
             id_ = uuid.uuid4()
@@ -279,7 +304,7 @@ class Area(TranslatableModel):
     links = GenericRelation(Link)
 
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     # TODO: Defer geometry until django 1.9 impement json field in postgresql extension
 
     def save(self, *args, **kwargs):
@@ -311,3 +336,31 @@ class Area(TranslatableModel):
     def __unicode__(self):
         return self.safe_translation_getter('name', self.name)
 
+
+
+# Sync client pull what changed with updated_since, but a deleted entity is just gone. This is what is left of it.
+class Tombstone(models.Model):
+    entity = models.CharField(max_length=255, verbose_name=_("entity"))
+    entity_id = models.CharField(max_length=255, verbose_name=_("entity id"))
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name=_("deleted at"))
+
+    class Meta:
+        index_together = (("entity", "created_at"),)
+
+    def __unicode__(self):
+        return "%s %s" % (self.entity, self.entity_id)
+
+
+# Which fields of an entity have at least one citation, so that coverage can be reported without going through every
+# Link. Bit n of fields is set when the nth field of popit.coverage.citation_fields(model) is cited.
+class CitationCoverage(models.Model):
+    content_type = models.ForeignKey(ContentType)
+    object_id = models.CharField(max_length=255)
+    fields = models.BigIntegerField(default=0, verbose_name=_("fields"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("updated at"))
+
+    class Meta:
+        unique_together = (("content_type", "object_id"),)
+
+    def __unicode__(self):
+        return "%s %s" % (self.content_type_id, self.object_id)
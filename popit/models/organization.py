@@ -5,6 +5,7 @@ from hvad.models import TranslatedFields
 from django.utils.translation import ugettext_lazy as _
 from django.contrib.contenttypes.fields import GenericRelation
 from django.core.validators import RegexValidator
+from popit.dates import bound_field
 from popit.models.misc import OtherName
 from popit.models.misc import Contact
 from popit.models.misc import ContactDetail
@@ -16,6 +17,7 @@ import uuid
 
 
 class Organization(TranslatableModel):
+    partial_dates = ("founding_date", "dissolution_date")
     id = models.CharField(max_length=255, primary_key=True, blank=True)
     translated = TranslatedFields(
         name = models.CharField(max_length=255, verbose_name=_('name')),
@@ -36,6 +38,10 @@ class Organization(TranslatableModel):
                                               RegexValidator("^[0-9]{4}(-[0-9]{2}){0,2}$")
                                           ]
                                         )
+    founding_date_lower = bound_field(_("founding date lower bound"))
+    founding_date_upper = bound_field(_("founding date upper bound"))
+    dissolution_date_lower = bound_field(_("dissolution date lower bound"))
+    dissolution_date_upper = bound_field(_("dissolution date upper bound"))
 
     image = models.URLField(null=True, blank=True, verbose_name=_('image'))
 
@@ -45,7 +51,11 @@ class Organization(TranslatableModel):
     links = GenericRelation(Link)
 
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('created at'))
-    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('updated at'))
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name=_('updated at'))
+
+    class Meta:
+        # Keyset pagination order, see utils.PopitPaginator
+        index_together = (("created_at", "id"),)
 
     def add_citation(self, field, url, note):
         if not hasattr(self, field):
@@ -5,6 +5,7 @@ from hvad.models import TranslatedFields
 from django.utils.translation import ugettext_lazy as _
 from django.contrib.contenttypes.fields import GenericRelation
 from django.core.validators import RegexValidator
+from popit.dates import bound_field
 from popit.models.misc import OtherName
 from popit.models.misc import Contact
 from popit.models.misc import ContactDetail
@@ -16,6 +17,7 @@ import uuid
 
 # Citation table is outside of model. Why? Multiple source of information
 class Person(TranslatableModel):
+    partial_dates = ("birth_date", "death_date")
     id = models.CharField(max_length=255, primary_key=True, blank=True)
     translations = TranslatedFields(
         name = models.CharField(max_length=255, verbose_name=_("name")),
@@ -47,6 +49,10 @@ class Person(TranslatableModel):
                                         validators=[
                                               RegexValidator("^[0-9]{4}(-[0-9]{2}){0,2}$")
                                           ])
+    birth_date_lower = bound_field(_("birth date lower bound"))
+    birth_date_upper = bound_field(_("birth date upper bound"))
+    death_date_lower = bound_field(_("death date lower bound"))
+    death_date_upper = bound_field(_("death date upper bound"))
     image = models.CharField(max_length=255, null=True, blank=True, verbose_name=_("image links")) # Maybe I should have a default image path :-/
 
     other_names = GenericRelation(OtherName)
@@ -55,7 +61,11 @@ class Person(TranslatableModel):
     contact_details = GenericRelation(ContactDetail)
 
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("created at"))
-    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Updated at"))
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name=_("Updated at"))
+
+    class Meta:
+        # Keyset pagination order, see utils.PopitPaginator
+        index_together = (("created_at", "id"),)
 
     def add_citation(self, field, url, note):
         if not hasattr(self, field):
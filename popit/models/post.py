@@ -5,6 +5,7 @@ from hvad.models import TranslatedFields
 from django.utils.translation import ugettext_lazy as _
 from django.contrib.contenttypes.fields import GenericRelation
 from django.core.validators import RegexValidator
+from popit.dates import bound_field
 from popit.models import Organization
 from popit.models import Area
 from popit.models import OtherName
@@ -16,6 +17,7 @@ import uuid
 
 
 class Post(TranslatableModel):
+    partial_dates = ("start_date", "end_date")
     id = models.CharField(max_length=255, primary_key=True, blank=True, verbose_name=_("id"))
     translations = TranslatedFields(
         label = models.CharField(max_length=255, verbose_name=_("label"), null=True, blank=True),
@@ -32,13 +34,21 @@ class Post(TranslatableModel):
                                         validators=[
                                               RegexValidator("^[0-9]{4}(-[0-9]{2}){0,2}$")
                                           ])
+    start_date_lower = bound_field(_("start date lower bound"))
+    start_date_upper = bound_field(_("start date upper bound"))
+    end_date_lower = bound_field(_("end date lower bound"))
+    end_date_upper = bound_field(_("end date upper bound"))
 
     contact_details = GenericRelation(ContactDetail)
 
     links = GenericRelation(Link)
 
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("created at"))
-    updated_at = models.DateTimeField(auto_now_add=True, verbose_name=_("updated at"))
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name=_("updated at"))
+
+    class Meta:
+        # Keyset pagination order, see utils.PopitPaginator
+        index_together = (("created_at", "id"),)
 
     def add_citation(self, field, url, note):
         if not hasattr(self, field):
@@ -0,0 +1,204 @@
+import json
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connections
+from django.db.backends.utils import CursorWrapper
+
+
+# Where each request spend its time, per url name, collected by ProfilingMiddleware. A trace is per thread, so each
+# request have its own. Code that want its time accounted for wrap itself in measure(), it cost nothing when the
+# request is not profiled.
+_local = threading.local()
+
+logger = logging.getLogger("popit.profiling")
+
+# Queries kept per request for the slow request log
+QUERY_LOG_SIZE = 1000
+
+METRICS = ("duration", "sql_count", "sql_time", "es_count", "es_time", "serialization_time")
+
+
+class QueryCounter(CursorWrapper):
+    """
+    Cursor of a profiled request, account every query to the trace, around whatever cursor django would use. Not
+    from connection.queries_log, it is bounded and only kept with DEBUG on.
+    """
+
+    def __init__(self, cursor, db, trace):
+        super(QueryCounter, self).__init__(cursor, db)
+        self.trace = trace
+
+    def execute(self, sql, params=None):
+        started = time.time()
+        try:
+            return super(QueryCounter, self).execute(sql, params)
+        finally:
+            self.trace.add_query(self.db.ops.last_executed_query(self.cursor, sql, params), time.time() - started)
+
+    def executemany(self, sql, param_list):
+        started = time.time()
+        try:
+            return super(QueryCounter, self).executemany(sql, param_list)
+        finally:
+            self.trace.add_query(sql, time.time() - started)
+
+
+def restore(connection):
+    # Back to the cursor methods of the class
+    connection.__dict__.pop("make_cursor", None)
+    connection.__dict__.pop("make_debug_cursor", None)
+
+
+class Trace(object):
+
+    def __init__(self):
+        self.started = time.time()
+        self.timings = {}
+        self.active = set()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        # Only the first QUERY_LOG_SIZE are kept for the slow request log, the count and time are of every query
+        self.queries = []
+        self._connections = list(connections.all())
+        for connection in self._connections:
+            # From the methods of the class, in case a trace before was never finished
+            restore(connection)
+            connection.make_cursor = self.counted(connection, connection.make_cursor)
+            connection.make_debug_cursor = self.counted(connection, connection.make_debug_cursor)
+
+    def counted(self, connection, make_cursor):
+        return lambda cursor: QueryCounter(make_cursor(cursor), connection, self)
+
+    def add(self, kind, seconds):
+        count, total = self.timings.get(kind, (0, 0.0))
+        self.timings[kind] = (count + 1, total + seconds)
+
+    def add_query(self, sql, seconds):
+        self.sql_count += 1
+        self.sql_time += seconds
+        if len(self.queries) < QUERY_LOG_SIZE:
+            self.queries.append({"sql": sql, "time": "%.3f" % seconds})
+
+    def finish(self):
+        duration = time.time() - self.started
+        for connection in self._connections:
+            restore(connection)
+        self._connections = []
+
+        es_count, es_time = self.timings.get("es", (0, 0.0))
+        serialization_time = self.timings.get("serialization", (0, 0.0))[1]
+        return {
+            "duration": duration,
+            "sql_count": self.sql_count,
+            "sql_time": self.sql_time,
+            "es_count": es_count,
+            "es_time": es_time,
+            "serialization_time": serialization_time,
+        }
+
+
+def start():
+    _local.trace = Trace()
+
+
+def current():
+    return getattr(_local, "trace", None)
+
+
+def finish():
+    trace = current()
+    _local.trace = None
+    return trace
+
+
+@contextmanager
+def measure(kind):
+    """
+    Account the time spent in the block to kind, i.e es or serialization, for the request being profiled. Nested
+    measure of the same kind are part of the outer one.
+    """
+    trace = current()
+    if trace is None or kind in trace.active:
+        yield
+        return
+    trace.active.add(kind)
+    started = time.time()
+    try:
+        yield
+    finally:
+        trace.active.discard(kind)
+        trace.add(kind, time.time() - started)
+
+
+def percentile(values, percent):
+    # Nearest rank, values sorted
+    if not values:
+        return None
+    rank = int(math.ceil(percent / 100.0 * len(values))) - 1
+    return values[max(rank, 0)]
+
+
+class Recorder(object):
+    """
+    Last PROFILING_SAMPLE_SIZE samples of each url name, in this process memory.
+    """
+
+    def __init__(self, sample_size=None):
+        self.sample_size = sample_size or settings.PROFILING_SAMPLE_SIZE
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, sample):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.sample_size)
+            samples.append(sample)
+
+    def report(self):
+        with self._lock:
+            samples = dict((name, list(items)) for name, items in self._samples.items())
+
+        report = []
+        for name, items in samples.items():
+            entry = {"name": name, "count": len(items)}
+            for metric in METRICS:
+                values = sorted(item[metric] for item in items)
+                entry[metric] = {
+                    "p50": percentile(values, 50),
+                    "p95": percentile(values, 95),
+                    "p99": percentile(values, 99),
+                }
+            report.append(entry)
+        # Most expensive first
+        report.sort(key=lambda entry: entry["duration"]["p95"], reverse=True)
+        return report
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+
+recorder = Recorder()
+
+
+def record(name, trace, **detail):
+    """
+    Add the finished trace to the samples of url name. Slow one are also logged with detail, i.e the path, and every
+    query it ran.
+    """
+    sample = trace.finish()
+    recorder.record(name, sample)
+
+    threshold = settings.PROFILING_SLOW_THRESHOLD
+    if threshold is not None and sample["duration"] >= threshold:
+        dump = dict(sample, name=name, queries=trace.queries, **detail)
+        if trace.sql_count > len(trace.queries):
+            dump["queries_truncated"] = trace.sql_count - len(trace.queries)
+        logger.warning(json.dumps(dump))
+    return sample
@@ -1,71 +1,189 @@
+from collections import OrderedDict
+from django.contrib.contenttypes.models import ContentType
+from django.db import router
+from django.utils import timezone
 from hvad.contrib.restframework import TranslatableModelSerializer
+from hvad.utils import get_cached_translation
 from popit.models import Link
 from popit.models import Area
+from popit.serializers.bulk import BulkWriter
+from popit.signals import children_changed
+from popit import profiling
+from popit import coverage
+from popit import dates
+
+
+# Never compared nor written by update_childs
+NOT_DIFFED = set(["id", "master", "language_code", "created_at", "updated_at", "content_type", "object_id"])
 
 
 class BasePopitSerializer(TranslatableModelSerializer):
 
+    def get_reference(self, model, pk):
+        """
+        Return the entity of model with id pk, raise model.DoesNotExist if there is none. Bulk write put the entities
+        referred by the whole batch in context["references"], {model: {id: entity}}, so that they are not queried one
+        by one.
+        """
+        references = self.context.get("references")
+        if references is not None and model in references:
+            try:
+                return references[model][pk]
+            except KeyError:
+                raise model.DoesNotExist("%s %s does not exist" % (model.__name__, pk))
+        return model.objects.untranslated().get(id=pk)
+
+    def load_references(self, wanted):
+        """
+        Load the entities in wanted, {model: ids}, into context["references"] with one query per model, for
+        get_reference. Entities already there are not loaded again.
+        """
+        references = self.context.setdefault("references", {})
+        for model, ids in wanted.items():
+            loaded = references.setdefault(model, {})
+            ids = [pk for pk in set(ids) if pk and pk not in loaded]
+            if ids:
+                loaded.update(model.objects.untranslated().in_bulk(ids))
+
+    def create_instance(self, model, validated_data):
+        # With a writer in context, i.e bulk write, the row is inserted later along with the rest of the batch
+        writer = self.context.get("writer")
+        if writer is not None:
+            return writer.add(model, self.language, validated_data)
+        return model.objects.language(self.language).create(**validated_data)
+
     def create_links(self, validated_data, entity):
-        language_code = self.language
         validated_data["content_object"] = entity
-        Link.objects.language(language_code).create(**validated_data)
+        self.create_instance(Link, validated_data)
 
     def create_child(self, validated_data, child, parent):
         links = validated_data.pop("links", [])
-        language_code = self.language
         validated_data["content_object"] = parent
-        obj = child.objects.language(language_code).create(**validated_data)
+        obj = self.create_instance(child, validated_data)
         for link in links:
             self.create_links(link, obj)
 
     def create_area(self, validated_data):
-        language_code = self.language
         validated_data.pop("language_code", None)
-        area = Area.objects.language(language_code).create(**validated_data)
+        area = self.create_instance(Area, validated_data)
         return area
 
-    def update_childs(self, validated_data, child, parent):
-        # parent mostly exist at create,
+    def update_childs(self, items, child, parent):
+        """
+        Update the children of parent in items, validated data of child, and their links. Item without id, or with
+        an id that does not exist, are created, so is an item with the id of a child of another entity, with a new id. Existing children are loaded with one query, and only the rows with
+        a changed field are written. Children do not send post_save, parent get one children_changed when serializer
+        is saved.
+        """
+        self.apply_changes(child, [(item, parent) for item in items], parent)
+
+    def update_links(self, items, parent):
+        self.apply_changes(Link, [(item, parent) for item in items], parent)
+
+    def apply_changes(self, model, pairs, parent):
+        # pairs is [(validated data, owner)], owner is the entity a new row belong to
         language_code = self.language
-        if validated_data.get("id"):
-            try:
-                objs = child.objects.untranslated().get(id=validated_data.get("id"))
-            except child.DoesNotExist:
-                self.create_child(validated_data, child, parent)
-                return
+        translations_model = model._meta.translations_model
+        translated_fields = set(field.name for field in translations_model._meta.fields) - NOT_DIFFED
+        shared_fields = set(field.name for field in model._meta.fields) - NOT_DIFFED
+
+        ids = [item["id"] for item, owner in pairs if item.get("id")]
+        existing = {}
+        if ids:
+            existing = dict((obj.id, obj) for obj in model.objects.language(language_code).filter(id__in=ids))
+            untranslated = [pk for pk in ids if pk not in existing]
+            if untranslated:
+                for obj in model.objects.untranslated().filter(id__in=untranslated):
+                    existing[obj.id] = obj.translate(language_code)
+
+        # An id of another entity child is not moved nor changed, the item is a new row of its owner instead
+        foreign = set()
+        for item, owner in pairs:
+            obj = existing.get(item.get("id"))
+            if obj is not None and not self.is_owned_by(obj, owner):
+                del existing[obj.id]
+                foreign.add(obj.id)
 
-            if not language_code in objs.get_available_languages():
-                obj = objs.translate(language_code)
+        writer = BulkWriter()
+        new_translations = []
+        nested_links = []
+        # Written links have no post_save either, coverage of their owner is updated here
+        cited_owners = set()
+        changed = False
+        now = timezone.now()
+        for item, owner in pairs:
+            links = item.pop("links", [])
+            obj = existing.get(item.get("id"))
+            if obj is None:
+                if item.get("id") in foreign:
+                    del item["id"]
+                item.pop("language_code", None)
+                item["content_object"] = owner
+                obj = writer.add(model, language_code, item)
+                if model is Link:
+                    cited_owners.add(coverage.owner_of(obj))
+                changed = True
             else:
-                obj = child.objects.language(language_code).get(id=validated_data.get("id"))
+                shared = {}
+                translated = {}
+                for key, value in item.items():
+                    if key in shared_fields and getattr(obj, key) != value:
+                        shared[key] = value
+                    elif key in translated_fields and getattr(obj, key) != value:
+                        translated[key] = value
+                    else:
+                        continue
+                    setattr(obj, key, value)
 
-            links = validated_data.pop("links", [])
+                translation = get_cached_translation(obj)
+                is_new_translation = translation.pk is None
+                if is_new_translation:
+                    translation.master_id = obj.id
+                    new_translations.append(translation)
+                elif translated:
+                    translations_model.objects.filter(pk=translation.pk).update(**translated)
 
-            for key, value in validated_data.iteritems():
-                if key in ("id", "language_code", "created_at" "updated_at"):
-                    continue
-                setattr(obj, key, value)
+                if any(field in shared for field in getattr(model, "partial_dates", ())):
+                    shared.update(dates.bound_values(obj))
 
-            obj.save()
+                if shared or translated or is_new_translation:
+                    model.objects.untranslated().filter(id=obj.id).update(updated_at=now, **shared)
+                    if model is Link:
+                        cited_owners.add(coverage.owner_of(obj))
+                    changed = True
+            nested_links.extend((link, obj) for link in links)
 
-            for link in links:
-                self.update_links(link, obj)
-        else:
-            self.create_child(validated_data, child, parent)
+        writer.flush(notify=False)
+        if new_translations:
+            translations_model.objects.bulk_create(new_translations)
+        if cited_owners:
+            coverage.touch(cited_owners)
+        if nested_links:
+            self.apply_changes(Link, nested_links, parent)
+        if changed:
+            self.changed_parents[(parent.__class__, parent.id)] = parent
 
-    def update_links(self, validated_data, parent):
-        language_code = self.language
+    def is_owned_by(self, obj, owner):
+        content_type = ContentType.objects.get_for_model(owner)
+        return obj.content_type_id == content_type.id and obj.object_id == owner.id
 
-        if validated_data.get("id"):
-            links = Link.objects.language(language_code).filter(id=validated_data.get("id"))
-            if not links:
-                self.create_links(validated_data, parent)
-            else:
-                link = links[0]
-                link.label = validated_data.get("label", link.label)
-                link.field = validated_data.get("field", link.field)
-                link.url = validated_data.get("url", link.url)
-                link.note = validated_data.get("note", link.note)
-                link.save()
-        else:
-            self.create_links(validated_data, parent)
\ No newline at end of file
+    @property
+    def changed_parents(self):
+        if not hasattr(self, "_changed_parents"):
+            self._changed_parents = OrderedDict()
+        return self._changed_parents
+
+    def save(self, **kwargs):
+        instance = super(BasePopitSerializer, self).save(**kwargs)
+        # One notification per parent for every child written
+        parents = self.changed_parents.values()
+        self._changed_parents = OrderedDict()
+        for parent in parents:
+            children_changed.send(sender=parent.__class__, instance=parent, created=False, raw=False,
+                                  using=router.db_for_write(parent.__class__), update_fields=None)
+        return instance
+
+    @property
+    def data(self):
+        with profiling.measure("serialization"):
+            return super(BasePopitSerializer, self).data
@@ -0,0 +1,107 @@
+import uuid
+from django.contrib.contenttypes.models import ContentType
+from django.db import router
+from django.db.models import QuerySet
+from django.db.models.signals import post_save
+from hvad.utils import get_cached_translation
+from hvad.utils import set_cached_translation
+from popit import dates
+
+
+# Bulk write. Serializers are validated and saved as usual, but with the entities they refer to loaded for the whole
+# batch in context["references"], and context["writer"] collecting the rows they create, so that each table get one
+# INSERT per batch instead of one per row.
+def load_references(model, items, instances=()):
+    """
+    Return {model: {id: entity}} of every entity referred by a foreign key id, i.e person_id, in items, and by the
+    instances being updated. One query per referred model.
+    """
+    wanted = {}
+    for field in model._meta.fields:
+        if not field.many_to_one or field.related_model is ContentType:
+            continue
+        ids = wanted.setdefault(field.related_model, set())
+        for item in items:
+            value = item.get(field.attname) if isinstance(item, dict) else None
+            if value and isinstance(value, basestring):
+                ids.add(value)
+        for instance in instances:
+            value = getattr(instance, field.attname)
+            if value:
+                ids.add(value)
+
+    references = {}
+    for related, ids in wanted.items():
+        references[related] = related.objects.untranslated().in_bulk(list(ids)) if ids else {}
+    return references
+
+
+class BulkWriter(object):
+    """
+    Stand in for Model.objects.language(language).create(), see BasePopitSerializer.create_instance. Rows get their
+    id right away so children can point to them, and are inserted on flush, master and translation table with a
+    bulk_create each.
+    """
+
+    def __init__(self, batch_size=None, rows=None):
+        self.batch_size = batch_size
+        self.rows = list(rows or [])
+
+    def add(self, model, language, validated_data):
+        instance = model(**validated_data)
+        if not instance.id:
+            instance.id = str(uuid.uuid4().hex)
+        if get_cached_translation(instance) is None:
+            instance.translate(language)
+        get_cached_translation(instance).language_code = language
+
+        # What save() would have checked, except foreign keys that are checked with references already
+        exclude = [field.name for field in model._meta.fields if field.many_to_one]
+        instance.clean_fields(exclude=exclude)
+        # bulk_create send no pre_save either
+        dates.set_bounds(instance)
+        self.rows.append(instance)
+        return instance
+
+    def savepoint(self):
+        return len(self.rows)
+
+    def rollback(self, savepoint):
+        # Drop rows added since savepoint, i.e by an item that failed half way
+        del self.rows[savepoint:]
+
+    def flush(self, notify=True):
+        """
+        Insert every row collected, then send post_save for each so that the usual handlers, i.e reindex, see them,
+        unless notify is False. Run it in a transaction.
+        """
+        grouped = []
+        for instance in self.rows:
+            for model, instances in grouped:
+                if model is instance.__class__:
+                    instances.append(instance)
+                    break
+            else:
+                grouped.append((instance.__class__, [instance]))
+
+        for model, instances in grouped:
+            QuerySet(model).bulk_create(instances, batch_size=self.batch_size)
+            translations = []
+            for instance in instances:
+                translation = get_cached_translation(instance)
+                translation.master_id = instance.id
+                translations.append(translation)
+            QuerySet(model._meta.translations_model).bulk_create(translations, batch_size=self.batch_size)
+
+        if notify:
+            for model, instances in grouped:
+                using = router.db_for_write(model)
+                for instance in instances:
+                    # hvad save the cached translation on post_save, it is already in
+                    translation = set_cached_translation(instance, None)
+                    post_save.send(sender=model, instance=instance, created=True, raw=False, using=using,
+                                   update_fields=None)
+                    set_cached_translation(instance, translation)
+        rows = self.rows
+        self.rows = []
+        return rows
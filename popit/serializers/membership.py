@@ -16,6 +16,9 @@ from popit.serializers import OrganizationSerializer
 from popit.serializers import PersonSerializer
 from popit.serializers import PostSerializer
 from popit.serializers.base import BasePopitSerializer
+from popit.serializers.prefetch import PrefetchListSerializer
+from popit.serializers.prefetch import get_children
+from popit.serializers.prefetch import get_related
 from rest_framework import serializers
 from rest_framework.serializers import ValidationError
 import re
@@ -108,29 +111,29 @@ class MembershipSerializer(BasePopitSerializer):
         validated_data.pop("language_code", None)
 
         if person_id:
-            person = Person.objects.untranslated().get(id=person_id)
+            person = self.get_reference(Person, person_id)
             validated_data["person"] = person
 
         if organization_id:
-            organization = Organization.objects.untranslated().get(id=organization_id)
+            organization = self.get_reference(Organization, organization_id)
             validated_data["organization"] = organization
 
         if on_behalf_of_id:
-            on_behalf_of = Organization.objects.untranslated().get(id=on_behalf_of_id)
+            on_behalf_of = self.get_reference(Organization, on_behalf_of_id)
             validated_data["on_behalf_of"] = on_behalf_of
 
         if area_id:
-            area = Area.objects.untranslated().get(id=area_id)
+            area = self.get_reference(Area, area_id)
             validated_data["area"] = area
 
         if post_id:
-            post = Post.objects.untranslated().get(id=post_id)
+            post = self.get_reference(Post, post_id)
             validated_data["post"] = post
 
             # Do not override organization assigned by user
             if not organization_id:
-                if post.organization:
-                    validated_data["organization"] = post.organization
+                if post.organization_id:
+                    validated_data["organization_id"] = post.organization_id
 
         if not validated_data.get("start_date"):
             validated_data["start_date"] = None
@@ -138,7 +141,7 @@ class MembershipSerializer(BasePopitSerializer):
         if not validated_data.get("end_date"):
             validated_data["end_date"] = None
 
-        membership = Membership.objects.language(self.language).create(**validated_data)
+        membership = self.create_instance(Membership, validated_data)
 
         for contact_detail in contact_details:
             self.create_child(contact_detail, ContactDetail, membership)
@@ -180,44 +183,52 @@ class MembershipSerializer(BasePopitSerializer):
             instance.end_date = None
 
         if person_id:
-            person = Person.objects.untranslated().get(id=person_id)
+            person = self.get_reference(Person, person_id)
             instance.person = person
 
         if organization_id:
-            organization = Organization.objects.untranslated().get(id=organization_id)
+            organization = self.get_reference(Organization, organization_id)
             instance.organization = organization
 
         if on_behalf_of_id:
-            on_behalf_of = Organization.objects.untranslated().get(id=on_behalf_of_id)
+            on_behalf_of = self.get_reference(Organization, on_behalf_of_id)
             instance.on_behalf_of = on_behalf_of
 
         if area_id:
-            area = Area.objects.untranslated().get(id=area_id)
+            area = self.get_reference(Area, area_id)
             instance.area = area
 
         if post_id:
-            post = Post.objects.untranslated().get(id=post_id)
-            instance.post = post
-
-        instance.save()
+            instance.post_id = post_id
 
-        if instance.post:
-            if not instance.organization:
+        if instance.post_id:
+            # Loaded in validate, save check it against the organization
+            post = self.get_reference(Post, instance.post_id)
+            instance.post = post
+            if not instance.organization_id:
                 # The spec make this optional, but in sinar we link all post to org
-                if instance.post.organization:
-                    instance.organization = instance.post.organization
-                    instance.save()
+                if post.organization_id:
+                    instance.organization_id = post.organization_id
 
-        for contact_detail in contact_details:
+        instance.save()
 
-            self.update_childs(contact_detail, ContactDetail, instance)
+        self.update_childs(contact_details, ContactDetail, instance)
 
-        for link in links:
-            self.update_links(link, instance)
+        self.update_links(links, instance)
 
         return instance
 
     def validate(self, data):
+        # Every entity referred is loaded at once, then validate, create and update get them from the context
+        post_ids = [data.get("post_id")]
+        if self.instance:
+            post_ids.append(self.instance.post_id)
+        self.load_references({
+            Person: [data.get("person_id")],
+            Organization: [data.get("organization_id"), data.get("on_behalf_of_id")],
+            Post: post_ids,
+            Area: [data.get("area_id")],
+        })
 
         if not data.get("post_id") and not data.get("organization_id"):
             logging.warn(data)
@@ -226,40 +237,42 @@ class MembershipSerializer(BasePopitSerializer):
 
         if data.get("post_id"):
             try:
-                Post.objects.untranslated().get(id=data.get("post_id"))
+                self.get_reference(Post, data.get("post_id"))
             except Post.DoesNotExist:
                 raise ValidationError("Post id %s does not exist" % data.get("post_id"))
 
         if data.get("organization_id"):
             try:
-                Organization.objects.untranslated().get(id=data.get("organization_id"))
+                self.get_reference(Organization, data.get("organization_id"))
             except Organization.DoesNotExist:
                 raise ValidationError("Organization id %s does not exist" % data.get("organization_id"))
 
         if data.get("post_id") and data.get("organization_id"):
-            post = Post.objects.untranslated().get(id=data.get("post_id"))
+            post = self.get_reference(Post, data.get("post_id"))
             if post.organization_id:
                 if post.organization_id != data.get("organization_id"):
                     raise serializers.ValidationError("Organization id is not consistent orrganization id in post")
 
         if data.get("post_id") and not data.get("organization_id"):
             if self.instance:
-                if self.instance.organization_id and self.instance.post.organization_id:
-                    post = Post.objects.untranslated().get(id=data.get("post_id"))
+                if self.instance.organization_id and self.instance.post_id and \
+                        self.get_reference(Post, self.instance.post_id).organization_id:
+                    post = self.get_reference(Post, data.get("post_id"))
                     if post.organization_id != self.instance.organization_id:
                         raise serializers.ValidationError("Post Organization ID does not match organization id")
 
         if not data.get("post_id") and data.get("organization_id"):
             if self.instance:
-                if self.instance.post:
-                    if self.instance.post.organization_id:
-                        organization = Organization.objects.untranslated().get(id=data.get("organization_id"))
-                        if organization.id != self.instance.post.organization_id:
+                if self.instance.post_id:
+                    instance_post = self.get_reference(Post, self.instance.post_id)
+                    if instance_post.organization_id:
+                        organization = self.get_reference(Organization, data.get("organization_id"))
+                        if organization.id != instance_post.organization_id:
                             raise serializers.ValidationError("Organization ID does not match Post Organization id")
 
         if data.get("area_id"):
             try:
-                Area.objects.untranslated().get(id=data.get("area_id"))
+                self.get_reference(Area, data.get("area_id"))
             except Area.DoesNotExist:
                 raise ValidationError("Area id %s does not exist" % data.get("area_id"))
 
@@ -278,7 +291,7 @@ class MembershipSerializer(BasePopitSerializer):
                 raise serializers.ValidationError("person_id must not be empty")
         else:
             try:
-                Person.objects.untranslated().get(id=data.get("person_id"))
+                self.get_reference(Person, data.get("person_id"))
 
             except Person.DoesNotExist:
                 raise serializers.ValidationError("Person %s does not exist" % data.get("person_id"))
@@ -291,44 +304,45 @@ class MembershipSerializer(BasePopitSerializer):
         # Now we do all the overriding
 
         if instance.organization_id:
-            organization_instance = instance.organization.__class__.objects.untranslated().get(id=instance.organization_id)
+            organization_instance = get_related(instance, "organization")
             organization_serializer = MembershipOrganizationSerializer(instance=organization_instance, language=instance.language_code)
             data["organization"] = organization_serializer.data
 
         if instance.on_behalf_of_id:
-            on_behalf_of_instance = instance.on_behalf_of.__class__.objects.untranslated().get(id=instance.on_behalf_of_id)
+            on_behalf_of_instance = get_related(instance, "on_behalf_of")
             on_behalf_of_serializer = MembershipOrganizationSerializer(on_behalf_of_instance, language=instance.language_code)
             data["on_behalf_of"] = on_behalf_of_serializer.data
 
         if instance.member_id:
-            member_instance = instance.member.__class__.objects.untranslated().get(id=instance.member_id)
+            member_instance = get_related(instance, "member")
             member_serializer = MembershipOrganizationSerializer(instance=member_instance, language=instance.language_code)
             data["member"] = member_serializer.data
 
-        person_instance = instance.person.__class__.objects.untranslated().get(id=instance.person_id)
+        person_instance = get_related(instance, "person")
         person_serializer = MembershipPersonSerializer(instance=person_instance, language=instance.language_code)
         data["person"] = person_serializer.data
 
         if instance.post_id:
-            post_instance = instance.post.__class__.objects.untranslated().get(id=instance.post_id)
+            post_instance = get_related(instance, "post")
             post_serializer = MembershipPostSerializer(instance=post_instance, language=instance.language_code)
             data["post"] = post_serializer.data
 
-        links_instance = instance.links.untranslated().all()
+        links_instance = get_children(instance, "links")
         links_serializer = LinkSerializer(instance=links_instance, many=True, language=instance.language_code)
         data["links"] = links_serializer.data
 
-        contact_details_instance = instance.contact_details.untranslated().all()
+        contact_details_instance = get_children(instance, "contact_details")
         contact_details_serializer = ContactDetailSerializer(instance=contact_details_instance, many=True,
                                                              language=instance.language_code)
         data["contact_details"] = contact_details_serializer.data
 
         if instance.area_id:
-            area_instance = instance.area.__class__.objects.untranslated().get(id=instance.area_id)
+            area_instance = get_related(instance, "area")
             area_serializer = AreaSerializer(area_instance, language=instance.language_code)
             data["area"] = area_serializer.data
         return data
 
     class Meta:
         model = Membership
-        extra_kwargs = {'id': {'read_only': False, 'required': False}}
\ No newline at end of file
+        extra_kwargs = {'id': {'read_only': False, 'required': False}}
+        list_serializer_class = PrefetchListSerializer
\ No newline at end of file
@@ -11,6 +11,7 @@ from popit.serializers.exceptions import ContentObjectNotAvailable
 from popit.models import Area
 from rest_framework.serializers import ValidationError
 from popit.serializers.base import BasePopitSerializer
+from popit.serializers.prefetch import get_children
 import re
 
 
@@ -75,14 +76,13 @@ class ContactDetailSerializer(BasePopitSerializer):
         instance.valid_from = data.get('valid_from', instance.valid_from)
         instance.valid_until = data.get('valid_until', instance.valid_until)
         instance.save()
-        for link in links:
-            self.update_links(link, instance)
+        self.update_links(links, instance)
         return instance
 
     def to_representation(self, instance):
         data = super(ContactDetailSerializer, self).to_representation(instance)
 
-        links_instance = instance.links.untranslated().all()
+        links_instance = get_children(instance, "links")
         links_serializer = LinkSerializer(instance=links_instance, many=True, language=instance.language_code)
         data["links"] = links_serializer.data
 
@@ -131,15 +131,14 @@ class IdentifierSerializer(BasePopitSerializer):
         instance.scheme = data.get('scheme', instance.scheme)
         instance.identifier = data.get('identifier', instance.identifier)
         instance.save()
-        for link in links:
-            self.update_links(link, instance)
+        self.update_links(links, instance)
 
         return instance
 
     def to_representation(self, instance):
         data = super(IdentifierSerializer, self).to_representation(instance)
 
-        links_instance = instance.links.untranslated().all()
+        links_instance = get_children(instance, "links")
         links_serializer = LinkSerializer(instance=links_instance, many=True, language=instance.language_code)
         data["links"] = links_serializer.data
 
@@ -197,14 +196,13 @@ class OtherNameSerializer(BasePopitSerializer):
         instance.note = data.get('note', instance.note)
 
         instance.save()
-        for link in links:
-            self.update_links(link, instance)
+        self.update_links(links, instance)
         return instance
 
     def to_representation(self, instance):
         data = super(OtherNameSerializer, self).to_representation(instance)
 
-        links_instance = instance.links.untranslated().all()
+        links_instance = get_children(instance, "links")
         links_serializer = LinkSerializer(instance=links_instance, many=True, language=instance.language_code)
         data["links"] = links_serializer.data
 
@@ -279,8 +277,7 @@ class AreaSerializer(BasePopitSerializer):
         instance.classification = data.get("classification", instance.classification)
         instance.save()
 
-        for link in links:
-            self.update_links(link, instance)
+        self.update_links(links, instance)
         return instance
 
     def update_area(self, data):
@@ -300,14 +297,13 @@ class AreaSerializer(BasePopitSerializer):
                 parent = self.create(parent_data)
             area.parent = parent
         area.save()
-        for link in links:
-            self.update_links(link, area)
+        self.update_links(links, area)
         return area
 
     def to_representation(self, instance):
         data = super(AreaSerializer, self).to_representation(instance)
 
-        links_instance = instance.links.untranslated().all()
+        links_instance = get_children(instance, "links")
         links_serializer = LinkSerializer(instance=links_instance, many=True, language=instance.language_code)
         data["links"] = links_serializer.data
 
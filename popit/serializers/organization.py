@@ -20,6 +20,9 @@ from popit.serializers.flat import PersonFlatSerializer
 from popit.serializers.flat import PostFlatSerializer
 from popit.serializers.flat import OrganizationFlatSerializer
 from popit.serializers.base import BasePopitSerializer
+from popit.serializers.prefetch import PrefetchListSerializer
+from popit.serializers.prefetch import get_children
+from popit.serializers.prefetch import get_related
 import re
 
 
@@ -34,20 +37,20 @@ class ParentOrganizationSerializer(TranslatableModelSerializer):
     def to_representation(self, instance):
         data = super(ParentOrganizationSerializer, self).to_representation(instance)
 
-        other_names = instance.other_names.untranslated().all()
+        other_names = get_children(instance, "other_names")
         other_names_serializer = OtherNameSerializer(other_names, many=True, language=instance.language_code)
         data["other_names"] = other_names_serializer.data
 
-        identifiers = instance.identifiers.untranslated().all()
+        identifiers = get_children(instance, "identifiers")
         identifier_serializer = IdentifierSerializer(identifiers, many=True, language=instance.language_code)
         data["identifiers"] = identifier_serializer.data
 
-        contact_details = instance.contact_details.untranslated().all()
+        contact_details = get_children(instance, "contact_details")
         contact_details_serializer = ContactDetailSerializer(contact_details, many=True, language=instance.language_code)
         data["contact_details"] = contact_details_serializer.data
 
-        if instance.area:
-            area = Area.objects.untranslated().get(id=instance.area_id)
+        if instance.area_id:
+            area = get_related(instance, "area")
             area_serializer = AreaSerializer(area, language=instance.language_code)
             data["area"] = area_serializer.data
 
@@ -68,7 +71,7 @@ class OrganizationMembershipPersonSerializer(TranslatableModelSerializer):
     def to_representation(self, instance):
         data = super(OrganizationMembershipPersonSerializer, self).to_representation(instance)
 
-        contact_details = instance.contact_details.untranslated().all()
+        contact_details = get_children(instance, "contact_details")
         contact_details_serializer = ContactDetailSerializer(contact_details, many=True,
                                                              language=instance.language_code)
         data["contact_details"] = contact_details_serializer.data
@@ -103,30 +106,30 @@ class OrganizationMembershipSerializer(TranslatableModelSerializer):
     def to_representation(self, instance):
         data = super(OrganizationMembershipSerializer, self).to_representation(instance)
 
-        person = Person.objects.untranslated().get(id=instance.person_id)
+        person = get_related(instance, "person")
         person_serializer = PersonFlatSerializer(person, language=instance.language_code)
         data["person"] = person_serializer.data
 
-        if instance.organization:
-            organization = Organization.objects.untranslated().get(id=instance.organization_id)
+        if instance.organization_id:
+            organization = get_related(instance, "organization")
             organization_serializer = OrganizationFlatSerializer(organization, language=instance.language_code)
             data["organization"] = organization_serializer.data
 
-        if instance.on_behalf_of:
-            on_behalf_of = Organization.objects.untranslated().get(id=instance.on_behalf_of_id)
+        if instance.on_behalf_of_id:
+            on_behalf_of = get_related(instance, "on_behalf_of")
             on_behalf_of_serializer = OrganizationFlatSerializer(on_behalf_of, language=instance.language_code)
             data["on_behalf_of"] = on_behalf_of_serializer.data
 
-        if instance.post:
-            post = Post.objects.untranslated().get(id=instance.post_id)
+        if instance.post_id:
+            post = get_related(instance, "post")
             post_serializer = PostFlatSerializer(post, language=instance.language_code)
             data["post"] = post_serializer.data
 
-        contact_details = instance.contact_details.untranslated().all()
+        contact_details = get_children(instance, "contact_details")
         contact_details_serializer = ContactDetailSerializer(contact_details, many=True, language=instance.language_code)
         data["contact_details"] = contact_details_serializer.data
 
-        links = instance.links.untranslated().all()
+        links = get_children(instance, "links")
         links_serializer = LinkSerializer(links, many=True, language=instance.language_code)
         data["links"] = links_serializer.data
 
@@ -154,19 +157,19 @@ class OrganizationPostSerializer(TranslatableModelSerializer):
     def to_representation(self, instance):
         data = super(OrganizationPostSerializer, self).to_representation(instance)
 
-        other_labels = instance.other_labels.untranslated().all()
+        other_labels = get_children(instance, "other_labels")
         other_label_serializer = OtherNameSerializer(other_labels, many=True, language=instance.language_code)
         data["other_labels"] = other_label_serializer.data
 
-        organization = Organization.objects.untranslated().get(id=instance.organization_id)
+        organization = get_related(instance, "organization")
         organization_serializer = OrganizationFlatSerializer(organization, language=instance.language_code)
         data["organization"] = organization_serializer.data
 
-        contact_details = instance.contact_details.untranslated().all()
+        contact_details = get_children(instance, "contact_details")
         contact_details_serializer = ContactDetailSerializer(contact_details, many=True, language=instance.language_code)
         data["contact_details"] = contact_details_serializer.data
 
-        links = instance.links.untranslated().all()
+        links = get_children(instance, "links")
         links_serializer = LinkSerializer(links, many=True, language=instance.language_code)
         data["links"] = links_serializer.data
 
@@ -199,7 +202,6 @@ class OrganizationSerializer(BasePopitSerializer):
         links = validated_data.pop('links', [])
         identifiers = validated_data.pop('identifiers', [])
         contact_details = validated_data.pop('contact_details', [])
-        language = self.language
         validated_data.pop("language_code", None)
 
         validated_data.pop("parent", None)
@@ -214,7 +216,7 @@ class OrganizationSerializer(BasePopitSerializer):
         area = None
         if area_id:
             try:
-                area = Area.objects.untranslated().get(id=area_id)
+                area = self.get_reference(Area, area_id)
                 validated_data["area"] = area
             except Area.DoesNotExist:
                 area = None
@@ -228,7 +230,7 @@ class OrganizationSerializer(BasePopitSerializer):
         parent_id = validated_data.pop("parent_id", None)
 
         if parent_id:
-            parent_org = Organization.objects.untranslated().get(id=parent_id)
+            parent_org = self.get_reference(Organization, parent_id)
             validated_data["parent"] = parent_org
 
         # Keep elasticsearch dane as it tend to return empty string to date
@@ -239,7 +241,7 @@ class OrganizationSerializer(BasePopitSerializer):
             validated_data["dissolution_date"] = None
 
 
-        organization = Organization.objects.language(language).create(**validated_data)
+        organization = self.create_instance(Organization, validated_data)
         for other_name in other_names:
             self.create_child(other_name, OtherName, organization)
 
@@ -297,17 +299,13 @@ class OrganizationSerializer(BasePopitSerializer):
 
         instance.save()
 
-        for other_name in other_names:
-            self.update_childs(other_name, OtherName, instance)
+        self.update_childs(other_names, OtherName, instance)
 
-        for identifier in identifiers:
-            self.update_childs(identifier, Identifier, instance)
+        self.update_childs(identifiers, Identifier, instance)
 
-        for contact in contact_details:
-            self.update_childs(contact, ContactDetail, instance)
+        self.update_childs(contact_details, ContactDetail, instance)
 
-        for link in links:
-            self.update_links(link, instance)
+        self.update_links(links, instance)
 
         return instance
 
@@ -315,36 +313,36 @@ class OrganizationSerializer(BasePopitSerializer):
         data = super(OrganizationSerializer, self).to_representation(instance)
         # Now we do all the overriding
         if instance.parent_id:
-            parent_instance = instance.parent.__class__.objects.untranslated().get(id=instance.parent_id)
+            parent_instance = get_related(instance, "parent")
             parent_serializer = ParentOrganizationSerializer(parent_instance, language=instance.language_code)
             data["parent"] = parent_serializer.data
-        other_name_instance = instance.other_names.untranslated().all()
+        other_name_instance = get_children(instance, "other_names")
         other_name_serializer = OtherNameSerializer(instance=other_name_instance, many=True, language=instance.language_code)
         data["other_names"] = other_name_serializer.data
 
-        identifier_instance = instance.identifiers.untranslated().all()
+        identifier_instance = get_children(instance, "identifiers")
         identifier_serializer = IdentifierSerializer(instance=identifier_instance, many=True, language=instance.language_code)
         data["identifiers"] = identifier_serializer.data
 
-        links_instance = instance.links.untranslated().all()
+        links_instance = get_children(instance, "links")
         links_serializer = LinkSerializer(instance=links_instance, many=True, language=instance.language_code)
         data["links"] = links_serializer.data
 
-        contact_details_instance = instance.contact_details.untranslated().all()
+        contact_details_instance = get_children(instance, "contact_details")
         contact_details_serializer = ContactDetailSerializer(instance=contact_details_instance, many=True,
                                                              language=instance.language_code)
         data["contact_details"] = contact_details_serializer.data
 
         if instance.area_id:
-            area_instance = instance.area.__class__.objects.untranslated().get(id=instance.area_id)
+            area_instance = get_related(instance, "area")
             area_serializer = AreaSerializer(area_instance, language=instance.language_code)
             data["area"] = area_serializer.data
 
-        memberships = instance.memberships.untranslated().all()
+        memberships = get_children(instance, "memberships")
         memberships_serializer = OrganizationMembershipSerializer(memberships, many=True, language=instance.language_code)
         data["memberships"] = memberships_serializer.data
 
-        posts = instance.posts.untranslated().all()
+        posts = get_children(instance, "posts")
         posts_serializer = OrganizationPostSerializer(posts, many=True, language=instance.language_code)
         data["posts"] = posts_serializer.data
         return data
@@ -369,7 +367,7 @@ class OrganizationSerializer(BasePopitSerializer):
         if not value:
             return value
         try:
-            org = Organization.objects.untranslated().get(id=value)
+            org = self.get_reference(Organization, value)
         except Organization.DoesNotExist:
             raise ValidationError("Organization id %s, does not exist" % value)
         return value
@@ -378,11 +376,12 @@ class OrganizationSerializer(BasePopitSerializer):
         if not value:
             return value
         try:
-            Area.objects.untranslated().get(id=value)
+            self.get_reference(Area, value)
         except Area.DoesNotExist:
             raise ValidationError("Area id %s Does not exist" % value)
         return value
 
     class Meta:
         model = Organization
-        extra_kwargs = {'id': {'read_only': False, 'required': False}}
\ No newline at end of file
+        extra_kwargs = {'id': {'read_only': False, 'required': False}}
+        list_serializer_class = PrefetchListSerializer
@@ -19,6 +19,9 @@ from popit.serializers.misc import AreaSerializer
 from popit.serializers.flat import PersonFlatSerializer
 from popit.serializers.flat import OrganizationFlatSerializer
 from popit.serializers.flat import PostFlatSerializer
+from popit.serializers.prefetch import PrefetchListSerializer
+from popit.serializers.prefetch import get_children
+from popit.serializers.prefetch import get_related
 from rest_framework.serializers import ValidationError
 import re
 
@@ -45,30 +48,30 @@ class PersonMembershipSerializer(TranslatableModelSerializer):
     # We override the to_representation because the nested dictionary is not translated
     def to_representation(self, instance):
         data = super(PersonMembershipSerializer, self).to_representation(instance)
-        if instance.organization:
-            organization = Organization.objects.untranslated().get(id=instance.organization_id)
+        if instance.organization_id:
+            organization = get_related(instance, "organization")
             organization_serializer = OrganizationFlatSerializer(organization, language=instance.language_code)
             data["organization"] = organization_serializer.data
 
-        if instance.on_behalf_of:
-            on_behalf_of = Organization.objects.untranslated().get(id=instance.on_behalf_of_id)
+        if instance.on_behalf_of_id:
+            on_behalf_of = get_related(instance, "on_behalf_of")
             on_behalf_of_serializer = OrganizationFlatSerializer(on_behalf_of, language=instance.language_code)
             data["on_behalf_of"] = on_behalf_of_serializer.data
 
-        person = Person.objects.untranslated().get(id=instance.person_id)
+        person = get_related(instance, "person")
         person_serializer = PersonFlatSerializer(person, language=instance.language_code)
         data["person"] = person_serializer.data
 
-        if instance.post:
-            post = Post.objects.untranslated().get(id=instance.post_id)
+        if instance.post_id:
+            post = get_related(instance, "post")
             post_serializer = PostFlatSerializer(post, language=instance.language_code)
             data["post"] = post_serializer.data
 
-        contact_details = instance.contact_details.untranslated().all()
+        contact_details = get_children(instance, "contact_details")
         contact_details_serializer = ContactDetailSerializer(contact_details, many=True, language=instance.language_code)
         data["contact_details"] = contact_details_serializer.data
 
-        links = instance.links.untranslated().all()
+        links = get_children(instance, "links")
         links_serializer = LinkSerializer(links, many=True, language=instance.language_code)
         data["links"] = links_serializer.data
         return data
@@ -91,7 +94,6 @@ class PersonSerializer(BasePopitSerializer):
     death_date = CharField(allow_null=True, default=None, allow_blank=True)
 
     def create(self, validated_data):
-        language_code=self.language
         links = validated_data.pop("links", [])
         other_names = validated_data.pop("other_names", [])
         contact_details = validated_data.pop('contact_details', [])
@@ -105,7 +107,7 @@ class PersonSerializer(BasePopitSerializer):
         if not validated_data["death_date"]:
             validated_data["death_date"] = None
 
-        person = Person.objects.language(language_code).create(**validated_data)
+        person = self.create_instance(Person, validated_data)
 
         for other_name in other_names:
             self.create_child(other_name, OtherName, person)
@@ -156,45 +158,41 @@ class PersonSerializer(BasePopitSerializer):
         instance.save()
 
         links = validated_data.pop("links", [])
-        for link in links:
-            self.update_links(link, instance)
+        self.update_links(links, instance)
 
         identifiers = validated_data.pop("identifiers", [])
 
-        for identifier in identifiers:
-            self.update_childs(identifier, Identifier, instance)
+        self.update_childs(identifiers, Identifier, instance)
 
         contact_details = validated_data.pop("contact_details", [])
-        for contact in contact_details:
-            self.update_childs(contact, ContactDetail, instance)
+        self.update_childs(contact_details, ContactDetail, instance)
 
         other_names = validated_data.pop("other_names", [])
-        for other_name in other_names:
-            self.update_childs(other_name, OtherName, instance)
+        self.update_childs(other_names, OtherName, instance)
         return instance
 
     def to_representation(self, instance):
         data = super(PersonSerializer, self).to_representation(instance)
         # Now we do all the overriding
 
-        other_name_instance = instance.other_names.untranslated().all()
+        other_name_instance = get_children(instance, "other_names")
         other_name_serializer = OtherNameSerializer(instance=other_name_instance, many=True, language=instance.language_code)
         data["other_names"] = other_name_serializer.data
 
-        identifier_instance = instance.identifiers.untranslated().all()
+        identifier_instance = get_children(instance, "identifiers")
         identifier_serializer = IdentifierSerializer(instance=identifier_instance, many=True, language=instance.language_code)
         data["identifiers"] = identifier_serializer.data
 
-        links_instance = instance.links.untranslated().all()
+        links_instance = get_children(instance, "links")
         links_serializer = LinkSerializer(instance=links_instance, many=True, language=instance.language_code)
         data["links"] = links_serializer.data
 
-        contact_details_instance = instance.contact_details.untranslated().all()
+        contact_details_instance = get_children(instance, "contact_details")
         contact_details_serializer = ContactDetailSerializer(instance=contact_details_instance, many=True,
                                                              language=instance.language_code)
         data["contact_details"] = contact_details_serializer.data
 
-        memberships = instance.memberships.untranslated().all()
+        memberships = get_children(instance, "memberships")
         membership_serializers = PersonMembershipSerializer(memberships, many=True, language=instance.language_code)
         data["memberships"] = membership_serializers.data
 
@@ -217,6 +215,7 @@ class PersonSerializer(BasePopitSerializer):
     class Meta:
         model = Person
         extra_kwargs = {'id': {'read_only': False, 'required': False}}
+        list_serializer_class = PrefetchListSerializer
 
 
 
@@ -21,6 +21,9 @@ import re
 from rest_framework.serializers import ValidationError
 from popit.serializers.misc import IdentifierSerializer
 from popit.serializers.base import BasePopitSerializer
+from popit.serializers.prefetch import PrefetchListSerializer
+from popit.serializers.prefetch import get_children
+from popit.serializers.prefetch import get_related
 
 
 class PostMembershipSerializer(TranslatableModelSerializer):
@@ -45,28 +48,33 @@ class PostMembershipSerializer(TranslatableModelSerializer):
     def to_representation(self, instance):
         data = super(PostMembershipSerializer, self).to_representation(instance)
 
-        person = Person.objects.untranslated().get(id=instance.person_id)
+        person = get_related(instance, "person")
         person_serializer = PersonFlatSerializer(person, language=instance.language_code)
 
         data["person"] = person_serializer.data
 
         # Now all organization saved should have organization, either derived from post, or assigned directly
-        if instance.organization:
-            organization = Organization.objects.untranslated().get(id=instance.organization_id)
+        if instance.organization_id:
+            organization = get_related(instance, "organization")
             organization_serializer = OrganizationFlatSerializer(organization, language=instance.language_code)
             data["organization"] = organization_serializer.data
 
-        if instance.on_behalf_of:
-            on_behalf_of = Organization.objects.untranslated().get(id=instance.on_behalf_of_id)
+        if instance.on_behalf_of_id:
+            on_behalf_of = get_related(instance, "on_behalf_of")
             on_behalf_of_serializer = OrganizationFlatSerializer(on_behalf_of, language=instance.language_code)
             data["on_behalf_of"] = on_behalf_of_serializer.data
 
-        contact_details = instance.contact_details.untranslated().all()
+        if instance.post_id:
+            post = get_related(instance, "post")
+            post_serializer = PostFlatSerializer(post, language=instance.language_code)
+            data["post"] = post_serializer.data
+
+        contact_details = get_children(instance, "contact_details")
         contact_details_serializer = ContactDetailSerializer(contact_details, many=True, language=instance.language_code)
 
         data["contact_details"] = contact_details_serializer.data
 
-        links = instance.links.untranslated().all()
+        links = get_children(instance, "links")
         links_serializer = LinkSerializer(links, many=True, language=instance.language_code)
         data["links"] = links_serializer.data
         return data
@@ -88,24 +96,24 @@ class PostParentOrganizationSerializer(TranslatableModelSerializer):
     def to_representation(self, instance):
         data = super(PostParentOrganizationSerializer, self).to_representation(instance)
 
-        other_names = instance.other_names.untranslated().all()
+        other_names = get_children(instance, "other_names")
         other_names_serializer = OtherNameSerializer(other_names, many=True, language=instance.language_code)
         data["other_names"] = other_names_serializer.data
 
-        identifiers = instance.identifiers.untranslated().all()
+        identifiers = get_children(instance, "identifiers")
         identifiers_serializer = IdentifierSerializer(identifiers, many=True, language=instance.language_code)
         data["identifiers"] = identifiers_serializer.data
 
-        contact_details = instance.contact_details.untranslated().all()
+        contact_details = get_children(instance, "contact_details")
         contact_details_serializer = ContactDetailSerializer(contact_details, many=True, language=instance.language_code)
         data["contact_details"] = contact_details_serializer.data
 
-        links = instance.links.untranslated().all()
+        links = get_children(instance, "links")
         links_serializer = LinkSerializer(links, many=True, language=instance.language_code)
         data["links"] = links_serializer.data
 
-        if instance.area:
-            area = Area.objects.untranslated().get(id=instance.area_id)
+        if instance.area_id:
+            area = get_related(instance, "area")
             area_serializer = AreaSerializer(area, language=instance.language_code)
             data["area"] = area_serializer.data
 
@@ -131,26 +139,26 @@ class PostOrganizationSerializer(TranslatableModelSerializer):
 
     def to_representation(self, instance):
         data = super(PostOrganizationSerializer, self).to_representation(instance)
-        if instance.parent:
-            parent = Organization.objects.untranslated().get(id=instance.parent_id)
+        if instance.parent_id:
+            parent = get_related(instance, "parent")
             parent_serializer = PostParentOrganizationSerializer(parent, language=instance.language_code)
             data["parent"] = parent_serializer.data
 
-        other_names = instance.other_names.untranslated().all()
+        other_names = get_children(instance, "other_names")
         other_names_serializer = OtherNameSerializer(other_names, many=True, language=instance.language_code)
         data["other_names"] = other_names_serializer.data
 
-        identifiers = instance.identifiers.untranslated().all()
+        identifiers = get_children(instance, "identifiers")
         identifiers_serializer = IdentifierSerializer(identifiers, many=True, language=instance.language_code)
         data["identifiers"] = identifiers_serializer.data
 
-        contact_details = instance.contact_details.untranslated().all()
+        contact_details = get_children(instance, "contact_details")
         contact_details_serializer = ContactDetailSerializer(contact_details, many=True, language=instance.language_code)
         data["contact_details"] = contact_details_serializer.data
 
-        if instance.area:
+        if instance.area_id:
 
-            area = Area.objects.untranslated().get(id=instance.area_id)
+            area = get_related(instance, "area")
             area_serializer = AreaSerializer(area, language=instance.language_code)
             data["area"] = area_serializer.data
 
@@ -192,12 +200,12 @@ class PostSerializer(BasePopitSerializer):
 
         # Organization is read and assign only, no create or update
         if organization_id:
-            organization = Organization.objects.untranslated().get(id=organization_id)
+            organization = self.get_reference(Organization, organization_id)
             validated_data["organization"] = organization
 
         # Area in this object is link or read only, not create or update
         if area_id:
-            area = Area.objects.untranslated().get(id=area_id)
+            area = self.get_reference(Area, area_id)
             validated_data["area"] = area
 
         if not validated_data.get("start_date"):
@@ -206,7 +214,7 @@ class PostSerializer(BasePopitSerializer):
         if not validated_data.get("end_date"):
             validated_data["end_date"] = None
 
-        post = Post.objects.language(self.language).create(**validated_data)
+        post = self.create_instance(Post, validated_data)
 
         for other_label in other_labels:
             self.create_child(other_label, OtherName, post)
@@ -236,62 +244,59 @@ class PostSerializer(BasePopitSerializer):
             instance.end_date = None
 
         if data.get("area_id"):
-            area = Area.objects.untranslated().get(id=data.get("area_id"))
+            area = self.get_reference(Area, data.get("area_id"))
             instance.area = area
 
         if data.get("organization_id"):
-            organization = Organization.objects.untranslated().get(id=data.get("area_id"))
+            organization = self.get_reference(Organization, data.get("area_id"))
             instance.organization = organization
 
         instance.save()
 
         other_labels = data.get("other_labels", [])
 
-        for other_label in other_labels:
-            self.update_childs(other_label, OtherName, instance)
+        self.update_childs(other_labels, OtherName, instance)
 
         contacts_details = data.get("contact_details", [])
 
-        for contact_detail in contacts_details:
-            self.update_childs(contact_detail, ContactDetail, instance)
+        self.update_childs(contacts_details, ContactDetail, instance)
 
         links = data.get("links", [])
 
-        for link in links:
-            self.update_links(link, instance)
+        self.update_links(links, instance)
 
         return instance
 
     def to_representation(self, instance):
         data = super(PostSerializer, self).to_representation(instance)
         # Now we do all the overriding
-        other_labels = instance.other_labels.untranslated().all()
+        other_labels = get_children(instance, "other_labels")
         if other_labels:
             other_labels_serializer = OtherNameSerializer(instance=other_labels, language=instance.language_code, many=True)
             data["other_labels"] = other_labels_serializer.data
         else:
             data["other_labels"] = []
 
-        if instance.organization:
-            organization_instance = Organization.objects.untranslated().get(id=instance.organization_id)
+        if instance.organization_id:
+            organization_instance = get_related(instance, "organization")
             organization_serializer = PostOrganizationSerializer(instance=organization_instance, language=instance.language_code)
             data["organization"] = organization_serializer.data
 
-        links_instance = instance.links.untranslated().all()
+        links_instance = get_children(instance, "links")
         links_serializer = LinkSerializer(instance=links_instance, many=True, language=instance.language_code)
         data["links"] = links_serializer.data
 
-        contact_details_instance = instance.contact_details.untranslated().all()
+        contact_details_instance = get_children(instance, "contact_details")
         contact_details_serializer = ContactDetailSerializer(instance=contact_details_instance, many=True,
                                                              language=instance.language_code)
         data["contact_details"] = contact_details_serializer.data
 
         if instance.area_id:
-            area_instance = instance.area.__class__.objects.untranslated().get(id=instance.area_id)
+            area_instance = get_related(instance, "area")
             area_serializer = AreaSerializer(area_instance, language=instance.language_code)
             data["area"] = area_serializer.data
 
-        memberships = instance.memberships.untranslated().all()
+        memberships = get_children(instance, "memberships")
         memberships_serializer = PostMembershipSerializer(memberships, many=True, language=instance.language_code)
         data["memberships"] = memberships_serializer.data
         return data
@@ -314,7 +319,7 @@ class PostSerializer(BasePopitSerializer):
         if not value:
             return value
         try:
-            Area.objects.untranslated().get(id=value)
+            self.get_reference(Area, value)
         except Area.DoesNotExist:
             raise ValidationError("Area id %s does not exist" % value)
         return value
@@ -324,7 +329,7 @@ class PostSerializer(BasePopitSerializer):
             return value
 
         try:
-            Organization.objects.untranslated().get(id=value)
+            self.get_reference(Organization, value)
         except Organization.DoesNotExist:
             raise ValidationError("Organization id %s Does not exist" % value)
         return value
@@ -332,5 +337,6 @@ class PostSerializer(BasePopitSerializer):
     class Meta:
         model = Post
         extra_kwargs = {'id': {'read_only': False, 'required': False}}
+        list_serializer_class = PrefetchListSerializer
 
 
@@ -0,0 +1,224 @@
+import copy
+from django.db import models
+from django.db.models import Prefetch
+from django.db.models.query import prefetch_related_objects
+from django.utils.translation import get_language
+from rest_framework.serializers import ListSerializer
+from popit.models import Person
+from popit.models import Organization
+from popit.models import Post
+from popit.models import Membership
+from popit.models import Area
+from popit import profiling
+
+
+# Serializing an entity used to cost a query for every translation, child and related row it embeds. Instead we load
+# everything for a whole page of entities in one query per relation, using django prefetch machinery, and the
+# serializers read from the prefetch cache. hvad get_translation already knows how to use prefetched translations.
+def prefixed(prefix, lookups):
+    return tuple("%s__%s" % (prefix, lookup) for lookup in lookups)
+
+
+LINKS_PREFETCH = (
+    "links__translation",
+)
+
+CONTACT_DETAILS_PREFETCH = (
+    "contact_details__translation",
+    "contact_details__links__translation",
+)
+
+OTHER_NAMES_PREFETCH = (
+    "other_names__translations",
+    "other_names__links__translation",
+)
+
+IDENTIFIERS_PREFETCH = (
+    "identifiers__translations",
+    "identifiers__links__translation",
+)
+
+AREA_PREFETCH = (
+    "translations",
+    "links__translation",
+    "parent__translations",
+    "parent__links__translation",
+    "children__translations",
+    "children__links__translation",
+)
+
+# Flat person, organization and post only need their translation
+FLAT_MEMBERSHIP_PREFETCH = (
+    ("translated",
+     "person__translations",
+     "organization__translated",
+     "on_behalf_of__translated",
+     "post__translations") +
+    CONTACT_DETAILS_PREFETCH +
+    LINKS_PREFETCH
+)
+
+PARENT_ORGANIZATION_PREFETCH = (
+    ("translated",) +
+    OTHER_NAMES_PREFETCH +
+    IDENTIFIERS_PREFETCH +
+    CONTACT_DETAILS_PREFETCH +
+    LINKS_PREFETCH +
+    prefixed("area", AREA_PREFETCH)
+)
+
+PERSON_PREFETCH = (
+    ("translations",) +
+    OTHER_NAMES_PREFETCH +
+    IDENTIFIERS_PREFETCH +
+    LINKS_PREFETCH +
+    CONTACT_DETAILS_PREFETCH +
+    prefixed("memberships", FLAT_MEMBERSHIP_PREFETCH)
+)
+
+ORGANIZATION_PREFETCH = (
+    PARENT_ORGANIZATION_PREFETCH +
+    prefixed("parent", PARENT_ORGANIZATION_PREFETCH) +
+    prefixed("memberships", FLAT_MEMBERSHIP_PREFETCH) +
+    ("posts__translations",
+     "posts__other_labels__translations",
+     "posts__other_labels__links__translation") +
+    prefixed("posts", CONTACT_DETAILS_PREFETCH) +
+    prefixed("posts", LINKS_PREFETCH)
+)
+
+POST_PREFETCH = (
+    ("translations",
+     "other_labels__translations",
+     "other_labels__links__translation") +
+    LINKS_PREFETCH +
+    CONTACT_DETAILS_PREFETCH +
+    prefixed("area", AREA_PREFETCH) +
+    prefixed("organization", PARENT_ORGANIZATION_PREFETCH) +
+    prefixed("organization__parent", PARENT_ORGANIZATION_PREFETCH) +
+    prefixed("memberships", FLAT_MEMBERSHIP_PREFETCH)
+)
+
+MEMBERSHIP_ORGANIZATION_PREFETCH = (
+    ("translated",) +
+    LINKS_PREFETCH +
+    CONTACT_DETAILS_PREFETCH +
+    prefixed("area", AREA_PREFETCH)
+)
+
+MEMBERSHIP_PREFETCH = (
+    ("translated",) +
+    LINKS_PREFETCH +
+    CONTACT_DETAILS_PREFETCH +
+    prefixed("area", AREA_PREFETCH) +
+    prefixed("organization", MEMBERSHIP_ORGANIZATION_PREFETCH) +
+    prefixed("on_behalf_of", MEMBERSHIP_ORGANIZATION_PREFETCH) +
+    prefixed("member", MEMBERSHIP_ORGANIZATION_PREFETCH) +
+    ("person__translations",) +
+    prefixed("person", OTHER_NAMES_PREFETCH) +
+    prefixed("person", IDENTIFIERS_PREFETCH) +
+    prefixed("person", LINKS_PREFETCH) +
+    prefixed("person", CONTACT_DETAILS_PREFETCH) +
+    ("post__translations",) +
+    prefixed("post", LINKS_PREFETCH) +
+    prefixed("post", CONTACT_DETAILS_PREFETCH)
+)
+
+PREFETCH_MAP = {
+    Person: PERSON_PREFETCH,
+    Organization: ORGANIZATION_PREFETCH,
+    Post: POST_PREFETCH,
+    Membership: MEMBERSHIP_PREFETCH,
+    Area: AREA_PREFETCH,
+}
+
+
+def build_prefetch(entity, lookups, language):
+    """
+    Turn the lookups of an entity into prefetch for django. Translations are limited to language, and the active
+    language, which is what nested serializer without a language fall back to.
+    """
+    languages = set([language, get_language()])
+    output = []
+    for lookup in lookups:
+        model = entity
+        parent = None
+        for field_name in lookup.split("__"):
+            parent = model
+            model = model._meta.get_field(field_name).related_model
+
+        if field_name == getattr(parent._meta, "translations_accessor", None):
+            queryset = model.objects.filter(language_code__in=languages)
+            output.append(Prefetch(lookup, queryset=queryset))
+        else:
+            output.append(lookup)
+    return output
+
+
+def prefetch_entities(instances, language=None):
+    """
+    Load all the related rows needed to serialize instances, with a fixed number of queries no matter how many
+    instances or children there are. instances is a list of popit entity, entity without a plan is left alone.
+    If language is not set all translations is loaded.
+    """
+    grouped = {}
+    for instance in instances:
+        grouped.setdefault(instance.__class__, []).append(instance)
+
+    for entity, entity_instances in grouped.items():
+        lookups = PREFETCH_MAP.get(entity)
+        if not lookups:
+            continue
+        if language:
+            lookups = build_prefetch(entity, lookups, language)
+        prefetch_related_objects(entity_instances, lookups)
+    return instances
+
+
+def iter_chunks(queryset, chunk_size):
+    """
+    Yield the entities of queryset as lists of chunk_size, with keyset pagination on id so that every chunk cost the
+    same no matter how deep we are, and only a chunk is in memory at a time.
+    """
+    last_id = None
+    queryset = queryset.order_by("id")
+    while True:
+        chunk = queryset
+        if last_id is not None:
+            chunk = chunk.filter(id__gt=last_id)
+        instances = list(chunk[:chunk_size])
+        if not instances:
+            return
+        yield instances
+        last_id = instances[-1].id
+
+
+def get_children(instance, name):
+    # related manager all() return the prefetched result if there is one
+    manager = getattr(instance, name)
+    if name in getattr(instance, "_prefetched_objects_cache", {}):
+        return manager.all()
+    return manager.untranslated().all()
+
+
+def get_related(instance, name):
+    field = instance._meta.get_field(name)
+    if hasattr(instance, field.get_cache_name()):
+        # Cached object is shared, e.g membership.person is the person we are serializing. Copy it so that loading
+        # another translation on it does not change the language of the others.
+        return copy.copy(getattr(instance, name))
+    return field.related_model.objects.untranslated().get(id=getattr(instance, field.attname))
+
+
+class PrefetchListSerializer(ListSerializer):
+    # Serialize a page of entity with the prefetched data
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        language = getattr(self.child, "language", None)
+        instances = prefetch_entities(list(iterable), language)
+        return [self.child.to_representation(item) for item in instances]
+
+    @property
+    def data(self):
+        with profiling.measure("serialization"):
+            return super(PrefetchListSerializer, self).data
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+
+# Sent once for a parent after its children are updated in place, instead of post_save for each child. Same
+# arguments as post_save, so the post_save handlers can be connected to it.
+children_changed = Signal(providing_args=["instance", "created", "raw", "using", "update_fields"])
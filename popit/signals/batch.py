@@ -0,0 +1,29 @@
+import threading
+
+
+# Entity touched while a batch is active, i.e during an API write, are reindexed together in one job instead of one
+# job per save. Batch is per thread, so each request have its own.
+_local = threading.local()
+
+
+def start():
+    # delete_graph is the nodes that depended on deleted entities, built before they were deleted
+    _local.batch = {"update": set(), "delete": set(), "delete_graph": set(), "invalidate": set(), "citations": set()}
+
+
+def active():
+    return getattr(_local, "batch", None) is not None
+
+
+def add(action, entity, entity_id):
+    _local.batch[action].add((entity, entity_id))
+
+
+def extend(action, items):
+    _local.batch[action].update(items)
+
+
+def finish():
+    batch = getattr(_local, "batch", None)
+    _local.batch = None
+    return batch
@@ -1,10 +1,20 @@
 from django.db.models.signals import pre_delete
+from django.db.models.signals import pre_save
 from django.db.models.signals import post_save
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
 from rest_framework.authtoken.models import Token
 from popit.tasks import *
 from popit.models import *
+from popit_search.utils import dependency
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from popit.signals import batch
+from popit.signals import children_changed
+from popit import cache
+from popit import coverage
+from popit import dates
 
 
 def entity_save_handler(sender, instance, created, raw, using, update_fields, **kwargs):
@@ -13,19 +23,84 @@ def entity_save_handler(sender, instance, created, raw, using, update_fields, **
         return
     entity = instance._meta.model_name + "s"
     entity_id = instance.id
-    perform_update.apply_async((entity, entity_id))
+    if batch.active():
+        batch.add("update", entity, entity_id)
+        return
+    # Worker should not read the database before the change is there
+    transaction.on_commit(lambda: queue_update(entity, entity_id))
+
+
+def queue_update(entity, entity_id):
+    queue = dependency.ReindexQueue()
+    if queue.mark(entity, entity_id):
+        flush_reindex_queue.apply_async(countdown=settings.REINDEX_DEBOUNCE_TIME)
 
 
 def entity_prepare_delete_handler(sender, instance, using, **kwargs):
+    # Graph have to be built while the entity is still in the database, it is indexed once the delete is committed
+    instance._delete_graph = dependency.build_graph(instance, "delete")
+
+
+def entity_perform_delete_handler(sender, instance, using, **kwargs):
     entity = instance._meta.model_name + "s"
     entity_id = instance.id
-    prepare_delete.apply_async((entity, entity_id))
+    graph = getattr(instance, "_delete_graph", [])
+    if batch.active():
+        batch.add("delete", entity, entity_id)
+        batch.extend("delete_graph", graph)
+        return
+    transaction.on_commit(lambda: reindex_entities.apply_async(([], [(entity, entity_id)], graph)))
 
 
-def entity_perform_delete_handler(sender, instance, using, **kwargs):
+def render_cache_save_handler(sender, instance, created, raw, using, update_fields, **kwargs):
+    # Separate from the index handlers, cached document have to go even when indexing is switched off
+    if raw or not cache.enabled():
+        return
     entity = instance._meta.model_name + "s"
     entity_id = instance.id
-    perform_delete.apply_async((entity, entity_id))
+    if batch.active():
+        batch.add("invalidate", entity, entity_id)
+        return
+    cache.invalidate([(entity, entity_id)])
+    transaction.on_commit(lambda: cache.invalidate([(entity, entity_id)]))
+
+
+def render_cache_delete_handler(sender, instance, using, **kwargs):
+    if not cache.enabled():
+        return
+    # Graph have to be built while the entity is still in the database
+    nodes = cache.dependent_nodes([instance])
+    cache.invalidate_nodes(nodes)
+    transaction.on_commit(lambda: cache.invalidate_nodes(nodes))
+
+
+def tombstone_handler(sender, instance, using, **kwargs):
+    # So that sync client know to drop it
+    Tombstone.objects.create(entity=instance._meta.model_name + "s", entity_id=instance.id)
+
+
+def touch_owner_handler(sender, instance, using, **kwargs):
+    # An embedded row that is gone leave no updated_at behind, the document it was in is changed instead
+    now = timezone.now()
+    if isinstance(instance, Membership):
+        owners = [(Person, instance.person_id), (Organization, instance.organization_id), (Post, instance.post_id)]
+    else:
+        owners = [(instance.content_type.model_class(), instance.object_id)]
+    for model, owner_id in owners:
+        if model and owner_id:
+            model.objects.untranslated().filter(id=owner_id).update(updated_at=now)
+
+
+def citation_coverage_handler(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    coverage.touch([coverage.owner_of(instance)])
+
+
+def date_bounds_handler(sender, instance, **kwargs):
+    # Raw save too, fixtures do not have the bounds
+    dates.set_bounds(instance)
+
 
 @receiver(post_save, sender=User)
 def create_auth_token(sender, instance=None, created=False, raw=False, **kwargs):
@@ -64,9 +139,48 @@ post_delete.connect(entity_perform_delete_handler, sender=OtherName)
 post_delete.connect(entity_perform_delete_handler, sender=Link)
 post_delete.connect(entity_perform_delete_handler, sender=Area)
 
-
-
-
-
-
-
+post_save.connect(render_cache_save_handler, sender=Person)
+post_save.connect(render_cache_save_handler, sender=Organization)
+post_save.connect(render_cache_save_handler, sender=Membership)
+post_save.connect(render_cache_save_handler, sender=Post)
+post_save.connect(render_cache_save_handler, sender=ContactDetail)
+post_save.connect(render_cache_save_handler, sender=Identifier)
+post_save.connect(render_cache_save_handler, sender=OtherName)
+post_save.connect(render_cache_save_handler, sender=Link)
+post_save.connect(render_cache_save_handler, sender=Area)
+
+pre_delete.connect(render_cache_delete_handler, sender=Person)
+pre_delete.connect(render_cache_delete_handler, sender=Organization)
+pre_delete.connect(render_cache_delete_handler, sender=Membership)
+pre_delete.connect(render_cache_delete_handler, sender=Post)
+pre_delete.connect(render_cache_delete_handler, sender=ContactDetail)
+pre_delete.connect(render_cache_delete_handler, sender=Identifier)
+pre_delete.connect(render_cache_delete_handler, sender=OtherName)
+pre_delete.connect(render_cache_delete_handler, sender=Link)
+pre_delete.connect(render_cache_delete_handler, sender=Area)
+
+post_delete.connect(tombstone_handler, sender=Person)
+post_delete.connect(tombstone_handler, sender=Organization)
+post_delete.connect(tombstone_handler, sender=Membership)
+post_delete.connect(tombstone_handler, sender=Post)
+post_delete.connect(tombstone_handler, sender=Area)
+
+post_delete.connect(touch_owner_handler, sender=Membership)
+post_delete.connect(touch_owner_handler, sender=ContactDetail)
+post_delete.connect(touch_owner_handler, sender=Identifier)
+post_delete.connect(touch_owner_handler, sender=OtherName)
+post_delete.connect(touch_owner_handler, sender=Link)
+
+post_save.connect(citation_coverage_handler, sender=Link)
+post_delete.connect(citation_coverage_handler, sender=Link)
+
+pre_save.connect(date_bounds_handler, sender=Person)
+pre_save.connect(date_bounds_handler, sender=Organization)
+pre_save.connect(date_bounds_handler, sender=Membership)
+pre_save.connect(date_bounds_handler, sender=Post)
+pre_save.connect(date_bounds_handler, sender=ContactDetail)
+pre_save.connect(date_bounds_handler, sender=OtherName)
+
+# Children updated in place by the serializers only tell their parent
+children_changed.connect(entity_save_handler)
+children_changed.connect(render_cache_save_handler)
@@ -18,232 +18,60 @@ from popit_search.consts import ES_SERIALIZER_MAP
 from popit_search.utils import dependency
 
 
-# Assume that the entity have enough information in es. if not it is a bug
-# Sidestep all the delete handler, make frontend to filter deleted result
-# Cron cleanup of staled data
-@shared_task()
-def index_person(instance_id):
-    instances = Person.objects.language("all").filter(id=instance_id)
-    for instance in instances:
-        update_entity_index("persons", instance, PersonSerializer)
-        for membership in instance.memberships.all():
-            update_entity_index("memberships", membership, MembershipSerializer)
-            if membership.organization:
-                update_entity_index("organizations", membership.organization, OrganizationSerializer)
-            if membership.post:
-                update_entity_index("post", membership.post, PostSerializer)
-
-
-@shared_task
-def index_organization(instance_id):
-    instances = Organization.objects.language("all").filter(id=instance_id)
-    for instance in instances:
-        update_entity_index("organizations", instance, OrganizationSerializer)
-
-        for post in instance.posts.all():
-            update_entity_index("posts", post, PostSerializer)
-        for membership in instance.memberships.all():
-            update_entity_index("memberships", membership, MembershipSerializer)
-            update_entity_index("persons", membership.person, PersonSerializer)
-
-
-@shared_task
-def index_membership(instance_id):
-    instances = Membership.objects.language("all").filter(id=instance_id)
-    for instance in instances:
-        update_entity_index("memberships", instance, MembershipSerializer)
-        update_entity_index("persons", instance.person, PersonSerializer)
-        if instance.post:
-            update_entity_index("posts", instance.post, PostSerializer)
-        if instance.organization:
-            update_entity_index("organizations", instance.organization, OrganizationSerializer)
-
-
-@shared_task
-def index_post(instance_id):
-    instances = Post.objects.language("all").filter(id=instance_id)
-    for instance in instances:
-        update_entity_index("posts", instance, PostSerializer)
-        if instance.organization:
-            update_entity_index("organizations", instance.organization, OrganizationSerializer)
-        for membership in instance.memberships.all():
-            update_entity_index("memberships", membership, MembershipSerializer)
-            update_entity_index("persons", membership.person, PersonSerializer)
-
-
+# Update do not need a graph built beforehand like delete does, the entity still exist
 @shared_task
-def index_othername(instance_id):
-    instances = OtherName.objects.language("all").filter(id=instance_id)
-    for instance in instances:
-        parent = instance.content_object
-        if type(parent) is Person:
-            update_entity_index("persons", parent, PersonSerializer)
-            for membership in parent.memberships.all():
-                update_entity_index("memberships", membership, MembershipSerializer)
-                if membership.organization:
-                    update_entity_index("organizations", membership.organization, OrganizationSerializer)
-                if membership.post:
-                    update_entity_index("post", membership.post, PostSerializer)
-
-        if type(parent) is Organization:
-            update_entity_index("organizations", parent, OrganizationSerializer)
-
-            for post in parent.posts.all():
-                update_entity_index("posts", post, PostSerializer)
-            for membership in parent.memberships.all():
-                update_entity_index("memberships", membership, MembershipSerializer)
-                update_entity_index("persons", membership.person, PersonSerializer)
-
-        if type(parent) is Post:
-            update_entity_index("posts", parent, PostSerializer)
-            if parent.organization:
-                update_entity_index("organizations", parent.organization, OrganizationSerializer)
-            for membership in parent.memberships.all():
-                update_entity_index("memberships", membership, MembershipSerializer)
-                update_entity_index("persons", membership.person, PersonSerializer)
-
-
-@shared_task
-def index_identifier(instance_id):
-    instances = Identifier.objects.language("all").filter(instance_id)
-    for instance in instances:
-        parent = instance.content_object
-
-        if type(parent) is Person:
-            update_entity_index("persons", parent, PersonSerializer)
-            for membership in parent.memberships.all():
-                update_entity_index("memberships", membership, MembershipSerializer)
-                if membership.organization:
-                    update_entity_index("organizations", membership.organization, OrganizationSerializer)
-                if membership.post:
-                    update_entity_index("post", membership.post, PostSerializer)
-
-        if type(parent) is Organization:
-            update_entity_index("organizations", parent, OrganizationSerializer)
-
-            for post in parent.posts.all():
-                update_entity_index("posts", post, PostSerializer)
-            for membership in parent.memberships.all():
-                update_entity_index("memberships", membership, MembershipSerializer)
-                update_entity_index("persons", membership.person, PersonSerializer)
-
-
-@shared_task
-def index_link(instance_id):
-    instances = Link.objects.language("all").filtter(instance_id)
-    for instance in instances:
-        parent = instance.content_object
-        if type(parent) is Person:
-            update_entity_index("persons", parent, PersonSerializer)
-            for membership in parent.memberships.all():
-                update_entity_index("memberships", membership, MembershipSerializer)
-                if membership.organization:
-                    update_entity_index("organizations", membership.organization, OrganizationSerializer)
-                if membership.post:
-                    update_entity_index("post", membership.post, PostSerializer)
-
-        if type(parent) is Organization:
-            update_entity_index("organizations", parent, OrganizationSerializer)
-
-            for post in parent.posts.all():
-                update_entity_index("posts", post, PostSerializer)
-            for membership in parent.memberships.all():
-                update_entity_index("memberships", membership, MembershipSerializer)
-                update_entity_index("persons", membership.person, PersonSerializer)
-
-        if type(parent) is Post:
-            update_entity_index("posts", parent, PostSerializer)
-            if parent.organization:
-                update_entity_index("organizations", parent.organization, OrganizationSerializer)
-            for membership in parent.memberships.all():
-                update_entity_index("memberships", membership, MembershipSerializer)
-                update_entity_index("persons", membership.person, PersonSerializer)
-
-        if type(parent) is Membership:
-            update_entity_index("memberships", parent, MembershipSerializer)
-            update_entity_index("persons", parent.person, PersonSerializer)
-            if parent.post:
-                update_entity_index("posts", parent.post, PostSerializer)
-            if parent.organization:
-                update_entity_index("organizations", parent.organization, OrganizationSerializer)
-
-
-@shared_task
-def index_contactdetail(instance_id):
-    instances = ContactDetail.objects.language("all").filter(id=instance_id)
-    for instance in instances:
-        parent = instance.content_object
-        if type(parent) is Person:
-            update_entity_index("persons", parent, PersonSerializer)
-            for membership in parent.memberships.all():
-                update_entity_index("memberships", membership, MembershipSerializer)
-                if membership.organization:
-                    update_entity_index("organizations", membership.organization, OrganizationSerializer)
-                if membership.post:
-                    update_entity_index("post", membership.post, PostSerializer)
-
-        if type(parent) is Organization:
-            update_entity_index("organizations", parent, OrganizationSerializer)
-
-            for post in parent.posts.all():
-                update_entity_index("posts", post, PostSerializer)
-            for membership in parent.memberships.all():
-                update_entity_index("memberships", membership, MembershipSerializer)
-                update_entity_index("persons", membership.person, PersonSerializer)
-
-        if type(parent) is Post:
-            update_entity_index("posts", parent, PostSerializer)
-            if parent.organization:
-                update_entity_index("organizations", parent.organization, OrganizationSerializer)
-            for membership in parent.memberships.all():
-                update_entity_index("memberships", membership, MembershipSerializer)
-                update_entity_index("persons", membership.person, PersonSerializer)
-
-        if type(parent) is Membership:
-            update_entity_index("memberships", parent, MembershipSerializer)
-            update_entity_index("persons", parent.person, PersonSerializer)
-            if parent.post:
-                update_entity_index("posts", parent.post, PostSerializer)
-            if parent.organization:
-                update_entity_index("organizations", parent.organization, OrganizationSerializer)
+def perform_update(entity, entity_id):
+    reindex_roots([(entity, entity_id)])
 
 
-# I don't trust that the serialization to work on celery
 @shared_task
-def prepare_delete(entity, entity_id):
-    instances = ES_MODEL_MAP[entity].objects.language("all").filter(id=entity_id)
-    # Do not assume that instance still exist
-    if instances:
-        dep_store = dependency.DependencyStore()
-        dep_store.build_dependency(instances[0], "delete")
+def flush_reindex_queue():
+    queue = dependency.ReindexQueue()
+    roots = queue.take()
+    reindex_roots(roots, queue=queue)
 
 
-# Assuming instance from post_delete have enough information
+# The one indexing task. Everything touched by an API write goes in one job, dispatched once the write is committed
 @shared_task
-def perform_delete(entity, entity_id):
-    dep_store = dependency.DependencyStore()
-    graph = dep_store.fetch_graph(entity, entity_id)
-
-    if len(graph) > 1:
+def reindex_entities(roots, deleted=(), graph=()):
+    reindex_roots(roots, deleted, graph=graph)
+
+
+def reindex_roots(roots, deleted=(), queue=None, graph=()):
+    """
+    Reindex every entity depending on roots, and remove deleted from the index, with one bulk request. roots and
+    deleted are list of (entity, entity_id). graph is the nodes that depended on deleted, built by the pre_delete
+    handler while they were still in the database.
+    """
+    nodes = 0
+    to_index = set()
+    # Root deleted since it was marked end up with nothing to index, delete handler take care of it
+    for entity_graph in dependency.build_graph_map(roots, "update").values():
+        entity_graph = filter_graph(entity_graph)
+        nodes = nodes + len(entity_graph)
+        to_index.update(entity_graph)
+
+    deleted = set(tuple(item) for item in deleted)
+    # The deleted entities themselves are no longer in the database
+    delete_graph = [node for node in filter_graph(graph) if node[:2] not in deleted]
+    nodes = nodes + len(delete_graph)
+    to_index.update(delete_graph)
+    for entity, entity_id in sorted(deleted):
+        if entity in ES_SERIALIZER_MAP:
+            search.SerializerSearch(entity).delete_by_id(entity_id)
+
+    to_index = list(to_index)
+    if to_index:
         bulk_indexer = search.BulkIndexer()
-        bulk_indexer.index_data(graph)
-    else:
-        for node in graph:
-            update_node(node)
+        bulk_indexer.index_data(to_index)
+    queue = queue or dependency.ReindexQueue()
+    queue.record_flush(len(roots) + len(deleted), nodes, len(to_index))
 
 
-# The reason why we have 2 phase update for delete is because we need to maintain relationship
-# update, we don't have to because entity still exist
-@shared_task
-def perform_update(entity, entity_id):
-    instances = ES_MODEL_MAP[entity].objects.language("all").filter(id=entity_id)
-    graph = dependency.build_graph(instances[0], "update")
-    if len(graph) > 1:
-        bulk_indexer = search.BulkIndexer()
-        bulk_indexer.index_data(graph)
-    else:
-        for node in graph:
-            update_node(node)
+def filter_graph(graph):
+    # Child like links and contact details are part of their parent document, they are not index by themselves.
+    # Graph from redis is json, so node is a list.
+    return [tuple(node) for node in graph if node[0] in ES_SERIALIZER_MAP]
 
 
 def update_node(node):
@@ -260,23 +88,7 @@ def update_node(node):
 
         serializer = ES_SERIALIZER_MAP[entity]
         for instance in instances:
-            result = es.search("id:%s" % instance.id, language=instance.language_code)
-            if result:
-                es.update(instance, serializer)
-            else:
-                es.add(instance, serializer)
-
-
-def update_entity_index(name, instance, serializer):
-    language_code =  instance.language_code
-    id = instance.id
-    query = "id:%s AND language_code:%s" % (id, language_code)
-    indexer = search.SerializerSearch(name)
-    check = indexer.search(query, language=language_code)
-    if not check:
-        indexer.add(instance, serializer)
-    else:
-        indexer.update(instance, serializer)
+            es.upsert(instance, serializer)
 
 
 def delete_entity_index(name, instance):
@@ -0,0 +1,105 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from popit.models import *
+from popit.tests.base_testcase import BasePopitAPITestCase
+from popit.views.base import BaseMemberPersonList
+from popit.views.exception import EntityNotSetException
+
+
+class ActiveAPITestCase(BasePopitAPITestCase):
+
+    first_person_id = "ab1a5788e5bae955c048748fa6af0e97"
+    second_person_id = "8497ba86-7485-42d2-9596-2ab14520f1f4"
+    dated_post_id = "c1f0f86b-a491-4986-b48d-861b58a3ef6e"
+
+    def setUp(self):
+        super(ActiveAPITestCase, self).setUp()
+        self.organization = Organization.objects.language("en").create(name="temporal")
+        self.post = Post.objects.language("en").create(label="chair", organization=self.organization)
+        self.first = Membership.objects.language("en").create(
+            person_id=self.first_person_id, organization=self.organization, start_date="2010", end_date="2012-02")
+        self.second = Membership.objects.language("en").create(
+            person_id=self.second_person_id, post=self.post, start_date="2013-03")
+
+    def ids(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_memberships_on(self):
+        ids = self.ids("/en/memberships/", on="2011")
+        self.assertTrue(self.first.id in ids)
+        self.assertFalse(self.second.id in ids)
+        # Fixture memberships have no dates, they are open ended
+        self.assertTrue("b351cdc2-6961-4fc7-9d61-08fca66e1d44" in ids)
+
+        ids = self.ids("/en/memberships/", on="2013")
+        self.assertFalse(self.first.id in ids)
+        self.assertTrue(self.second.id in ids)
+
+    def test_memberships_partial_date(self):
+        # Ended some time in february 2012
+        self.assertTrue(self.first.id in self.ids("/en/memberships/", on="2012-02-29"))
+        self.assertTrue(self.first.id in self.ids("/en/memberships/", on="2012-02"))
+        self.assertFalse(self.first.id in self.ids("/en/memberships/", on="2012-03-01"))
+        # Started some time in march 2013
+        self.assertTrue(self.second.id in self.ids("/en/memberships/", on="2013-03-01"))
+        self.assertFalse(self.second.id in self.ids("/en/memberships/", on="2013-02"))
+
+    def test_memberships_range(self):
+        ids = self.ids("/en/memberships/", **{"from": "2012-03", "until": "2013-02"})
+        self.assertFalse(self.first.id in ids)
+        self.assertFalse(self.second.id in ids)
+
+        ids = self.ids("/en/memberships/", **{"from": "2012"})
+        self.assertTrue(self.first.id in ids)
+        self.assertTrue(self.second.id in ids)
+
+        ids = self.ids("/en/memberships/", until="2009")
+        self.assertFalse(self.first.id in ids)
+        self.assertFalse(self.second.id in ids)
+
+    def test_memberships_indexed(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get("/en/memberships/", {"on": "2011"})
+        sql = " ".join(query["sql"] for query in context.captured_queries)
+        self.assertTrue("start_date_lower" in sql)
+        self.assertFalse('"popit_membership"."start_date" ' in sql)
+
+    def test_organization_persons(self):
+        url = "/en/organizations/%s/persons/" % self.organization.id
+        self.assertEqual(sorted(self.ids(url)), sorted([self.first_person_id, self.second_person_id]))
+        self.assertEqual(self.ids(url, on="2011-06"), [self.first_person_id])
+        self.assertEqual(self.ids(url, on="2014"), [self.second_person_id])
+        self.assertEqual(self.ids(url, on="2012-12"), [])
+
+    def test_post_persons(self):
+        url = "/en/posts/%s/persons/" % self.post.id
+        self.assertEqual(self.ids(url, on="2014"), [self.second_person_id])
+        self.assertEqual(self.ids(url, on="2011"), [])
+
+    def test_persons_not_found(self):
+        response = self.client.get("/en/organizations/not-an-organization/persons/", {"on": "2011"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_membership_fields_not_set(self):
+        class NoFieldsPersonList(BaseMemberPersonList):
+            parent = Organization
+
+        request = APIRequestFactory().get("/en/organizations/%s/persons/" % self.organization.id)
+        view = NoFieldsPersonList.as_view()
+        self.assertRaises(EntityNotSetException, view, request, language="en", pk=self.organization.id)
+
+    def test_posts_on(self):
+        self.assertTrue(self.dated_post_id in self.ids("/en/posts/", on="2013"))
+        self.assertFalse(self.dated_post_id in self.ids("/en/posts/", on="2013-06"))
+        self.assertTrue(self.post.id in self.ids("/en/posts/", on="2013-06"))
+
+    def test_invalid(self):
+        response = self.client.get("/en/memberships/", {"on": "2010-13"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/en/memberships/", {"on": "2010", "from": "2009"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/en/memberships/", {"from": "2012", "until": "2010"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,23 @@
+from django.core.management import call_command
+from django.utils.six import StringIO
+from popit.signals.handlers import *
+from popit.models import *
+from popit.tests.base_testcase import BasePopitTestCase
+
+
+class BenchmarkDataTestCase(BasePopitTestCase):
+
+    def test_generate_and_benchmark(self):
+        links = Link.objects.untranslated().count()
+        call_command("generate_benchmark_data", links=100, persons=3, stdout=StringIO())
+        self.assertEqual(Link.objects.untranslated().count(), links + 100)
+        persons = Person.objects.language("en").filter(name__startswith="Benchmark person")
+        self.assertEqual(persons.count(), 3)
+        person = persons[0]
+        self.assertEqual(person.other_names.untranslated().count(), 2)
+        self.assertTrue(person.other_names.untranslated()[0].links.untranslated().exists())
+
+        out = StringIO()
+        call_command("benchmark_person_detail", requests=3, stdout=out)
+        self.assertTrue("requests: 3" in out.getvalue())
+        self.assertTrue("p95:" in out.getvalue())
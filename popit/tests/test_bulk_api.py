@@ -0,0 +1,209 @@
+from mock import patch
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from popit.models import *
+from popit.serializers import MembershipSerializer
+from popit.serializers.bulk import BulkWriter
+from popit.tests.base_testcase import BasePopitAPITestCase
+from popit.views.bulk import HTTP_207_MULTI_STATUS
+from popit.signals.handlers import *
+
+
+class BulkAPITestCase(BasePopitAPITestCase):
+
+    person_id = "8497ba86-7485-42d2-9596-2ab14520f1f4"
+    organization_id = "3d62d9ea-0600-4f29-8ce6-f7720fd49aa3"
+    post_id = "c1f0f86b-a491-4986-b48d-861b58a3ef6e"
+
+    def login(self):
+        token = Token.objects.get(user__username="admin")
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+    def memberships(self, count):
+        return [
+            {"label": "bulk membership %s" % i, "person_id": self.person_id, "organization_id": self.organization_id,
+             "links": [{"url": "http://sinarproject.org", "note": "source %s" % i}]}
+            for i in range(count)
+        ]
+
+    def test_create_unauthorized(self):
+        response = self.client.post("/en/bulk/memberships", self.memberships(2), format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_create_memberships(self):
+        self.login()
+        response = self.client.post("/en/bulk/memberships", self.memberships(3), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        ids = [result["id"] for result in response.data["results"]]
+        self.assertEqual(len(ids), 3)
+        for i, membership_id in enumerate(ids):
+            membership = Membership.objects.language("en").get(id=membership_id)
+            self.assertEqual(membership.label, "bulk membership %s" % i)
+            self.assertEqual(membership.person_id, self.person_id)
+            link = membership.links.language("en").get()
+            self.assertEqual(link.note, "source %s" % i)
+
+        response = self.client.get("/en/memberships/%s" % ids[0])
+        self.assertEqual(response.data["result"]["label"], "bulk membership 0")
+
+    def test_create_query_count(self):
+        # Queries do not grow with the number of item
+        self.login()
+        with CaptureQueriesContext(connection) as context:
+            self.client.post("/en/bulk/memberships", self.memberships(2), format="json")
+        few = len(context.captured_queries)
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.post("/en/bulk/memberships", self.memberships(20), format="json")
+        self.assertEqual(len(context.captured_queries), few)
+
+    def test_create_membership_organization_from_post(self):
+        self.login()
+        data = [{"label": "bulk", "person_id": self.person_id, "post_id": self.post_id}]
+        response = self.client.post("/en/bulk/memberships", data, format="json")
+        membership = Membership.objects.untranslated().get(id=response.data["results"][0]["id"])
+        post = Post.objects.untranslated().get(id=self.post_id)
+        self.assertEqual(membership.organization_id, post.organization_id)
+
+    def test_create_persons_with_children(self):
+        self.login()
+        data = [
+            {"name": "joe", "other_names": [{"name": "jolly roger", "links": [{"url": "http://sinarproject.org"}]}],
+             "identifiers": [{"scheme": "pirate", "identifier": "1"}]},
+            {"name": "jane", "birth_date": "1990"},
+        ]
+        response = self.client.post("/ms/bulk/persons", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        joe = Person.objects.language("ms").get(id=response.data["results"][0]["id"])
+        self.assertEqual(joe.name, "joe")
+        other_name = joe.other_names.language("ms").get()
+        self.assertEqual(other_name.name, "jolly roger")
+        self.assertEqual(other_name.links.untranslated().count(), 1)
+        self.assertEqual(joe.identifiers.language("ms").get().identifier, "1")
+
+        jane = Person.objects.language("ms").get(id=response.data["results"][1]["id"])
+        self.assertEqual(jane.birth_date, "1990")
+
+    def test_create_item_errors(self):
+        self.login()
+        data = self.memberships(1) + [
+            {"label": "no person", "organization_id": self.organization_id},
+            {"label": "bad post", "person_id": self.person_id, "post_id": "not_exist"},
+            {"id": "b351cdc2-6961-4fc7-9d61-08fca66e1d44", "person_id": self.person_id,
+             "organization_id": self.organization_id},
+        ]
+        count = Membership.objects.untranslated().count()
+        response = self.client.post("/en/bulk/memberships", data, format="json")
+        self.assertEqual(response.status_code, HTTP_207_MULTI_STATUS)
+
+        results = response.data["results"]
+        self.assertTrue("id" in results[0])
+        for result in results[1:]:
+            self.assertTrue("errors" in result)
+        self.assertEqual(Membership.objects.untranslated().count(), count + 1)
+
+    def test_create_concurrent_clash(self):
+        self.login()
+        add = BulkWriter.add
+
+        def add_concurrently(writer, model, language, validated_data):
+            instance = add(writer, model, language, validated_data)
+            if instance.id == "concurrent":
+                # Inserted by another request once ids are checked
+                Membership.objects.language("en").create(id="concurrent", person_id=self.person_id,
+                                                         organization_id=self.organization_id)
+            return instance
+
+        data = self.memberships(2)
+        data[1]["id"] = "concurrent"
+        count = Membership.objects.untranslated().count()
+        with patch.object(BulkWriter, "add", add_concurrently):
+            response = self.client.post("/en/bulk/memberships", data, format="json")
+        self.assertEqual(response.status_code, HTTP_207_MULTI_STATUS)
+
+        results = response.data["results"]
+        membership = Membership.objects.language("en").get(id=results[0]["id"])
+        self.assertEqual(membership.links.untranslated().count(), 1)
+        self.assertTrue("non_field_errors" in results[1]["errors"])
+        self.assertEqual(Membership.objects.untranslated().count(), count + 2)
+
+    def test_create_all_invalid(self):
+        self.login()
+        response = self.client.post("/en/bulk/memberships", [{"label": "no person"}], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_not_a_list(self):
+        self.login()
+        response = self.client.post("/en/bulk/memberships", {"label": "test"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_entity(self):
+        self.login()
+        response = self.client.post("/en/bulk/links", [], format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update(self):
+        self.login()
+        data = [
+            {"id": "b351cdc2-6961-4fc7-9d61-08fca66e1d44", "label": "updated"},
+            {"id": "not_exist", "label": "updated"},
+        ]
+        response = self.client.put("/ms/bulk/memberships", data, format="json")
+        self.assertEqual(response.status_code, HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["results"][0]["id"], "b351cdc2-6961-4fc7-9d61-08fca66e1d44")
+        self.assertTrue("errors" in response.data["results"][1])
+
+        membership = Membership.objects.language("ms").get(id="b351cdc2-6961-4fc7-9d61-08fca66e1d44")
+        self.assertEqual(membership.label, "updated")
+
+    def test_update_item_errors(self):
+        self.login()
+        other = Membership.objects.language("en").create(person_id=self.person_id,
+                                                          organization_id=self.organization_id)
+        update = MembershipSerializer.update
+
+        def fail_half_way(serializer, instance, validated_data):
+            if instance.id != other.id:
+                return update(serializer, instance, validated_data)
+            instance.label = "half way"
+            instance.save()
+            raise DjangoValidationError({"start_date": ["Not a date"]})
+
+        data = [
+            {"id": "b351cdc2-6961-4fc7-9d61-08fca66e1d44", "label": "updated"},
+            {"id": other.id, "label": "not saved"},
+        ]
+        with patch.object(MembershipSerializer, "update", fail_half_way):
+            response = self.client.put("/en/bulk/memberships", data, format="json")
+        self.assertEqual(response.status_code, HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["results"][0]["id"], "b351cdc2-6961-4fc7-9d61-08fca66e1d44")
+        self.assertEqual(response.data["results"][1]["errors"], {"start_date": ["Not a date"]})
+
+        # What the failed item wrote is undone, the others are kept
+        self.assertEqual(Membership.objects.language("en").get(id=other.id).label, None)
+        membership = Membership.objects.language("en").get(id="b351cdc2-6961-4fc7-9d61-08fca66e1d44")
+        self.assertEqual(membership.label, "updated")
+
+    @patch("popit.middleware.reindex_entities")
+    @patch("popit.middleware.transaction.on_commit")
+    def test_one_reindex(self, mock_on_commit, mock_reindex):
+        post_save.connect(entity_save_handler, sender=Membership)
+        post_save.connect(entity_save_handler, sender=Link)
+        try:
+            self.login()
+            response = self.client.post("/en/bulk/memberships", self.memberships(3), format="json")
+        finally:
+            post_save.disconnect(entity_save_handler, sender=Membership)
+            post_save.disconnect(entity_save_handler, sender=Link)
+
+        self.assertEqual(mock_on_commit.call_count, 1)
+        mock_on_commit.call_args[0][0]()
+        self.assertEqual(mock_reindex.apply_async.call_count, 1)
+        roots, deleted, graph = mock_reindex.apply_async.call_args[0][0]
+        for result in response.data["results"]:
+            self.assertTrue(("memberships", result["id"]) in roots)
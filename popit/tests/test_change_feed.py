@@ -0,0 +1,89 @@
+import datetime
+from django.utils import timezone
+from popit.models import *
+from popit.tests.base_testcase import BasePopitAPITestCase
+
+
+class ChangeFeedTestCase(BasePopitAPITestCase):
+
+    person_id = "078541c9-9081-4082-b28f-29cbb64440cb"
+
+    def setUp(self):
+        super(ChangeFeedTestCase, self).setUp()
+        self.since = timezone.now() - datetime.timedelta(days=1)
+        # Fixture is old, anything after self.since is a change
+        old = self.since - datetime.timedelta(days=10)
+        for model in (Person, Organization, Post, Membership, Area, OtherName, Identifier, ContactDetail, Link):
+            model.objects.untranslated().update(updated_at=old)
+
+    def changed(self, url):
+        response = self.client.get(url, {"updated_since": self.since.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.changed("/en/persons/"), [])
+        self.assertEqual(self.changed("/en/organizations/"), [])
+        self.assertEqual(self.changed("/en/areas/"), [])
+
+    def test_entity_changed(self):
+        person = Person.objects.language("en").get(id=self.person_id)
+        person.name = "joe"
+        person.save()
+        self.assertEqual(self.changed("/en/persons/"), [self.person_id])
+
+    def test_child_changed(self):
+        person = Person.objects.untranslated().get(id=self.person_id)
+        OtherName.objects.language("en").create(name="jolly roger", content_object=person)
+        self.assertEqual(self.changed("/en/persons/"), [self.person_id])
+
+    def test_embedded_entity_changed(self):
+        # Post is in the membership, which is in the person
+        post = Post.objects.language("en").get(id="2c6982c2-504a-4e0d-8949-dade5f9e494e")
+        post.label = "Admiral of Pirate Party KL"
+        post.save()
+        self.assertEqual(self.changed("/en/persons/"), [self.person_id])
+        self.assertTrue("b351cdc2-6961-4fc7-9d61-08fca66e1d44" in self.changed("/en/memberships/"))
+
+    def test_child_link_changed(self):
+        person = Person.objects.untranslated().get(id=self.person_id)
+        other_name = OtherName.objects.language("en").create(name="jolly roger", content_object=person)
+        OtherName.objects.untranslated().update(updated_at=self.since - datetime.timedelta(days=10))
+        Link.objects.language("en").create(url="http://sinarproject.org", content_object=other_name)
+        self.assertEqual(self.changed("/en/persons/"), [self.person_id])
+
+    def test_child_deleted(self):
+        person = Person.objects.untranslated().get(id="ab1a5788e5bae955c048748fa6af0e97")
+        person.links.all().first().delete()
+        self.assertEqual(self.changed("/en/persons/"), [person.id])
+
+    def test_invalid_updated_since(self):
+        response = self.client.get("/en/persons/", {"updated_since": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+
+
+class TombstoneTestCase(BasePopitAPITestCase):
+
+    def test_tombstone(self):
+        membership = Membership.objects.untranslated().get(id="b351cdc2-6961-4fc7-9d61-08fca66e1d44")
+        membership.delete()
+
+        response = self.client.get("/en/deleted/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["entity"], "memberships")
+        self.assertEqual(response.data["results"][0]["id"], "b351cdc2-6961-4fc7-9d61-08fca66e1d44")
+
+    def test_tombstone_filter(self):
+        Membership.objects.untranslated().get(id="b351cdc2-6961-4fc7-9d61-08fca66e1d44").delete()
+        Post.objects.language("en").create(label="Pirate").delete()
+
+        response = self.client.get("/en/deleted/", {"entity": "posts"})
+        self.assertEqual([item["entity"] for item in response.data["results"]], ["posts"])
+
+        since = (timezone.now() + datetime.timedelta(days=1)).isoformat()
+        response = self.client.get("/en/deleted/", {"updated_since": since})
+        self.assertEqual(response.data["results"], [])
+
+    def test_child_no_tombstone(self):
+        Link.objects.untranslated().all().first().delete()
+        self.assertFalse(Tombstone.objects.exists())
@@ -0,0 +1,113 @@
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+from rest_framework.authtoken.models import Token
+from popit.signals.handlers import *
+from popit.models import *
+from popit.serializers import PersonSerializer
+from popit.tests.base_testcase import BasePopitAPITestCase
+from popit import coverage
+
+
+class CitationCoverageTestCase(BasePopitAPITestCase):
+
+    person_id = "ab1a5788e5bae955c048748fa6af0e97"
+
+    def setUp(self):
+        super(CitationCoverageTestCase, self).setUp()
+        # Fixture is loaded raw, without signals
+        coverage.rebuild()
+
+    def login(self):
+        token = Token.objects.get(user__username="admin")
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+    def cited(self, model, entity_id):
+        bitmap = coverage.entity_bitmaps(model, [entity_id]).get(entity_id, 0)
+        return coverage.cited_fields(model, bitmap)
+
+    def test_rebuild(self):
+        self.assertTrue("email" in self.cited(Person, self.person_id))
+        self.assertFalse("birth_date" in self.cited(Person, self.person_id))
+
+    def test_rebuild_command(self):
+        CitationCoverage.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_citation_coverage", stdout=out)
+        self.assertTrue("email" in self.cited(Person, self.person_id))
+
+    def test_link_saved(self):
+        person = Person.objects.untranslated().get(id=self.person_id)
+        link = Link.objects.language("en").create(url="http://sinarproject.org", field="birth_date",
+                                                  content_object=person)
+        self.assertTrue("birth_date" in self.cited(Person, self.person_id))
+
+        link.field = "death_date"
+        link.save()
+        cited = self.cited(Person, self.person_id)
+        self.assertTrue("death_date" in cited)
+        self.assertFalse("birth_date" in cited)
+
+        link.delete()
+        self.assertFalse("death_date" in self.cited(Person, self.person_id))
+
+    def test_last_link_deleted(self):
+        person = Person.objects.untranslated().get(id=self.person_id)
+        person.links.untranslated().exclude(field=None).delete()
+        self.assertFalse(CitationCoverage.objects.filter(object_id=self.person_id).exists())
+
+    def test_citation_api(self):
+        self.login()
+        response = self.client.post("/en/persons/%s/citations/birth_date/" % self.person_id,
+                                    {"url": "http://sinarproject.org"})
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue("birth_date" in self.cited(Person, self.person_id))
+
+    def test_nested_update(self):
+        person = Person.objects.language("en").get(id=self.person_id)
+        data = {
+            "links": [{"url": "http://sinarproject.org", "field": "gender"}],
+            "other_names": [{"id": "8be11fbf3ff1402693feca1842f10c15",
+                             "links": [{"url": "http://sinarproject.org", "field": "note"}]}],
+        }
+        serializer = PersonSerializer(person, data=data, partial=True, language="en")
+        serializer.is_valid()
+        self.assertEqual(serializer.errors, {})
+        serializer.save()
+        self.assertTrue("gender" in self.cited(Person, self.person_id))
+        self.assertTrue("note" in self.cited(OtherName, "8be11fbf3ff1402693feca1842f10c15"))
+
+    def test_report(self):
+        response = self.client.get("/en/coverage/persons/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total"], Person.objects.untranslated().count())
+        results = dict((item["id"], item) for item in response.data["results"])
+        self.assertTrue("email" in results[self.person_id]["cited"])
+        self.assertTrue("birth_date" in results[self.person_id]["uncited"])
+        cited = Link.objects.untranslated().filter(field="email", content_type__model="person")
+        self.assertEqual(response.data["summary"]["email"], len(cited.order_by().values("object_id").distinct()))
+
+    def test_report_filter(self):
+        response = self.client.get("/en/coverage/persons/", {"cited": "email"})
+        ids = [item["id"] for item in response.data["results"]]
+        self.assertTrue(self.person_id in ids)
+        for item in response.data["results"]:
+            self.assertTrue("email" in item["cited"])
+
+        response = self.client.get("/en/coverage/persons/", {"uncited": "email,birth_date"})
+        ids = [item["id"] for item in response.data["results"]]
+        self.assertFalse(self.person_id in ids)
+        self.assertEqual(len(ids), Person.objects.untranslated().count() - response.data["summary"]["email"])
+
+    def test_report_not_from_links(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get("/en/coverage/persons/", {"uncited": "birth_date"})
+        for query in context.captured_queries:
+            self.assertFalse("popit_link" in query["sql"], query["sql"])
+
+    def test_report_invalid(self):
+        response = self.client.get("/en/coverage/persons/", {"cited": "not_a_field"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/en/coverage/links/")
+        self.assertEqual(response.status_code, 404)
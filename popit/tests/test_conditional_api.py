@@ -0,0 +1,116 @@
+from mock import patch
+from django.test.utils import override_settings
+from popit.models import *
+from popit.tests.base_testcase import BasePopitAPITestCase
+from popit import cache
+from popit.views import conditional
+
+
+class ConditionalAPITestCase(BasePopitAPITestCase):
+
+    person_id = "078541c9-9081-4082-b28f-29cbb64440cb"
+
+    def assertNotModified(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, "")
+        return response["ETag"]
+
+    @patch("popit.views.base.prefetch_entities")
+    def test_detail_not_modified(self, mock_prefetch):
+        url = "/en/persons/%s" % self.person_id
+        response = self.client.get(url)
+        mock_prefetch.reset_mock()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        # Nothing is serialized
+        self.assertFalse(mock_prefetch.called)
+
+    def test_detail_modified_since(self):
+        url = "/en/persons/%s" % self.person_id
+        response = self.client.get(url)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_detail_embedded_change(self):
+        url = "/en/persons/%s" % self.person_id
+        etag = self.assertNotModified(url)
+
+        post = Post.objects.language("en").get(id="2c6982c2-504a-4e0d-8949-dade5f9e494e")
+        post.label = "Admiral of Pirate Party KL"
+        post.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_detail_child_deleted(self):
+        url = "/en/persons/%s" % self.person_id
+        person = Person.objects.untranslated().get(id=self.person_id)
+        link = Link.objects.language("en").create(url="http://sinarproject.org", content_object=person)
+        etag = self.assertNotModified(url)
+
+        link.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_not_modified(self):
+        etag = self.assertNotModified("/en/persons/")
+
+        Person.objects.language("en").create(name="joe")
+        response = self.client.get("/en/persons/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_entity_lists_not_modified(self):
+        # Validators from the prefetched rows are the same as the ones queried for a conditional request
+        for url in ("/en/persons/", "/en/organizations/", "/en/posts/", "/en/memberships/"):
+            self.assertNotModified(url)
+
+    @patch("popit.views.conditional.collect_rows", wraps=conditional.collect_rows)
+    def test_validators_not_queried(self, mock_collect):
+        response = self.client.get("/en/persons/")
+        self.assertTrue(response.has_header("ETag"))
+        response = self.client.get("/en/persons/%s" % self.person_id)
+        self.assertTrue(response.has_header("ETag"))
+        # Everything is already prefetched to serialize the entities
+        self.assertFalse(mock_collect.called)
+
+        self.client.get("/en/persons/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertTrue(mock_collect.called)
+
+    def test_sub_item_not_modified(self):
+        self.assertNotModified("/en/persons/ab1a5788e5bae955c048748fa6af0e97/links/")
+        self.assertNotModified("/en/persons/ab1a5788e5bae955c048748fa6af0e97/contact_details/")
+
+    def test_citation_not_modified(self):
+        self.assertNotModified("/en/persons/ab1a5788e5bae955c048748fa6af0e97/citations/")
+        self.assertNotModified("/en/persons/ab1a5788e5bae955c048748fa6af0e97/citations/name")
+
+    def test_missing_no_validators(self):
+        response = self.client.get("/en/persons/not_exist")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("ETag"))
+
+    @override_settings(RENDER_CACHE_BACKEND="popit.cache.LocalMemoryBackend")
+    def test_cached_not_modified(self):
+        cache.get_backend().clear()
+        url = "/en/persons/%s" % self.person_id
+        etag = self.assertNotModified(url)
+        # From the cache this time
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class PostUpdatedAtTestCase(BasePopitAPITestCase):
+
+    def test_post_updated_at(self):
+        post = Post.objects.language("en").get(id="2c6982c2-504a-4e0d-8949-dade5f9e494e")
+        updated_at = post.updated_at
+        post.label = "Admiral of Pirate Party KL"
+        post.save()
+        self.assertTrue(post.updated_at > updated_at)
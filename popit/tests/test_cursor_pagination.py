@@ -0,0 +1,74 @@
+from mock import patch
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from popit.models import *
+from popit.tests.base_testcase import BasePopitAPITestCase
+from utils import PopitPaginator
+
+
+@patch.object(PopitPaginator, "page_size", 2)
+class CursorPaginationTestCase(BasePopitAPITestCase):
+
+    def walk(self, url):
+        ids = []
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            ids.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+        return ids, pages
+
+    def test_walk_all(self):
+        ids, pages = self.walk("/en/memberships/?cursor=&count=true")
+        expected = list(Membership.objects.untranslated().order_by("created_at", "id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(pages), 3)
+        self.assertTrue(pages[0]["has_more"])
+        self.assertFalse(pages[-1]["has_more"])
+        self.assertEqual(pages[0]["previous"], None)
+        self.assertEqual(pages[0]["total"], len(expected))
+
+    def test_previous(self):
+        first = self.client.get("/en/memberships/?cursor=").data
+        second = self.client.get(first["next"]).data
+        previous = self.client.get(second["previous"]).data
+        self.assertEqual([item["id"] for item in previous["results"]],
+                         [item["id"] for item in first["results"]])
+        self.assertEqual(previous["next"], first["next"])
+
+    def test_same_created_at(self):
+        person = Person.objects.untranslated().get(id="8497ba86-7485-42d2-9596-2ab14520f1f4")
+        created_at = person.created_at
+        for i in range(3):
+            Person.objects.language("en").create(name="joe %s" % i)
+        Person.objects.untranslated().update(created_at=created_at)
+
+        ids, pages = self.walk("/en/persons/?cursor=")
+        self.assertEqual(ids, sorted(Person.objects.untranslated().values_list("id", flat=True)))
+
+    def test_skip_count(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/en/memberships/?cursor=")
+        self.assertEqual(response.data["total"], None)
+        for query in context.captured_queries:
+            self.assertFalse("COUNT(" in query["sql"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/en/memberships/?cursor=notacursor")
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_index(self):
+        for model in (Person, Organization, Post, Membership):
+            self.assertTrue(("created_at", "id") in model._meta.index_together)
+
+    def test_page_number_unchanged(self):
+        response = self.client.get("/en/memberships/?page=2")
+        self.assertEqual(response.data["page"], 2)
+        self.assertEqual(response.data["num_pages"], 3)
+
+    def test_not_modified(self):
+        response = self.client.get("/en/memberships/?cursor=")
+        response = self.client.get("/en/memberships/?cursor=", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
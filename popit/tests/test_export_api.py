@@ -0,0 +1,68 @@
+import json
+import datetime
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test.utils import override_settings
+from django.utils import timezone
+from popit.models import *
+from popit.serializers import *
+from popit.tests.base_testcase import BasePopitAPITestCase
+
+
+class ExportAPITestCase(BasePopitAPITestCase):
+
+    def export(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertTrue(response.streaming)
+        content = "".join(response.streaming_content)
+        return [json.loads(line) for line in content.splitlines()]
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_export_persons(self):
+        documents = self.export("/en/export/persons")
+        persons = Person.objects.untranslated().order_by("id")
+        self.assertEqual([document["id"] for document in documents], [person.id for person in persons])
+        for person, document in zip(persons, documents):
+            serializer = PersonSerializer(person, language="en")
+            self.assertEqual(document, json.loads(json.dumps(serializer.data)))
+
+    def test_export_language(self):
+        documents = self.export("/ms/export/organizations")
+        self.assertEqual(len(documents), Organization.objects.untranslated().count())
+        for document in documents:
+            self.assertEqual(document["language_code"], "ms")
+
+    def test_updated_since(self):
+        Membership.objects.untranslated().update(updated_at=timezone.now() - datetime.timedelta(days=10))
+        membership = Membership.objects.language("en").get(id="b351cdc2-6961-4fc7-9d61-08fca66e1d44")
+        membership.save()
+
+        since = (timezone.now() - datetime.timedelta(days=1)).date().isoformat()
+        documents = self.export("/en/export/memberships?updated_since=%s" % since)
+        self.assertEqual([document["id"] for document in documents], [membership.id])
+
+    def test_invalid_updated_since(self):
+        response = self.client.get("/en/export/memberships?updated_since=yesterday")
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_entity(self):
+        response = self.client.get("/en/export/links")
+        self.assertEqual(response.status_code, 404)
+
+    def test_chunk_query_count(self):
+        # Queries grow with the number of chunk, not the number of person
+        with override_settings(EXPORT_CHUNK_SIZE=100):
+            with CaptureQueriesContext(connection) as context:
+                self.export("/en/export/persons")
+        before = len(context.captured_queries)
+
+        for i in range(10):
+            person = Person.objects.language("en").create(name="joe %s" % i)
+            Link.objects.language("en").create(url="http://sinarproject.org", content_object=person)
+
+        with override_settings(EXPORT_CHUNK_SIZE=100):
+            with CaptureQueriesContext(connection) as context:
+                self.export("/en/export/persons")
+        self.assertEqual(before, len(context.captured_queries))
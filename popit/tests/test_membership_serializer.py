@@ -1,6 +1,8 @@
 from popit.signals.handlers import *
 from popit.models import *
 import logging
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from popit.tests.base_testcase import BasePopitTestCase
 
 
@@ -339,3 +341,51 @@ class MembershipSerializerTestCase(BasePopitTestCase):
         serializer.save()
         membership = Membership.objects.language("en").get(label="test membership")
         self.assertEqual(membership.on_behalf_of_id, "612943b1-864d-4188-8d79-ca387ed19b32")
+
+    def assertReferencesLoadedOnce(self, queries):
+        # Master table of each referred entity, hvad translation table is popit_<model>_translation. Model.save
+        # full_clean still check foreign keys with SELECT (1), those are not loading anything.
+        for table in ("popit_person", "popit_organization", "popit_post", "popit_area"):
+            selects = [query for query in queries
+                       if query["sql"].startswith("SELECT") and not query["sql"].startswith('SELECT (1) AS "a"')
+                       and 'FROM "%s"' % table in query["sql"]]
+            self.assertTrue(len(selects) <= 1, "%s queried %s times" % (table, len(selects)))
+
+    def test_create_membership_references_loaded_once(self):
+        data = {
+            "label": "test membership",
+            "person_id": "8497ba86-7485-42d2-9596-2ab14520f1f4",
+            "post_id": "c1f0f86b-a491-4986-b48d-861b58a3ef6e",
+            "on_behalf_of_id": "612943b1-864d-4188-8d79-ca387ed19b32",
+            "area_id": "640c0f1d-2305-4d17-97fe-6aa59f079cc4",
+        }
+        serializer = MembershipSerializer(data=data, language="en")
+        with CaptureQueriesContext(connection) as context:
+            serializer.is_valid()
+            self.assertEqual(serializer.errors, {})
+            membership = serializer.save()
+        self.assertReferencesLoadedOnce(context.captured_queries)
+        post = Post.objects.untranslated().get(id="c1f0f86b-a491-4986-b48d-861b58a3ef6e")
+        self.assertEqual(membership.organization_id, post.organization_id)
+
+    def test_update_membership_references_loaded_once(self):
+        membership = Membership.objects.untranslated().get(id="b351cdc2-6961-4fc7-9d61-08fca66e1d44")
+        data = {
+            "organization_id": membership.organization_id,
+            "person_id": "8497ba86-7485-42d2-9596-2ab14520f1f4",
+        }
+        serializer = MembershipSerializer(membership, language="en", data=data, partial=True)
+        with CaptureQueriesContext(connection) as context:
+            serializer.is_valid()
+            self.assertEqual(serializer.errors, {})
+            serializer.save()
+        self.assertReferencesLoadedOnce(context.captured_queries)
+
+    def test_invalid_reference(self):
+        data = {
+            "label": "test membership",
+            "person_id": "not_exist",
+            "organization_id": "e4e9fcbf-cccf-44ff-acf6-1c5971ec85ec",
+        }
+        serializer = MembershipSerializer(data=data, language="en")
+        self.assertFalse(serializer.is_valid())
@@ -0,0 +1,111 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from popit.signals.handlers import *
+from popit.models import *
+from popit.serializers import PersonSerializer
+from popit.tests.base_testcase import BasePopitTestCase
+
+
+class NestedUpdateTestCase(BasePopitTestCase):
+
+    person_id = "ab1a5788e5bae955c048748fa6af0e97"
+
+    def setUp(self):
+        super(NestedUpdateTestCase, self).setUp()
+        self.notified = []
+        children_changed.connect(self.receiver)
+
+    def tearDown(self):
+        children_changed.disconnect(self.receiver)
+        super(NestedUpdateTestCase, self).tearDown()
+
+    def receiver(self, sender, instance, **kwargs):
+        self.notified.append((sender, instance.id))
+
+    def update(self, data, language="en"):
+        person = Person.objects.language(language).get(id=self.person_id)
+        serializer = PersonSerializer(person, data=data, partial=True, language=language)
+        serializer.is_valid()
+        self.assertEqual(serializer.errors, {})
+        with CaptureQueriesContext(connection) as context:
+            serializer.save()
+        return [query["sql"] for query in context.captured_queries]
+
+    def writes(self, queries, table):
+        return [query for query in queries if query.startswith(("UPDATE", "INSERT")) and '"%s"' % table in query]
+
+    def test_unchanged_not_written(self):
+        other_name = OtherName.objects.language("en").get(id="8be11fbf3ff1402693feca1842f10c15")
+        link = Link.objects.language("en").get(id="a4ffa24a9ef3cbcb8cfaa178c9329367")
+        queries = self.update({
+            "other_names": [{"id": other_name.id, "name": other_name.name}],
+            "links": [{"id": link.id, "url": link.url, "note": link.note}],
+        })
+        for table in ("popit_othername", "popit_othername_translation", "popit_link", "popit_link_translation"):
+            self.assertEqual(self.writes(queries, table), [])
+        self.assertEqual(self.notified, [])
+
+    def test_changed_written(self):
+        other_name = OtherName.objects.untranslated().get(id="8be11fbf3ff1402693feca1842f10c15")
+        updated_at = other_name.updated_at
+        queries = self.update({
+            "other_names": [{"id": other_name.id, "name": "jolly roger"}],
+        })
+        self.assertEqual(len(self.writes(queries, "popit_othername_translation")), 1)
+        self.assertEqual(len(self.writes(queries, "popit_othername")), 1)
+
+        other_name = OtherName.objects.language("en").get(id="8be11fbf3ff1402693feca1842f10c15")
+        self.assertEqual(other_name.name, "jolly roger")
+        self.assertTrue(other_name.updated_at > updated_at)
+
+    def test_new_translation(self):
+        self.update({
+            "other_names": [{"id": "8be11fbf3ff1402693feca1842f10c15", "name": "bajak laut"}],
+        }, language="ms")
+        other_name = OtherName.objects.language("ms").get(id="8be11fbf3ff1402693feca1842f10c15")
+        self.assertEqual(other_name.name, "bajak laut")
+        self.assertNotEqual(OtherName.objects.language("en").get(id=other_name.id).name, "bajak laut")
+
+    def test_create_with_links(self):
+        self.update({
+            "other_names": [{"name": "jolly roger", "links": [{"url": "http://sinarproject.org", "note": "source"}]}],
+        })
+        person = Person.objects.untranslated().get(id=self.person_id)
+        other_name = person.other_names.language("en").get(name="jolly roger")
+        self.assertEqual(other_name.links.language("en").get().note, "source")
+
+    def test_one_notification(self):
+        self.update({
+            "other_names": [{"id": "8be11fbf3ff1402693feca1842f10c15", "name": "jolly roger"}],
+            "links": [{"id": "a4ffa24a9ef3cbcb8cfaa178c9329367", "note": "just a random repo"}],
+            "identifiers": [{"scheme": "pirate", "identifier": "1"}],
+        })
+        self.assertEqual(self.notified, [(Person, self.person_id)])
+
+    def test_children_loaded_once(self):
+        person = Person.objects.untranslated().get(id=self.person_id)
+        ids = []
+        for i in range(5):
+            ids.append(OtherName.objects.language("en").create(name="name %s" % i, content_object=person).id)
+
+        queries = self.update({"other_names": [{"id": pk, "name": "name"} for pk in ids[:1]]})
+        few = [query for query in queries if query.startswith("SELECT") and '"popit_othername"' in query]
+
+        queries = self.update({"other_names": [{"id": pk, "name": "other name"} for pk in ids]})
+        many = [query for query in queries if query.startswith("SELECT") and '"popit_othername"' in query]
+        self.assertEqual(len(few), len(many))
+
+    def test_foreign_child_not_moved(self):
+        # Contact detail of another person
+        foreign = ContactDetail.objects.language("en").get(id="2256ec04-2d1d-4994-b1f1-16d3f5245441")
+        self.update({
+            "contact_details": [{"id": foreign.id, "type": "email", "value": "pirate@sinarproject.org"}],
+        })
+        contact_detail = ContactDetail.objects.language("en").get(id=foreign.id)
+        self.assertEqual(contact_detail.object_id, "8497ba86-7485-42d2-9596-2ab14520f1f4")
+        self.assertEqual(contact_detail.value, foreign.value)
+
+        person = Person.objects.untranslated().get(id=self.person_id)
+        created = person.contact_details.language("en").get(value="pirate@sinarproject.org")
+        self.assertNotEqual(created.id, foreign.id)
+        self.assertEqual(self.notified, [(Person, self.person_id)])
@@ -0,0 +1,87 @@
+import datetime
+from django.test import SimpleTestCase
+from rest_framework.authtoken.models import Token
+from popit.signals.handlers import *
+from popit.models import *
+from popit.serializers import PersonSerializer
+from popit.tests.base_testcase import BasePopitAPITestCase
+from popit import dates
+
+
+class DateBoundsTestCase(SimpleTestCase):
+
+    def test_bounds(self):
+        self.assertEqual(dates.date_bounds("2010"), (datetime.date(2010, 1, 1), datetime.date(2010, 12, 31)))
+        self.assertEqual(dates.date_bounds("2012-02"), (datetime.date(2012, 2, 1), datetime.date(2012, 2, 29)))
+        self.assertEqual(dates.date_bounds("2010-02-03"), (datetime.date(2010, 2, 3), datetime.date(2010, 2, 3)))
+        self.assertEqual(dates.date_bounds("1800-05"), (datetime.date(1800, 5, 1), datetime.date(1800, 5, 31)))
+
+    def test_not_a_date(self):
+        for value in (None, "", "2010-13", "not a date"):
+            self.assertEqual(dates.date_bounds(value), (None, None))
+
+    def test_index_date(self):
+        self.assertEqual(dates.index_date("2010-05"), "2010-05-01T000000")
+        self.assertEqual(dates.index_date("1800"), "1800-01-01T000000")
+
+
+class PartialDateTestCase(BasePopitAPITestCase):
+
+    person_id = "ab1a5788e5bae955c048748fa6af0e97"
+    organization_id = "3d62d9ea-0600-4f29-8ce6-f7720fd49aa3"
+
+    def login(self):
+        token = Token.objects.get(user__username="admin")
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+    def test_fixture_bounds(self):
+        person = Person.objects.untranslated().get(birth_date="1901-01-01")
+        self.assertEqual(person.birth_date_lower, datetime.date(1901, 1, 1))
+        self.assertEqual(person.death_date_upper, datetime.date(2001, 1, 1))
+
+    def test_save(self):
+        membership = Membership.objects.language("en").create(person_id=self.person_id,
+                                                               organization_id=self.organization_id,
+                                                               start_date="2010", end_date="2012-02")
+        membership = Membership.objects.untranslated().get(id=membership.id)
+        self.assertEqual(membership.start_date_lower, datetime.date(2010, 1, 1))
+        self.assertEqual(membership.start_date_upper, datetime.date(2010, 12, 31))
+        self.assertEqual(membership.end_date_upper, datetime.date(2012, 2, 29))
+
+        membership.end_date = None
+        membership.save()
+        membership = Membership.objects.untranslated().get(id=membership.id)
+        self.assertEqual(membership.end_date_lower, None)
+        self.assertEqual(membership.end_date_upper, None)
+
+    def test_range_query(self):
+        Membership.objects.language("en").create(person_id=self.person_id, organization_id=self.organization_id,
+                                                 start_date="2010", end_date="2012-02")
+        day = datetime.date(2011, 6, 1)
+        active = Membership.objects.untranslated().filter(start_date_lower__lte=day, end_date_upper__gte=day)
+        self.assertEqual(active.count(), 1)
+
+    def test_bulk_create(self):
+        self.login()
+        data = [{"label": "bulk", "person_id": self.person_id, "organization_id": self.organization_id,
+                 "start_date": "2013-05"}]
+        response = self.client.post("/en/bulk/memberships", data, format="json")
+        self.assertEqual(response.status_code, 201)
+        membership = Membership.objects.untranslated().get(start_date="2013-05")
+        self.assertEqual(membership.start_date_upper, datetime.date(2013, 5, 31))
+
+    def test_nested_update(self):
+        person = Person.objects.language("en").get(id=self.person_id)
+        data = {"other_names": [{"id": "8be11fbf3ff1402693feca1842f10c15", "start_date": "1999-02"}]}
+        serializer = PersonSerializer(person, data=data, partial=True, language="en")
+        serializer.is_valid()
+        self.assertEqual(serializer.errors, {})
+        serializer.save()
+        other_name = OtherName.objects.untranslated().get(id="8be11fbf3ff1402693feca1842f10c15")
+        self.assertEqual(other_name.start_date_lower, datetime.date(1999, 2, 1))
+        self.assertEqual(other_name.start_date_upper, datetime.date(1999, 2, 28))
+
+    def test_not_in_api(self):
+        response = self.client.get("/en/persons/%s" % self.person_id)
+        self.assertFalse("birth_date_lower" in response.data["result"])
+        self.assertFalse("start_date_lower" in response.data["result"]["other_names"][0])
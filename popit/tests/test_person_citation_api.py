@@ -1,6 +1,9 @@
 from popit.signals.handlers import *
 from popit.models import *
+from popit import dates
 from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from popit.tests.base_testcase import BasePopitAPITestCase
 
 
@@ -15,12 +18,42 @@ class PersonCitationAPITestCase(BasePopitAPITestCase):
         for field in person._meta.fields:
             if field.attname == "id":
                 continue
+            if field.attname in dates.bound_fields(Person):
+                self.assertFalse(field.attname in data["result"])
+                continue
             self.assertTrue(field.attname in data["result"])
         for field in person._translated_field_names:
             if field == "master_id" or field == "id":
                 continue
             self.assertTrue(field in data["result"])
 
+    def test_fetch_person_field_citation_grouped(self):
+        response = self.client.get("/en/persons/ab1a5788e5bae955c048748fa6af0e97/citations/")
+        result = response.data["result"]
+        self.assertEqual(len(result["email"]), 1)
+        self.assertEqual(result["email"][0]["id"], "7e462cdea35840a28c20cf9fe79284fd")
+        self.assertEqual(result["email"][0]["url"], "http://sinarproject.org")
+        self.assertEqual(result["birth_date"], [])
+
+    def test_fetch_person_field_citation_query_count(self):
+        # Queries do not grow with the number of field or link
+        url = "/en/persons/ab1a5788e5bae955c048748fa6af0e97/citations/"
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        few = len(context.captured_queries)
+        summary = len(response.data["result"]["summary"])
+
+        person = Person.objects.untranslated().get(id="ab1a5788e5bae955c048748fa6af0e97")
+        for field in ("name", "family_name", "birth_date", "summary", "image"):
+            for i in range(3):
+                Link.objects.language("en").create(url="http://sinarproject.org/%s" % i, field=field,
+                                                   content_object=person)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(len(response.data["result"]["summary"]), summary + 3)
+        self.assertEqual(len(context.captured_queries), few)
+        self.assertTrue(few <= 5, "\n".join(query["sql"] for query in context.captured_queries))
+
     def test_fetch_person_citation_list(self):
         response = self.client.get("/en/persons/ab1a5788e5bae955c048748fa6af0e97/citations/email/")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -89,6 +122,20 @@ class TestPersonContactDetailCitationAPI(BasePopitAPITestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_fetch_person_contact_details_field_citations_query_count(self):
+        url = "/en/persons/ab1a5788e5bae955c048748fa6af0e97/contact_details/a66cb422-eec3-4861-bae1-a64ae5dbde61/citations"
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        few = len(context.captured_queries)
+
+        contact_detail = ContactDetail.objects.untranslated().get(id="a66cb422-eec3-4861-bae1-a64ae5dbde61")
+        for field in ("valid_from", "valid_until"):
+            Link.objects.language("en").create(url="http://sinarproject.org", field=field,
+                                               content_object=contact_detail)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        self.assertEqual(len(context.captured_queries), few)
+
     def test_fetch_person_contact_details_citation_list(self):
         response = self.client.get(
             "/en/persons/ab1a5788e5bae955c048748fa6af0e97/contact_details/a66cb422-eec3-4861-bae1-a64ae5dbde61/citations/label/"
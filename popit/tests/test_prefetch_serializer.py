@@ -0,0 +1,110 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from popit.models import *
+from popit.serializers import PersonSerializer
+from popit.serializers import OrganizationSerializer
+from popit.serializers import PostSerializer
+from popit.serializers import MembershipSerializer
+from popit.serializers.prefetch import prefetch_entities
+from popit.tests.base_testcase import BasePopitTestCase
+from popit.tests.base_testcase import BasePopitAPITestCase
+
+
+class PrefetchSerializerTestCase(BasePopitTestCase):
+
+    def add_memberships(self, person, count):
+        for i in range(count):
+            organization = Organization.objects.language("en").create(name="organization %s" % i)
+            post = Post.objects.language("en").create(role="member %s" % i, organization=organization)
+            membership = Membership.objects.language("en").create(
+                person=person, organization=organization, post=post, on_behalf_of=organization
+            )
+            ContactDetail.objects.language("en").create(type="email", value="member%s@sinarproject.org" % i,
+                                                         content_object=membership)
+            Link.objects.language("en").create(url="http://sinarproject.org/%s" % i, content_object=membership)
+
+    def count_queries(self, person_id):
+        person = Person.objects.untranslated().get(id=person_id)
+        with CaptureQueriesContext(connection) as context:
+            prefetch_entities([person])
+            data = PersonSerializer(person, language="en").data
+        return len(context.captured_queries), data
+
+    def test_person_query_count_constant(self):
+        person = Person.objects.untranslated().get(id="8497ba86-7485-42d2-9596-2ab14520f1f4")
+        self.add_memberships(person, 1)
+        first_count, data = self.count_queries(person.id)
+
+        self.add_memberships(person, 5)
+        second_count, data = self.count_queries(person.id)
+        self.assertEqual(first_count, second_count)
+        self.assertEqual(len(data["memberships"]), person.memberships.count())
+
+    def test_person_list_query_count_constant(self):
+        persons = list(Person.objects.untranslated().all())
+        with CaptureQueriesContext(connection) as context:
+            PersonSerializer(persons, language="en", many=True).data
+        first_count = len(context.captured_queries)
+
+        for person in persons:
+            self.add_memberships(person, 2)
+
+        persons = list(Person.objects.untranslated().all())
+        with CaptureQueriesContext(connection) as context:
+            PersonSerializer(persons, language="en", many=True).data
+        self.assertEqual(first_count, len(context.captured_queries))
+
+    def test_prefetched_output_same(self):
+        person = Person.objects.untranslated().get(id="8497ba86-7485-42d2-9596-2ab14520f1f4")
+        self.add_memberships(person, 2)
+        for language in ("en", "ms"):
+            person = Person.objects.untranslated().get(id="8497ba86-7485-42d2-9596-2ab14520f1f4")
+            expected = PersonSerializer(person, language=language).data
+
+            person = Person.objects.untranslated().get(id="8497ba86-7485-42d2-9596-2ab14520f1f4")
+            prefetch_entities([person])
+            data = PersonSerializer(person, language=language).data
+            self.assertEqual(data, expected)
+
+    def test_prefetched_organization_post_membership_output_same(self):
+        person = Person.objects.untranslated().get(id="8497ba86-7485-42d2-9596-2ab14520f1f4")
+        self.add_memberships(person, 2)
+        for entity, serializer in ((Organization, OrganizationSerializer), (Post, PostSerializer),
+                                   (Membership, MembershipSerializer)):
+            for language in ("en", "ms"):
+                instances = entity.objects.untranslated().all()
+                expected = [serializer(instance, language=language).data for instance in instances]
+
+                instances = list(entity.objects.untranslated().all())
+                prefetch_entities(instances, language)
+                data = [serializer(instance, language=language).data for instance in instances]
+                self.assertEqual(data, expected)
+
+
+class PrefetchListAPITestCase(BasePopitAPITestCase):
+
+    def add_rich_rows(self):
+        for organization in Organization.objects.untranslated().all():
+            OtherName.objects.language("en").create(name="other name", content_object=organization)
+            Identifier.objects.language("en").create(identifier="123", scheme="test", content_object=organization)
+            Link.objects.language("en").create(url="http://sinarproject.org", content_object=organization)
+            post = Post.objects.language("en").create(role="member", organization=organization)
+            ContactDetail.objects.language("en").create(type="email", value="post@sinarproject.org",
+                                                         content_object=post)
+            for person in Person.objects.untranslated().all():
+                membership = Membership.objects.language("en").create(person=person, organization=organization,
+                                                                      post=post)
+                Link.objects.language("en").create(url="http://sinarproject.org", content_object=membership)
+
+    def count_list_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_list_query_count_bounded(self):
+        urls = ("/en/persons/", "/en/organizations/", "/en/posts/", "/en/memberships/")
+        before = [self.count_list_queries(url) for url in urls]
+        self.add_rich_rows()
+        after = [self.count_list_queries(url) for url in urls]
+        self.assertEqual(before, after)
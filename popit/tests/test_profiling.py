@@ -0,0 +1,136 @@
+import json
+from mock import patch
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+from popit import profiling
+from popit.models import Person
+from popit.tests.base_testcase import BasePopitAPITestCase
+
+
+class ProfilingTestCase(TestCase):
+
+    def tearDown(self):
+        profiling.finish()
+
+    def test_percentile(self):
+        values = range(1, 101)
+        self.assertEqual(profiling.percentile(values, 50), 50)
+        self.assertEqual(profiling.percentile(values, 95), 95)
+        self.assertEqual(profiling.percentile(values, 99), 99)
+        self.assertEqual(profiling.percentile([3], 99), 3)
+        self.assertEqual(profiling.percentile([], 50), None)
+
+    def test_measure_nested(self):
+        profiling.start()
+        with profiling.measure("es"):
+            with profiling.measure("es"):
+                pass
+        with profiling.measure("es"):
+            pass
+        sample = profiling.finish().finish()
+        self.assertEqual(sample["es_count"], 2)
+
+    def test_measure_not_profiled(self):
+        with profiling.measure("es"):
+            pass
+        self.assertEqual(profiling.current(), None)
+
+    def test_query_count_not_capped(self):
+        # More queries than connection.queries_log keep
+        profiling.start()
+        maxlen = connection.queries_log.maxlen
+        for i in range(maxlen + 10):
+            Person.objects.untranslated().filter(id="%s" % i).exists()
+        trace = profiling.finish()
+        sample = trace.finish()
+        self.assertEqual(sample["sql_count"], maxlen + 10)
+        self.assertEqual(len(trace.queries), profiling.QUERY_LOG_SIZE)
+
+        # Cursor is back to what it was
+        profiling.start()
+        Person.objects.untranslated().exists()
+        self.assertEqual(profiling.finish().finish()["sql_count"], 1)
+        Person.objects.untranslated().exists()
+        self.assertEqual(trace.sql_count, maxlen + 10)
+
+    def test_recorder_sample_size(self):
+        recorder = profiling.Recorder(sample_size=2)
+        for duration in (3, 1, 2):
+            sample = dict((metric, 0) for metric in profiling.METRICS)
+            sample["duration"] = duration
+            recorder.record("person-list", sample)
+        report = recorder.report()
+        self.assertEqual(report[0]["count"], 2)
+        self.assertEqual(report[0]["duration"]["p99"], 2)
+
+
+@override_settings(MIDDLEWARE_CLASSES=("popit.middleware.ProfilingMiddleware",) + settings.MIDDLEWARE_CLASSES)
+class ProfilingMiddlewareTestCase(BasePopitAPITestCase):
+
+    def setUp(self):
+        super(ProfilingMiddlewareTestCase, self).setUp()
+        profiling.recorder.reset()
+
+    def tearDown(self):
+        profiling.recorder.reset()
+        super(ProfilingMiddlewareTestCase, self).tearDown()
+
+    def login(self):
+        token = Token.objects.get(user__username="admin")
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+    def test_report(self):
+        self.client.get("/en/persons/")
+        self.client.get("/en/persons/")
+        self.client.get("/en/persons/ab1a5788e5bae955c048748fa6af0e97")
+
+        self.login()
+        response = self.client.get("/profiling")
+        self.assertEqual(response.status_code, 200)
+        report = dict((entry["name"], entry) for entry in response.data["results"])
+        self.assertEqual(report["person-list"]["count"], 2)
+        self.assertEqual(report["person-detail"]["count"], 1)
+        self.assertTrue(report["person-list"]["sql_count"]["p50"] > 0)
+        self.assertTrue(report["person-list"]["serialization_time"]["p95"] > 0)
+        self.assertEqual(report["person-list"]["es_count"]["p99"], 0)
+
+    def test_report_admin_only(self):
+        response = self.client.get("/profiling")
+        self.assertEqual(response.status_code, 401)
+
+    def test_reset(self):
+        self.client.get("/en/persons/")
+        self.login()
+        response = self.client.delete("/profiling")
+        self.assertEqual(response.status_code, 204)
+        response = self.client.get("/profiling")
+        self.assertEqual([entry["name"] for entry in response.data["results"]], ["profiling"])
+
+    @override_settings(PROFILING_SLOW_THRESHOLD=0)
+    @patch("popit.profiling.logger")
+    def test_slow_request_logged(self, mock_logger):
+        self.client.get("/en/persons/ab1a5788e5bae955c048748fa6af0e97")
+        self.assertEqual(mock_logger.warning.call_count, 1)
+        trace = json.loads(mock_logger.warning.call_args[0][0])
+        self.assertEqual(trace["name"], "person-detail")
+        self.assertEqual(trace["path"], "/en/persons/ab1a5788e5bae955c048748fa6af0e97")
+        self.assertEqual(len(trace["queries"]), trace["sql_count"])
+        self.assertFalse("queries_truncated" in trace)
+
+    @override_settings(PROFILING_SLOW_THRESHOLD=0)
+    @patch("popit.profiling.QUERY_LOG_SIZE", 2)
+    @patch("popit.profiling.logger")
+    def test_slow_request_truncated(self, mock_logger):
+        self.client.get("/en/persons/ab1a5788e5bae955c048748fa6af0e97")
+        trace = json.loads(mock_logger.warning.call_args[0][0])
+        self.assertEqual(len(trace["queries"]), 2)
+        self.assertEqual(trace["queries_truncated"], trace["sql_count"] - 2)
+
+    @override_settings(PROFILING_SLOW_THRESHOLD=None)
+    @patch("popit.profiling.logger")
+    def test_slow_log_disabled(self, mock_logger):
+        self.client.get("/en/persons/ab1a5788e5bae955c048748fa6af0e97")
+        self.assertEqual(mock_logger.warning.call_count, 0)
@@ -0,0 +1,90 @@
+from mock import patch
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from popit.models import *
+
+
+class ReindexBatchTestCase(APITestCase):
+    fixtures = ["api_request_test_data.yaml"]
+
+    def setUp(self):
+        token = Token.objects.get(user__username="admin")
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+
+    @patch("django.db.transaction.on_commit")
+    @patch("popit.middleware.reindex_entities")
+    def test_create_person_one_job(self, mock_reindex, mock_on_commit):
+        person_data = {
+            "name": "joe",
+            "contact_details": [
+                {
+                    "type": "twitter",
+                    "value": "sinarproject",
+                }
+            ],
+            "links": [
+                {
+                    "url": "http://sinarproject.org",
+                }
+            ],
+            "identifiers": [
+                {
+                    "identifier": "9089098098",
+                    "scheme": "rakyat",
+                }
+            ],
+            "other_names": [
+                {
+                    "name": "Jane",
+                }
+            ]
+        }
+        response = self.client.post("/en/persons/", person_data, format="json")
+        self.assertEqual(response.status_code, 201)
+        # Only dispatched after commit
+        self.assertEqual(mock_on_commit.call_count, 1)
+        self.assertFalse(mock_reindex.apply_async.called)
+
+        mock_on_commit.call_args[0][0]()
+        self.assertEqual(mock_reindex.apply_async.call_count, 1)
+        roots, deleted, graph = mock_reindex.apply_async.call_args[0][0]
+        entities = set(entity for entity, entity_id in roots)
+        self.assertEqual(entities, set(["persons", "contactdetails", "links", "identifiers", "othernames"]))
+        self.assertTrue(("persons", response.data["result"]["id"]) in roots)
+        self.assertEqual(deleted, [])
+
+    @patch("django.db.transaction.on_commit")
+    @patch("popit.signals.handlers.reindex_entities")
+    @patch("popit.middleware.reindex_entities")
+    def test_delete_person_one_job(self, mock_reindex, mock_row_reindex, mock_on_commit):
+        response = self.client.delete("/en/persons/ab1a5788e5bae955c048748fa6af0e97")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(mock_on_commit.call_count, 1)
+        # Cascaded rows do not get a job of their own
+        self.assertFalse(mock_row_reindex.apply_async.called)
+
+        mock_on_commit.call_args[0][0]()
+        self.assertEqual(mock_reindex.apply_async.call_count, 1)
+        roots, deleted, graph = mock_reindex.apply_async.call_args[0][0]
+        self.assertTrue(("persons", "ab1a5788e5bae955c048748fa6af0e97") in deleted)
+        # Membership was cascaded, its organization is still there and is reindexed
+        self.assertTrue(("memberships", "7185cab2521c4f6db18b40d8d6506d36") in deleted)
+        self.assertTrue(("organizations", "e4e9fcbf-cccf-44ff-acf6-1c5971ec85ec", "update") in graph)
+
+    @patch("django.db.transaction.on_commit")
+    @patch("popit.signals.handlers.reindex_entities")
+    def test_delete_outside_request(self, mock_reindex, mock_on_commit):
+        Membership.objects.untranslated().get(id="7185cab2521c4f6db18b40d8d6506d36").delete()
+        self.assertFalse(mock_reindex.apply_async.called)
+        for call in mock_on_commit.call_args_list:
+            call[0][0]()
+        jobs = dict((tuple(call[0][0][1]), call[0][0][2]) for call in mock_reindex.apply_async.call_args_list)
+        graph = jobs[(("memberships", "7185cab2521c4f6db18b40d8d6506d36"),)]
+        self.assertTrue(("persons", "ab1a5788e5bae955c048748fa6af0e97", "update") in graph)
+
+    @patch("django.db.transaction.on_commit")
+    @patch("popit.middleware.reindex_entities")
+    def test_read_no_job(self, mock_reindex, mock_on_commit):
+        response = self.client.get("/en/persons/ab1a5788e5bae955c048748fa6af0e97")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(mock_on_commit.called)
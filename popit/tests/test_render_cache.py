@@ -0,0 +1,133 @@
+from mock import patch
+from mock import MagicMock
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+from popit.models import *
+from popit.tests.base_testcase import BasePopitAPITestCase
+from popit import cache
+
+
+class RenderCacheBackendTestCase(BasePopitAPITestCase):
+
+    def test_local_lru(self):
+        backend = cache.LocalMemoryBackend(max_entries=2, timeout=60)
+        backend.set("a", "1")
+        backend.set("b", "2")
+        # a is now the most recently used
+        self.assertEqual(backend.get("a"), "1")
+        backend.set("c", "3")
+        self.assertEqual(backend.get("b"), None)
+        self.assertEqual(backend.get("a"), "1")
+        self.assertEqual(backend.get("c"), "3")
+
+    @patch("time.time")
+    def test_local_timeout(self, mock_time):
+        backend = cache.LocalMemoryBackend(max_entries=2, timeout=60)
+        mock_time.return_value = 1000
+        backend.set("a", "1")
+        mock_time.return_value = 1059
+        self.assertEqual(backend.get("a"), "1")
+        mock_time.return_value = 1061
+        self.assertEqual(backend.get("a"), None)
+
+    def test_redis_backend(self):
+        store = MagicMock()
+        backend = cache.RedisBackend(store, timeout=60)
+        backend.set("persons:1:en", "{}")
+        store.set.assert_called_with("render:persons:1:en", "{}", ex=60)
+        backend.delete_many(["persons:1:en", "persons:1:ms"])
+        store.delete.assert_called_with("render:persons:1:en", "render:persons:1:ms")
+
+
+@override_settings(RENDER_CACHE_BACKEND="popit.cache.LocalMemoryBackend")
+class RenderCacheAPITestCase(BasePopitAPITestCase):
+
+    person_id = "078541c9-9081-4082-b28f-29cbb64440cb"
+
+    def setUp(self):
+        super(RenderCacheAPITestCase, self).setUp()
+        # Database is rolled back after each test, the cache is not
+        cache.get_backend().clear()
+
+    def test_detail_cached(self):
+        response = self.client.get("/en/persons/%s" % self.person_id)
+        with self.assertNumQueries(0):
+            cached = self.client.get("/en/persons/%s" % self.person_id)
+        self.assertEqual(response.data, cached.data)
+
+        # Every language is its own document
+        response = self.client.get("/ms/persons/%s" % self.person_id)
+        self.assertEqual(response.data["result"]["language_code"], "ms")
+
+    def test_update_invalidate(self):
+        self.client.get("/en/persons/%s" % self.person_id)
+        token = Token.objects.get(user__username="admin")
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+        response = self.client.put("/en/persons/%s" % self.person_id, {"name": "joe"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get("/en/persons/%s" % self.person_id)
+        self.assertEqual(response.data["result"]["name"], "joe")
+
+    def test_embedded_entity_invalidate(self):
+        response = self.client.get("/en/persons/%s" % self.person_id)
+        memberships = response.data["result"]["memberships"]
+        self.assertEqual(memberships[0]["post"]["label"], "Captain of Pirate Party KL")
+
+        post = Post.objects.language("en").get(id="2c6982c2-504a-4e0d-8949-dade5f9e494e")
+        post.label = "Admiral of Pirate Party KL"
+        post.save()
+
+        response = self.client.get("/en/persons/%s" % self.person_id)
+        memberships = response.data["result"]["memberships"]
+        self.assertEqual(memberships[0]["post"]["label"], "Admiral of Pirate Party KL")
+
+    def test_grandchild_invalidate(self):
+        response = self.client.get("/en/persons/%s" % self.person_id)
+        identifier = response.data["result"]["identifiers"][0]
+        self.assertEqual(identifier["links"], [])
+
+        # Link of an identifier of the person, two level down the document
+        identifier = Identifier.objects.untranslated().get(id=identifier["id"])
+        Link.objects.language("en").create(url="http://sinarproject.org/identifier", content_object=identifier)
+
+        response = self.client.get("/en/persons/%s" % self.person_id)
+        links = response.data["result"]["identifiers"][0]["links"]
+        self.assertEqual([link["url"] for link in links], ["http://sinarproject.org/identifier"])
+
+    def test_area_and_parent_invalidate(self):
+        area = Area.objects.language("en").create(name="Kuala Lumpur")
+        parent = Organization.objects.language("en").create(name="Pirate Party")
+        organization = Organization.objects.language("en").create(name="Pirate Party KL", parent=parent, area=area)
+        post = Post.objects.language("en").create(label="Captain", organization=organization, area=area)
+        post_url = "/en/posts/%s" % post.id
+        organization_url = "/en/organizations/%s" % organization.id
+        self.client.get(post_url)
+        self.client.get(organization_url)
+
+        area = Area.objects.language("en").get(id=area.id)
+        area.name = "Selangor"
+        area.save()
+        parent = Organization.objects.language("en").get(id=parent.id)
+        parent.name = "Pirate Party Malaysia"
+        parent.save()
+
+        result = self.client.get(post_url).data["result"]
+        self.assertEqual(result["area"]["name"], "Selangor")
+        self.assertEqual(result["organization"]["parent"]["name"], "Pirate Party Malaysia")
+        result = self.client.get(organization_url).data["result"]
+        self.assertEqual(result["area"]["name"], "Selangor")
+
+    def test_delete_invalidate(self):
+        response = self.client.get("/en/persons/%s" % self.person_id)
+        self.assertEqual(len(response.data["result"]["memberships"]), 1)
+
+        Membership.objects.untranslated().get(id="b351cdc2-6961-4fc7-9d61-08fca66e1d44").delete()
+
+        response = self.client.get("/en/persons/%s" % self.person_id)
+        self.assertEqual(len(response.data["result"]["memberships"]), 0)
+
+    def test_missing_not_cached(self):
+        response = self.client.get("/en/persons/not_exist")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(cache.get_document("persons", "not_exist", "en"), None)
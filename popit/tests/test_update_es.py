@@ -1,4 +1,5 @@
 from popit.tasks import update_node
+from popit.tasks import reindex_entities
 from django.test import TestCase
 from mock import patch
 from popit.models import *
@@ -17,7 +18,8 @@ class UpdateESTask(TestCase):
         node = ("organizations", "3d62d9ea-0600-4f29-8ce6-f7720fd49aa3", "update")
         update_node(node)
         organization = Organization.objects.language("en").get(id="3d62d9ea-0600-4f29-8ce6-f7720fd49aa3")
-        instance.add.assert_called_with(organization, OrganizationSerializer)
+        instance.upsert.assert_called_with(organization, OrganizationSerializer)
+        self.assertFalse(instance.search.called)
 
     @patch("popit_search.utils.search.SerializerSearch")
     def test_delete_node(self, mock_search):
@@ -35,4 +37,25 @@ class UpdateESTask(TestCase):
         node = ("organizations", "3d62d9ea-0600-4f29-8ce6-f7720fd49aa3", "update")
         update_node(node)
         organization = Organization.objects.language("en").get(id="3d62d9ea-0600-4f29-8ce6-f7720fd49aa3")
-        instance.update.assert_called_with(organization, OrganizationSerializer)
\ No newline at end of file
+        instance.upsert.assert_called_with(organization, OrganizationSerializer)
+        self.assertFalse(instance.search.called)
+
+    @patch("popit_search.utils.dependency.ReindexQueue")
+    @patch("popit_search.utils.search.BulkIndexer")
+    def test_reindex_entities_one_bulk(self, mock_indexer, mock_queue):
+        organization = Organization.objects.language("en").get(id="3d62d9ea-0600-4f29-8ce6-f7720fd49aa3")
+        identifier = Identifier.objects.language("en").create(identifier="123", scheme="test",
+                                                              content_object=organization)
+        link = Link.objects.language("en").create(url="http://sinarproject.org", content_object=organization)
+        roots = [
+            ("organizations", organization.id),
+            ("identifiers", identifier.id),
+            ("links", link.id),
+            ("memberships", "b351cdc2-6961-4fc7-9d61-08fca66e1d44"),
+        ]
+        reindex_entities(roots)
+        self.assertEqual(mock_indexer.return_value.index_data.call_count, 1)
+        graph = mock_indexer.return_value.index_data.call_args[0][0]
+        self.assertEqual(len(graph), len(set(graph)))
+        self.assertTrue(("organizations", organization.id, "update") in graph)
+        self.assertTrue(("persons", "078541c9-9081-4082-b28f-29cbb64440cb", "update") in graph)
@@ -28,6 +28,7 @@ from popit.views.persons import PersonContactDetailCitationListView
 from popit.views.persons import PersonContactDetailCitationDetailView
 from popit.views.persons import PersonContactDetailFieldCitationView
 from popit.views.organizations import OrganizationDetail
+from popit.views.organizations import OrganizationPersonList
 from popit.views.organizations import OrganizationList
 from popit.views.organizations import OrganizationContactDetailDetail
 from popit.views.organizations import OrganizationContactDetailList
@@ -57,9 +58,11 @@ from popit.views.organizations import OrganizationIdentifierCitationDetailView
 from popit.views.organizations import OrganizationIdentifierFieldCitationView
 from popit.views.misc import AreaDetail
 from popit.views.misc import AreaList
+from popit.views.misc import TombstoneList
 from popit.views.misc import AreaLinkDetail
 from popit.views.misc import AreaLinkList
 from popit.views.post import PostDetail
+from popit.views.post import PostPersonList
 from popit.views.post import PostList
 from popit.views.post import PostContactDetailDetail
 from popit.views.post import PostContactDetailList
@@ -95,4 +98,8 @@ from popit.views.membership import MembershipContactDetailCitationListView
 from popit.views.membership import MembershipContactDetailCitationDetailView
 from popit.views.membership import MembershipContactDetailFieldCitationView
 from popit.views.root_view import api_root
-from popit.views.root_view import api_root_all
\ No newline at end of file
+from popit.views.root_view import api_root_all
+from popit.views.export import ExportView
+from popit.views.bulk import BulkView
+from popit.views.profiling import ProfilingReport
+from popit.views.citation import CitationCoverageView
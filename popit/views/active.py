@@ -0,0 +1,66 @@
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+from popit.models import Membership
+from popit.models import Post
+from popit import dates
+
+
+# Active on a date. A membership or a post is active from its start date to its end date, on the lower and upper
+# bound columns of popit.dates so the query is a range over an index. Dates are partial on both sides, active is
+# whenever it might have been: started no later than the last day asked, and ended no earlier than the first. A
+# missing start or end is open ended.
+ACTIVE_DATES = {
+    Membership: ("start_date", "end_date"),
+    Post: ("start_date", "end_date"),
+}
+
+
+def parse_bound(name, value):
+    lower, upper = dates.date_bounds(value)
+    if lower is None:
+        raise ParseError("%s need to be a date, YYYY, YYYY-MM or YYYY-MM-DD, e.g 2016-02" % name)
+    return lower, upper
+
+
+def parse_active(params):
+    """
+    (first day, last day) asked for in query parameters, either on, or a range with from and/or until. None when
+    none of them is given.
+    """
+    on = params.get("on")
+    since = params.get("from")
+    until = params.get("until")
+    if on:
+        if since or until:
+            raise ParseError("on cannot be used with from or until")
+        return parse_bound("on", on)
+    if not since and not until:
+        return None
+    lower = parse_bound("from", since)[0] if since else None
+    upper = parse_bound("until", until)[1] if until else None
+    if lower and upper and lower > upper:
+        raise ParseError("from need to be before until")
+    return lower, upper
+
+
+def active_query(model, lower, upper):
+    start, end = ACTIVE_DATES[model]
+    query = Q()
+    if upper:
+        query &= Q(**{dates.lower_field(start) + "__lte": upper}) | Q(**{dates.lower_field(start): None})
+    if lower:
+        query &= Q(**{dates.upper_field(end) + "__gte": lower}) | Q(**{dates.upper_field(end): None})
+    return query
+
+
+def filter_active(model, queryset, params):
+    """
+    Keep the entities of queryset active on the date, or in the range, of query parameters. Nothing is filtered when
+    there is none, or when model has no start and end.
+    """
+    if model not in ACTIVE_DATES:
+        return queryset
+    active = parse_active(params)
+    if active is None:
+        return queryset
+    return queryset.filter(active_query(model, *active))
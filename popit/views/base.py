@@ -2,9 +2,17 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.settings import api_settings
 from rest_framework.response import Response
+from django.db.models import Q
 from django.http import Http404
 from popit.models import Person
+from popit.models import Membership
 from popit.serializers import PersonSerializer
+from popit.serializers.prefetch import prefetch_entities
+from popit_search.utils.dependency import node_name
+from popit import cache
+from popit.views import conditional
+from popit.views.changes import filter_updated_since
+from popit.views.active import filter_active
 from rest_framework import status
 from popit.views.exception import SerializerNotSetException
 from popit.views.exception import EntityNotSetException
@@ -24,12 +32,51 @@ class BasePopitView(APIView):
     entity = None
     serializer = None
 
+    # ETag and Last-Modified of the response, set by check_not_modified
+    validators = None
+    # Instances rendered in the response and the extra of their validators, when they are left for finalize_response
+    rendered = None
+
     @property
     def paginator(self):
         if not self._paginator:
             self._paginator = self.paginator_class()
         return self._paginator
 
+    def check_not_modified(self, request, state, *extra):
+        """
+        Return a 304 response when the client copy of the response is still fresh, None otherwise. state is from
+        conditional.instances_state, extra anything else the response depends on.
+        """
+        self.validators = conditional.get_validators(request, state, *extra)
+        return conditional.not_modified(request, self.validators)
+
+    def check_instances_not_modified(self, request, instances, *extra):
+        """
+        Same as check_not_modified for a response rendering instances. Their rows are only queried when the client
+        has a copy to compare with, otherwise validators are computed in finalize_response from the rows prefetched
+        to serialize them.
+        """
+        if conditional.is_conditional(request):
+            return self.check_not_modified(request, conditional.instances_state(instances), *extra)
+        self.rendered = (instances, extra)
+        return None
+
+    def check_page_not_modified(self, request, page):
+        # A page also change when entity are added or removed, or if it is not the same entity in it
+        ids = [instance.id for instance in page]
+        extra = self.paginator.get_page_state() + ids
+        return self.check_instances_not_modified(request, page, *extra)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super(BasePopitView, self).finalize_response(request, response, *args, **kwargs)
+        if self.rendered and response.status_code == 200:
+            instances, extra = self.rendered
+            self.validators = conditional.get_validators(request, conditional.prefetched_state(instances), *extra)
+        if self.validators and response.status_code in (200, 304):
+            conditional.set_validators(response, self.validators)
+        return response
+
 
 class BasePopitListCreateView(BasePopitView):
 
@@ -41,7 +88,12 @@ class BasePopitListCreateView(BasePopitView):
             raise EntityNotSetException("Please set an entity in views")
 
         entities = self.entity.objects.untranslated().all()
+        entities = filter_updated_since(self.entity, entities, request.query_params.get("updated_since"))
+        entities = filter_active(self.entity, entities, request.query_params)
         page = self.paginator.paginate_queryset(entities, request, view=self)
+        not_modified = self.check_page_not_modified(request, page)
+        if not_modified:
+            return not_modified
         serializer = self.serializer(page, language=language, many=True)
         return self.paginator.get_paginated_response(serializer.data)
 
@@ -61,6 +113,41 @@ class BasePopitListCreateView(BasePopitView):
         return Response(errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class BaseMemberPersonList(BasePopitView):
+    """
+    Persons with a membership in parent, active on the date or in the range of the query parameters when there is
+    one, see popit.views.active.
+    """
+
+    parent = None
+    entity = Person
+    serializer = PersonSerializer
+    # Membership fields pointing to parent, a membership is in parent when any of them does
+    membership_fields = ()
+
+    def get(self, request, language, pk, format=True):
+        if not self.parent:
+            raise EntityNotSetException("Please set a parent in views")
+
+        if not self.membership_fields:
+            raise EntityNotSetException("Please set membership fields in views")
+
+        if not self.parent.objects.untranslated().filter(id=pk).exists():
+            raise Http404
+        query = Q()
+        for field in self.membership_fields:
+            query |= Q(**{field: pk})
+        memberships = Membership.objects.untranslated().filter(query)
+        memberships = filter_active(Membership, memberships, request.query_params)
+        entities = self.entity.objects.untranslated().filter(id__in=memberships.values("person_id"))
+        page = self.paginator.paginate_queryset(entities, request, view=self)
+        not_modified = self.check_page_not_modified(request, page)
+        if not_modified:
+            return not_modified
+        serializer = self.serializer(page, language=language, many=True)
+        return self.paginator.get_paginated_response(serializer.data)
+
+
 class BasePopitDetailUpdateView(BasePopitView):
     def get_object(self, pk, language=None):
         if not self.entity:
@@ -78,10 +165,30 @@ class BasePopitDetailUpdateView(BasePopitView):
             raise Http404
 
     def get(self, request, language, pk, format=True):
+        entity_name = node_name(self.entity)
+        document = cache.get_document(entity_name, pk, language)
+        if document is not None:
+            # Document is dropped whenever a row in it change, so are its validators
+            not_modified = self.check_not_modified(request, document["state"])
+            if not_modified:
+                return not_modified
+            return Response(document["data"])
+
         instance = self.get_object(pk)
+        state = None
+        if conditional.is_conditional(request):
+            state = conditional.instances_state([instance])
+            not_modified = self.check_not_modified(request, state)
+            if not_modified:
+                return not_modified
+        prefetch_entities([instance], language)
+        if state is None:
+            state = conditional.prefetched_state([instance])
+            self.check_not_modified(request, state)
 
         serializer = self.serializer(instance, language=language)
         data = { "result": serializer.data }
+        cache.set_document(entity_name, pk, language, {"data": data, "state": state})
         return Response(data)
 
     def put(self, request, language, pk, format=True):
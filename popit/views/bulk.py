@@ -0,0 +1,168 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import ParseError
+from rest_framework.response import Response
+from popit.models import Person
+from popit.models import Organization
+from popit.models import Post
+from popit.models import Membership
+from popit.serializers import PersonSerializer
+from popit.serializers import OrganizationSerializer
+from popit.serializers import PostSerializer
+from popit.serializers import MembershipSerializer
+from popit.serializers.bulk import BulkWriter
+from popit.serializers.bulk import load_references
+from popit.views.base import BasePopitView
+
+
+# Not in rest_framework.status yet
+HTTP_207_MULTI_STATUS = 207
+
+BULK_ENTITIES = {
+    "persons": (Person, PersonSerializer),
+    "organizations": (Organization, OrganizationSerializer),
+    "posts": (Post, PostSerializer),
+    "memberships": (Membership, MembershipSerializer),
+}
+
+
+class BulkView(BasePopitView):
+    """
+    Create (POST) or update (PUT) many entities of a type at once from a list of the same data the single entity
+    endpoints take. Items are checked together, valid items are written in one transaction and reindexed with one
+    job. The result for each item is at the same position in the response, either the id or the errors. Status is
+    201 or 200 when every item is written, 207 when only some are, 400 when none is.
+    """
+
+    def get_items(self, request, entity):
+        if entity not in BULK_ENTITIES:
+            raise NotFound("%s cannot be written in bulk" % entity)
+        items = request.data
+        if not isinstance(items, list):
+            raise ParseError("Expect a list of %s" % entity)
+        if len(items) > settings.BULK_MAX_SIZE:
+            raise ParseError("At most %s %s at a time" % (settings.BULK_MAX_SIZE, entity))
+        return items
+
+    def post(self, request, language, entity, format=None):
+        items = self.get_items(request, entity)
+        model, serializer_class = BULK_ENTITIES[entity]
+        results = [None] * len(items)
+
+        ids = [item.get("id") for item in items if isinstance(item, dict) and item.get("id")]
+        existing = set(model.objects.untranslated().filter(id__in=ids).values_list("id", flat=True))
+        seen = set()
+
+        writer = BulkWriter(batch_size=settings.BULK_BATCH_SIZE)
+        context = {"references": load_references(model, items), "writer": writer}
+        serializers = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {"errors": {"non_field_errors": ["Expect an object"]}}
+                continue
+            entity_id = item.get("id")
+            if entity_id and (entity_id in existing or entity_id in seen):
+                results[index] = {"errors": {"id": ["%s %s already exist" % (model.__name__, entity_id)]}}
+                continue
+            seen.add(entity_id)
+
+            serializer = serializer_class(data=item, language=language, context=context)
+            if serializer.is_valid():
+                serializers.append((index, serializer))
+            else:
+                results[index] = {"errors": serializer.errors}
+
+        with transaction.atomic():
+            # Rows each item added to writer, from its savepoint to the next
+            spans = []
+            for index, serializer in serializers:
+                savepoint = writer.savepoint()
+                try:
+                    instance = serializer.save()
+                except DjangoValidationError as error:
+                    writer.rollback(savepoint)
+                    results[index] = {"errors": error.message_dict}
+                    continue
+                results[index] = {"id": instance.id}
+                spans.append((index, savepoint, writer.savepoint()))
+            self.flush(writer, spans, results)
+
+        return self.bulk_response(results, status.HTTP_201_CREATED)
+
+    def flush(self, writer, spans, results):
+        """
+        Insert the rows of writer. Rows are only inserted here, so an IntegrityError, i.e an id inserted by someone
+        else since it was checked, is not from any item in particular. Then each item is inserted on its own to find
+        which ones clash, the others are still written.
+        """
+        rows = list(writer.rows)
+        try:
+            with transaction.atomic():
+                writer.flush()
+            return
+        except IntegrityError:
+            pass
+
+        for index, start, end in spans:
+            item_writer = BulkWriter(batch_size=writer.batch_size, rows=rows[start:end])
+            try:
+                with transaction.atomic():
+                    item_writer.flush()
+            except IntegrityError as error:
+                results[index] = {"errors": {"non_field_errors": ["Cannot be written, %s" % error]}}
+
+    def put(self, request, language, entity, format=None):
+        items = self.get_items(request, entity)
+        model, serializer_class = BULK_ENTITIES[entity]
+        results = [None] * len(items)
+
+        # Entity already translated to language are loaded in it, the rest get a new translation on update
+        ids = [item.get("id") for item in items if isinstance(item, dict) and item.get("id")]
+        instances = dict((instance.id, instance) for instance in model.objects.language(language).filter(id__in=ids))
+        missing = [entity_id for entity_id in ids if entity_id not in instances]
+        instances.update(model.objects.untranslated().in_bulk(missing))
+
+        context = {"references": load_references(model, items, instances.values())}
+        serializers = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not item.get("id"):
+                results[index] = {"errors": {"id": ["Need an id to update"]}}
+                continue
+            instance = instances.get(item["id"])
+            if instance is None:
+                results[index] = {"errors": {"id": ["%s %s does not exist" % (model.__name__, item["id"])]}}
+                continue
+
+            serializer = serializer_class(instance, data=item, language=language, partial=True, context=context)
+            if serializer.is_valid():
+                serializers.append((index, serializer))
+            else:
+                results[index] = {"errors": serializer.errors}
+
+        # Not through BulkWriter, it only insert. An update is written as it is saved, new children of an entity are
+        # already inserted together, so a savepoint is what undo an item that failed half way.
+        with transaction.atomic():
+            for index, serializer in serializers:
+                try:
+                    with transaction.atomic():
+                        instance = serializer.save()
+                except DjangoValidationError as error:
+                    results[index] = {"errors": error.message_dict}
+                    continue
+                results[index] = {"id": instance.id}
+
+        return self.bulk_response(results, status.HTTP_200_OK)
+
+    def bulk_response(self, results, success_status):
+        failed = len([result for result in results if "errors" in result])
+        if not failed:
+            response_status = success_status
+        elif failed == len(results):
+            response_status = status.HTTP_400_BAD_REQUEST
+        else:
+            response_status = HTTP_207_MULTI_STATUS
+        return Response({"results": results}, status=response_status)
@@ -0,0 +1,46 @@
+import datetime
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ParseError
+from popit.documents import DOCUMENT_LOOKUPS
+from popit.documents import embedding_query
+from popit.documents import lookup_tree
+
+
+# What changed since a time. An entity changed when a row rendered in its document did, that is the entity itself,
+# or anything embedded in it, found with the same lookups as conditional.collect_rows but walking up instead of down.
+# Deleted embedded rows touch their owner, deleted entities leave a Tombstone, see popit.signals.handlers.
+def parse_updated_since(value):
+    # Accept a date or a datetime, without timezone it is UTC
+    try:
+        updated_since = parse_datetime(value)
+        if updated_since is None:
+            date = parse_date(value)
+            if date:
+                updated_since = datetime.datetime.combine(date, datetime.time.min)
+    except ValueError:
+        updated_since = None
+    if updated_since is None:
+        raise ParseError("updated_since need to be an ISO 8601 date or datetime, e.g 2016-02-01T00:00:00Z")
+    if timezone.is_naive(updated_since):
+        updated_since = timezone.make_aware(updated_since, timezone.utc)
+    return updated_since
+
+
+def changed_query(model, since, tree):
+    # One subquery per relation, each on the indexed updated_at of the related table
+    return embedding_query(model, tree, lambda related: Q(updated_at__gte=since))
+
+
+def filter_updated_since(model, queryset, value):
+    """
+    Keep the entities of queryset with something in their document changed since value, an ISO 8601 date or
+    datetime. value is from the updated_since query parameter, nothing is filtered when it is empty.
+    """
+    if not value:
+        return queryset
+    since = parse_updated_since(value)
+    tree = lookup_tree(model, DOCUMENT_LOOKUPS.get(model, ()))
+    return queryset.filter(changed_query(model, since, tree))
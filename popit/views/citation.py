@@ -1,4 +1,5 @@
 from popit.views.base import BasePopitView
+from popit.views import conditional
 from popit.serializers import LinkSerializer
 from popit.models import Link
 from popit.models import Person
@@ -9,7 +10,11 @@ from popit.models import OtherName
 from popit.models import Identifier
 from popit.models import ContactDetail
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import ParseError
 from django.http import Http404
+from popit import coverage
+from popit import dates
 from rest_framework import status
 from popit.serializers.exceptions import ParentNotSetException
 from popit.serializers.exceptions import ChildNotSetException
@@ -25,6 +30,9 @@ class BaseCitationListCreateView(BasePopitView):
         instance = self.entity.objects.language(language).get(id=pk)
         citations = instance.links.untranslated().filter(field=field)
         page = self.paginator.paginate_queryset(citations, request, view=self)
+        not_modified = self.check_page_not_modified(request, page)
+        if not_modified:
+            return not_modified
 
         serializer = self.serializer(page, language=language, many=True)
 
@@ -65,6 +73,9 @@ class BaseCitationDetailView(BasePopitView):
 
     def get(self, request, language, parent, field, pk):
         citations = self.get_object(parent, field, pk, language)
+        not_modified = self.check_instances_not_modified(request, [citations])
+        if not_modified:
+            return not_modified
         serializer = self.serializer(instance=citations, language=language)
         data = {"result": serializer.data}
         return Response(data)
@@ -112,6 +123,9 @@ class BaseSubItemCitationListView(BasePopitView):
     def get(self, request, language, parent_pk, child_pk, field):
         citations = self.get_citations(parent_pk, child_pk, field, language)
         page = self.paginator.paginate_queryset(citations, request, view=self)
+        not_modified = self.check_page_not_modified(request, page)
+        if not_modified:
+            return not_modified
         serializer = self.serializer(page, language=language, many=True)
         return self.paginator.get_paginated_response(serializer.data)
 
@@ -186,6 +200,9 @@ class BaseSubItemCitationDetailView(BasePopitView):
 
     def get(self, requests, language, parent_pk, child_pk, field, link_id):
         citations = self.get_citations(parent_pk, child_pk, field, link_id, language)
+        not_modified = self.check_instances_not_modified(requests, [citations])
+        if not_modified:
+            return not_modified
         serializer = self.serializer(citations, language=language)
         result = { "result": serializer.data }
         return Response(result)
@@ -241,33 +258,39 @@ class GenericContactDetailCitationDetailView(BaseSubItemCitationDetailView):
             raise Http404
 
 
+def group_citations(instance, fields, language):
+    """
+    {field: [citation, ...]} for each of fields of instance. Links of every field are loaded with their translation
+    and serialized at once, then grouped by field, instead of a query per field.
+    """
+    links = list(instance.links.untranslated().filter(field__in=fields).prefetch_related("translation"))
+    citations = LinkSerializer(links, language=language, many=True).data
+    data = dict((field, []) for field in fields)
+    for link, citation in zip(links, citations):
+        data[link.field].append(citation)
+    return data
+
+
 # This is a view only view to see which field have citations. No create/update/delete
 class BaseFieldCitationView(BasePopitView):
 
     serializer = LinkSerializer
 
     def get_citations(self, pk, language):
-        data = {}
         instance = self.entity.objects.language(language).get(id=pk)
-        for field in instance._meta.fields:
-            # I don't care about id, and yes it is hardcoded I don't care!
-            if field.attname == "id":
-                continue
-            temp = instance.links.filter(field=field.attname)
-            citations = LinkSerializer(temp, language=language, many=True)
-            data[field.attname] = citations.data
-
+        # I don't care about id, and yes it is hardcoded I don't care!
+        derived = dates.bound_fields(self.entity)
+        fields = [field.attname for field in instance._meta.fields
+                  if field.attname != "id" and field.attname not in derived]
         # Turns out that in hvad translated field is in another db. Which is cool then we can add more language without alter table!!
-        for field in instance._translated_field_names:
-            # I don't care about id, and yes it is hardcoded I don't care!
-            if field == "master_id" or field == "id":
-                continue
-            temp = instance.links.filter(field=field)
-            citations = LinkSerializer(temp, language=language, many=True)
-            data[field] = citations.data
-        return data
+        fields.extend(field for field in instance._translated_field_names if field not in ("master_id", "id"))
+        return group_citations(instance, fields, language)
 
     def get(self, request, language, pk):
+        # Only links of the entity are rendered, the entity itself is there so that a missing entity is not fresh
+        not_modified = self.check_not_modified(request, conditional.entity_state(self.entity, [pk], ("links",)))
+        if not_modified:
+            return not_modified
         citations = self.get_citations(pk, language)
         data = {"result": citations}
         return Response(data)
@@ -288,19 +311,18 @@ class BaseSubItemFieldCitationView(BasePopitView):
     def get_citations(self, parent_pk, child_pk, language):
         parent = self.get_parent(parent_pk, language)
         child = self.get_child(parent, child_pk, language)
-        data = {}
-        for field in child._meta.fields:
-            if field.attname == "content_object":
-                continue
-            temp = child.links.filter(field=field.attname)
-            citation = LinkSerializer(temp, language=language, many=True)
-            data[field.attname] = citation.data
-        return data
+        derived = dates.bound_fields(child.__class__)
+        fields = [field.attname for field in child._meta.fields
+                  if field.attname != "content_object" and field.attname not in derived]
+        return group_citations(child, fields, language)
 
     def get_child(self, parent, child_pk, language):
         raise NotImplemented
 
     def get(self, request, language, parent_pk, child_pk):
+        not_modified = self.check_not_modified(request, conditional.entity_state(self.entity, [child_pk], ("links",)))
+        if not_modified:
+            return not_modified
         citations = self.get_citations(parent_pk, child_pk, language)
         result = { "result": citations }
         return Response(result)
@@ -336,4 +358,50 @@ class GenericContactDetailFieldCitationView(BaseSubItemFieldCitationView):
             child = parent.contact_details.language(language).get(id=child_pk)
             return child
         except self.entity.DoesNotExist:
-            raise Http404
\ No newline at end of file
+            raise Http404
+
+COVERAGE_ENTITIES = {
+    "persons": Person,
+    "organizations": Organization,
+    "posts": Post,
+    "memberships": Membership,
+}
+
+
+class CitationCoverageView(BasePopitView):
+    """
+    Cited and uncited fields of each entity of a type, from the citation coverage index. cited and uncited are comma
+    separated fields, they keep entities with a citation for every one of them, and for none of them. summary is the
+    number of entities with a citation for each field.
+    """
+
+    def get_fields(self, request, name):
+        value = request.query_params.get(name, "")
+        return [field.strip() for field in value.split(",") if field.strip()]
+
+    def get(self, request, language, entity, format=None):
+        if entity not in COVERAGE_ENTITIES:
+            raise NotFound("No citation coverage for %s" % entity)
+        model = COVERAGE_ENTITIES[entity]
+
+        entities = model.objects.untranslated().order_by("created_at", "id")
+        try:
+            entities = coverage.filter_cited(model, entities, self.get_fields(request, "cited"),
+                                             self.get_fields(request, "uncited"))
+        except ValueError as error:
+            raise ParseError(str(error))
+
+        page = self.paginator.paginate_queryset(entities, request, view=self)
+        bitmaps = coverage.entity_bitmaps(model, [instance.id for instance in page])
+        fields = coverage.citation_fields(model)
+        data = []
+        for instance in page:
+            cited = coverage.cited_fields(model, bitmaps.get(instance.id, 0))
+            data.append({
+                "id": instance.id,
+                "cited": cited,
+                "uncited": [field for field in fields if field not in cited],
+            })
+        response = self.paginator.get_paginated_response(data)
+        response.data["summary"] = coverage.field_counts(model)
+        return response
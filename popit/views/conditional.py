@@ -0,0 +1,155 @@
+import calendar
+import hashlib
+from django.contrib.contenttypes.fields import GenericRelation
+from django.contrib.contenttypes.models import ContentType
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.http import quote_etag
+from popit.documents import DOCUMENT_LOOKUPS
+from popit.documents import lookup_tree
+
+
+# ETag and Last-Modified of a response are computed from updated_at and the number of every row rendered in it,
+# without serializing anything. Rows are found with the same lookups the serializers are prefetched with, one query
+# per relation. The count is there so that a deleted child change the ETag too. Without If-None-Match or
+# If-Modified-Since they are computed after serializing instead, from the rows prefetched for it.
+def collect_rows(model, filters, tree, rows):
+    fields = dict((name, model._meta.get_field(name)) for name in tree)
+    foreign_keys = [field for field in fields.values() if field.many_to_one and field.concrete]
+    columns = ["id", "updated_at"] + [field.attname for field in foreign_keys]
+    result = list(model.objects.filter(**filters).values_list(*columns))
+    if not result:
+        return
+
+    ids = []
+    for row in result:
+        rows.add((model._meta.label, row[0], row[1]))
+        ids.append(row[0])
+
+    for name, subtree in tree.items():
+        field = fields[name]
+        if field.many_to_one and field.concrete:
+            index = columns.index(field.attname)
+            related_ids = set(row[index] for row in result if row[index])
+            if related_ids:
+                collect_rows(field.related_model, {"id__in": related_ids}, subtree, rows)
+        elif isinstance(field, GenericRelation):
+            filters = {
+                field.content_type_field_name: ContentType.objects.get_for_model(model),
+                field.object_id_field_name + "__in": ids,
+            }
+            collect_rows(field.related_model, filters, subtree, rows)
+        else:
+            # Reverse foreign key, i.e memberships of a person
+            collect_rows(field.related_model, {field.field.name + "__in": ids}, subtree, rows)
+
+
+def entity_state(model, ids, lookups=None):
+    """
+    Return the number of rows rendered with the entities of model in ids, and the last time one of them changed as
+    a timestamp. Rows are found with lookups, by default what the entity serializer render.
+    """
+    if lookups is None:
+        lookups = DOCUMENT_LOOKUPS.get(model, ())
+    rows = set()
+    collect_rows(model, {"id__in": list(ids)}, lookup_tree(model, lookups), rows)
+    return rows_state(rows)
+
+
+def instances_state(instances):
+    # Same as entity_state, instances can be of different entity
+    grouped = {}
+    for instance in instances:
+        grouped.setdefault(instance.__class__, []).append(instance.id)
+
+    rows = set()
+    for model, ids in grouped.items():
+        collect_rows(model, {"id__in": ids}, lookup_tree(model, DOCUMENT_LOOKUPS.get(model, ())), rows)
+    return rows_state(rows)
+
+
+def collect_prefetched(model, instances, tree, rows):
+    # Same rows as collect_rows, read from what is prefetched to serialize instances. What is not, is queried.
+    for instance in instances:
+        rows.add((model._meta.label, instance.id, instance.updated_at))
+
+    for name, subtree in tree.items():
+        field = model._meta.get_field(name)
+        if field.many_to_one and field.concrete:
+            related = []
+            missing = set()
+            for instance in instances:
+                if hasattr(instance, field.get_cache_name()):
+                    if getattr(instance, name) is not None:
+                        related.append(getattr(instance, name))
+                elif getattr(instance, field.attname):
+                    missing.add(getattr(instance, field.attname))
+            collect_prefetched(field.related_model, related, subtree, rows)
+            if missing:
+                collect_rows(field.related_model, {"id__in": missing}, subtree, rows)
+        else:
+            children = []
+            missing = []
+            for instance in instances:
+                if name in getattr(instance, "_prefetched_objects_cache", {}):
+                    children.extend(getattr(instance, name).all())
+                else:
+                    missing.append(instance.id)
+            collect_prefetched(field.related_model, children, subtree, rows)
+            if missing:
+                collect_rows(model, {"id__in": missing}, {name: subtree}, rows)
+
+
+def prefetched_state(instances):
+    """
+    Same as instances_state, once instances are prefetched to be serialized. Nothing that is prefetched is queried
+    again, which is all of it for an entity.
+    """
+    grouped = {}
+    for instance in instances:
+        grouped.setdefault(instance.__class__, []).append(instance)
+
+    rows = set()
+    for model, model_instances in grouped.items():
+        collect_prefetched(model, model_instances, lookup_tree(model, DOCUMENT_LOOKUPS.get(model, ())), rows)
+    return rows_state(rows)
+
+
+def rows_state(rows):
+    last_modified = None
+    if rows:
+        updated_at = max(row[2] for row in rows)
+        last_modified = calendar.timegm(updated_at.utctimetuple()) + updated_at.microsecond / 1e6
+    return len(rows), last_modified
+
+
+def get_validators(request, state, *extra):
+    """
+    Return ETag and Last-Modified for state. Anything else the response depends on, i.e total of a list, goes into
+    extra.
+    """
+    count, last_modified = state
+    renderer = getattr(request, "accepted_renderer", None)
+    parts = [getattr(renderer, "format", ""), count, repr(last_modified)] + list(extra)
+    etag = hashlib.md5(":".join(unicode(part) for part in parts).encode("utf-8")).hexdigest()
+    if last_modified is not None:
+        last_modified = int(last_modified)
+    return etag, last_modified
+
+
+def is_conditional(request):
+    # Validators are only worth a query per relation before serializing when there is a client copy to compare with
+    return "HTTP_IF_NONE_MATCH" in request.META or "HTTP_IF_MODIFIED_SINCE" in request.META
+
+
+def not_modified(request, validators):
+    # None when the client copy is stale, or it does not have one
+    etag, last_modified = validators
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, validators):
+    etag, last_modified = validators
+    response["ETag"] = quote_etag(etag)
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
@@ -0,0 +1,53 @@
+import json
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.encoders import JSONEncoder
+from popit.models import Person
+from popit.models import Organization
+from popit.models import Post
+from popit.models import Membership
+from popit.models import Area
+from popit.serializers import PersonSerializer
+from popit.serializers import OrganizationSerializer
+from popit.serializers import PostSerializer
+from popit.serializers import MembershipSerializer
+from popit.serializers import AreaSerializer
+from popit.serializers.prefetch import iter_chunks
+from popit.views.base import BasePopitView
+from popit.views.changes import filter_updated_since
+
+
+EXPORT_ENTITIES = {
+    "persons": (Person, PersonSerializer),
+    "organizations": (Organization, OrganizationSerializer),
+    "posts": (Post, PostSerializer),
+    "memberships": (Membership, MembershipSerializer),
+    "areas": (Area, AreaSerializer),
+}
+
+
+class ExportView(BasePopitView):
+    """
+    Every entity of a type as newline delimited JSON, one document per line, same document as the detail endpoint.
+    Entities are loaded, prefetched and serialized a chunk at a time while the response is sent, so memory use does
+    not grow with the dataset. updated_since limit it to entities with something in their document changed since then.
+    """
+
+    def get(self, request, language, entity, format=None):
+        if entity not in EXPORT_ENTITIES:
+            raise NotFound("%s cannot be exported" % entity)
+        model, serializer = EXPORT_ENTITIES[entity]
+
+        queryset = model.objects.untranslated().all()
+        queryset = filter_updated_since(model, queryset, request.query_params.get("updated_since"))
+
+        return StreamingHttpResponse(self.stream(queryset, serializer, language),
+                                     content_type="application/x-ndjson")
+
+    def stream(self, queryset, serializer, language):
+        for instances in iter_chunks(queryset, settings.EXPORT_CHUNK_SIZE):
+            # List serializer prefetch the whole chunk
+            entities = serializer(instances, language=language, many=True)
+            for data in entities.data:
+                yield json.dumps(data, cls=JSONEncoder) + "\n"
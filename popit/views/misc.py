@@ -19,7 +19,10 @@ from popit.models import Link
 from popit.models import OtherName
 from popit.models import Identifier
 from popit.models import Area
+from popit.models import Tombstone
 from popit.views.base import BasePopitView
+from popit.views.changes import filter_updated_since
+from popit.views.changes import parse_updated_since
 
 # TODO: Actually we can just use getattr to access the child objects. But we need to map of attributes :-/
 
@@ -58,6 +61,9 @@ class GenericParentChildList(BasePopitView):
             raise SerializerNotSetException("Not Serializer Set")
         obj = self.get_query(parent_pk, language)
         page = self.paginator.paginate_queryset(obj, request, view=self)
+        not_modified = self.check_page_not_modified(request, page)
+        if not_modified:
+            return not_modified
         serializer = self.serializer(page, many=True, language=language)
 
         return self.paginator.get_paginated_response(serializer.data)
@@ -137,6 +143,9 @@ class GenericParentChildDetail(BasePopitView):
             raise SerializerNotSetException("No serialization set")
         parent = self.get_parent(parent_pk, language)
         obj = self.get_object(parent, pk)
+        not_modified = self.check_instances_not_modified(request, [obj])
+        if not_modified:
+            return not_modified
         serializer = self.serializer(obj, language=language)
         data = { "result": serializer.data }
         return Response(data)
@@ -230,6 +239,9 @@ class GenericParentChildLinkList(BasePopitView):
         child = self.get_child(parent, pk, language)
         links = child.links.untranslated().all()
         page = self.paginator.paginate_queryset(links, request, view=self)
+        not_modified = self.check_page_not_modified(request, page)
+        if not_modified:
+            return not_modified
 
         serializer = self.serializer(page, many=True, language=language)
         return self.paginator.get_paginated_response(serializer.data)
@@ -301,6 +313,9 @@ class GenericParentChildLinkDetail(BasePopitView):
             link = child.links.language(language).get(id=link_pk)
         except Link.DoesNotExist:
             raise Http404
+        not_modified = self.check_instances_not_modified(request, [link])
+        if not_modified:
+            return not_modified
         serializer = self.serializer(link, language=language)
         data = { "results": serializer.data }
         return Response(data)
@@ -352,7 +367,11 @@ class AreaList(BasePopitView):
 
     def get(self, request, language, format=None):
         areas = Area.objects.untranslated().all()
+        areas = filter_updated_since(Area, areas, request.query_params.get("updated_since"))
         page = self.paginator.paginate_queryset(areas, request, view=self)
+        not_modified = self.check_page_not_modified(request, page)
+        if not_modified:
+            return not_modified
         serializer = AreaSerializer(page, language=language, many=True)
 
         return self.paginator.get_paginated_response(serializer.data)
@@ -365,10 +384,29 @@ class AreaList(BasePopitView):
         return Response(serializer.data, status=status.HTTP_400_BAD_REQUEST)
 
 
-class AreaDetail(APIView):
-    permission_classes = (
-        IsAuthenticatedOrReadOnly,
-    )
+class TombstoneList(BasePopitView):
+    """
+    Entities deleted since updated_since, newest last. entity limit it to one type, i.e persons.
+    """
+
+    def get(self, request, language, format=None):
+        tombstones = Tombstone.objects.all().order_by("created_at", "id")
+        entity = request.query_params.get("entity")
+        if entity:
+            tombstones = tombstones.filter(entity=entity)
+        updated_since = request.query_params.get("updated_since")
+        if updated_since:
+            tombstones = tombstones.filter(created_at__gte=parse_updated_since(updated_since))
+
+        page = self.paginator.paginate_queryset(tombstones, request, view=self)
+        data = [
+            {"entity": tombstone.entity, "id": tombstone.entity_id, "deleted_at": tombstone.created_at}
+            for tombstone in page
+        ]
+        return self.paginator.get_paginated_response(data)
+
+
+class AreaDetail(BasePopitView):
 
     def get_object(self, pk):
         try:
@@ -378,6 +416,9 @@ class AreaDetail(APIView):
 
     def get(self, request, language, pk, format=None):
         area = self.get_object(pk)
+        not_modified = self.check_instances_not_modified(request, [area])
+        if not_modified:
+            return not_modified
         serializer = AreaSerializer(area, language=language)
         data = { "results": serializer.data }
         return Response(data, status=status.HTTP_200_OK)
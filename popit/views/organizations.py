@@ -22,6 +22,7 @@ from popit.views.misc import GenericLinkDetail
 from popit.views.misc import GenericLinkList
 from popit.views.base import BasePopitDetailUpdateView
 from popit.views.base import BasePopitListCreateView
+from popit.views.base import BaseMemberPersonList
 from popit.views.citation import BaseCitationDetailView
 from popit.views.citation import BaseCitationListCreateView
 from popit.views.citation import GenericContactDetailCitationListView
@@ -48,6 +49,13 @@ class OrganizationDetail(BasePopitDetailUpdateView):
     serializer = OrganizationSerializer
 
 
+class OrganizationPersonList(BaseMemberPersonList):
+
+    parent = Organization
+    # Member of the organization, or holding one of its posts
+    membership_fields = ("organization_id", "post__organization_id")
+
+
 # This might be able to make into the constructor
 # If can't, then we should make a factory for this :-/
 class OrganizationContactDetailList(GenericContactDetailList):
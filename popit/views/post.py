@@ -21,6 +21,7 @@ from popit.views.misc import GenericLinkList
 from popit.views.base import BasePopitDetailUpdateView
 from popit.views.base import BasePopitListCreateView
 from popit.views.base import BasePopitView
+from popit.views.base import BaseMemberPersonList
 from popit.views.citation import BaseCitationDetailView
 from popit.views.citation import BaseCitationListCreateView
 from popit.views.citation import GenericContactDetailCitationListView
@@ -44,6 +45,12 @@ class PostDetail(BasePopitDetailUpdateView):
     serializer = PostSerializer
 
 
+class PostPersonList(BaseMemberPersonList):
+
+    parent = Post
+    membership_fields = ("post_id",)
+
+
 class PostContactDetailDetail(GenericContactDetailDetail):
     parent = Post
 
@@ -76,6 +83,9 @@ class PostOtherLabelsDetail(BasePopitView):
 
     def get(self, request, language, parent_pk, pk, format=None):
         other_labels = self.get_object(parent_pk, pk)
+        not_modified = self.check_instances_not_modified(request, [other_labels])
+        if not_modified:
+            return not_modified
         serializer = OtherNameSerializer(other_labels, language=language)
         data = { "results": serializer.data }
         return Response(data)
@@ -112,6 +122,9 @@ class PostOtherLabelsList(BasePopitView):
     def get(self, request, language, parent_pk):
         other_labels = self.get_query(parent_pk)
         page = self.paginator.paginate_queryset(other_labels, request, view=self)
+        not_modified = self.check_page_not_modified(request, page)
+        if not_modified:
+            return not_modified
 
         serializer = OtherNameSerializer(page, many=True, language=language)
         return self.paginator.get_paginated_response(serializer.data)
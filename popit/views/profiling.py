@@ -0,0 +1,23 @@
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from popit import profiling
+from popit.views.base import BasePopitView
+
+
+class ProfilingReport(BasePopitView):
+    """
+    p50, p95 and p99 of each metric collected by ProfilingMiddleware per url name, most expensive first. DELETE
+    drop the samples collected so far. Samples are per process.
+    """
+
+    permission_classes = (
+        IsAdminUser,
+    )
+
+    def get(self, request, format=None):
+        return Response({"results": profiling.recorder.report()})
+
+    def delete(self, request, format=None):
+        profiling.recorder.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
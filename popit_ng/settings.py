@@ -61,6 +61,7 @@ MIDDLEWARE_CLASSES = (
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'popit.middleware.ReindexBatchMiddleware',
 )
 
 ROOT_URLCONF = 'popit_ng.urls'
@@ -146,13 +147,16 @@ REST_FRAMEWORK = {
 ES_HOST = [ "http://localhost:9200", ]
 # Support 1 index for now
 ES_INDEX = "popit"
+# Connection kept open per elasticsearch host, the client is shared in each process
+ES_CONNECTION_POOL_SIZE = 10
 
 CORS_ORIGIN_ALLOW_ALL = False
 CORS_ORIGIN_WHITELIST = ()
 CORS_ORIGIN_REGEX_WHITELIST = (
     '^(https?://)?(\w+\.)?sinarproject\.org$', )
 
-INDEX_PREPARATION_TIME = 0.5
+# Refresh elasticsearch on every single write, so that it is searchable right away. Bulk indexing refresh once instead.
+ES_REFRESH_ON_WRITE = True
 LOG_PATH = os.path.join(BASE_DIR, "log")
 
 if not os.path.exists(LOG_PATH):
@@ -168,6 +172,11 @@ LOGGING = {
             #'filename': '/path/to/django/debug.log',
             'filename': os.path.join(LOG_PATH, "popit.log"),
         },
+        'slow_requests': {
+            'level': 'WARNING',
+            'class': 'logging.FileHandler',
+            'filename': os.path.join(LOG_PATH, "slow_requests.log"),
+        },
     },
     'loggers': {
         'django': {
@@ -175,6 +184,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'popit.profiling': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
 
@@ -187,8 +201,38 @@ CELERY_RESULT_BACKEND = "redis://localhost:6379/1"
 # Where we tell the system how to dispose data
 ES_DATA_BIN = "redis://localhost:6379/2"
 
+# Seconds to wait for more save before reindexing, saves on the same entity within this time are reindexed once
+REINDEX_DEBOUNCE_TIME = 2
+
 MAX_DOC_SIZE = 1000000 * 10 # In bytes, get from sys.getsizeof
 
+# Number of entity loaded and documents sent to elasticsearch at a time during full reindex
+ES_INDEX_CHUNK_SIZE = 500
+
+# Number of entity loaded and serialized at a time by the export endpoint
+EXPORT_CHUNK_SIZE = 100
+
+# Most entity accepted by one bulk write request, and rows per INSERT when writing them
+BULK_MAX_SIZE = 1000
+BULK_BATCH_SIZE = 500
+
+# How long elasticsearch keep a search cursor open between two pages
+ES_SCROLL_TIMEOUT = "1m"
+
+# Rendered detail documents cache, None to disable. popit.cache.LocalMemoryBackend for a single process,
+# popit.cache.RedisBackend when the cache have to be shared between processes.
+RENDER_CACHE_BACKEND = None
+RENDER_CACHE_URL = "redis://localhost:6379/3"
+# Seconds before a cached document expire
+RENDER_CACHE_TIMEOUT = 300
+# Documents kept by the local memory backend, least recently used are dropped first
+RENDER_CACHE_MAX_ENTRIES = 5000
+
+# popit.middleware.ProfilingMiddleware, off unless added to MIDDLEWARE_CLASSES. Samples kept per url name, and
+# seconds after which a request is logged to log/slow_requests.log with its queries, None to log nothing.
+PROFILING_SAMPLE_SIZE = 1000
+PROFILING_SLOW_THRESHOLD = 1.0
+
 try:
     from settings_local import *
 except:
@@ -38,8 +38,12 @@ if "rosetta" in settings.INSTALLED_APPS:
 api_urls = [
     url(r'^api-token-auth/?$', token_view.obtain_auth_token),
     url(r'^rawsearch/?$', GenericRawSearchView.as_view(), name="rawsearch"),
+    url(r'^profiling/?$', ProfilingReport.as_view(), name="profiling"),
     url(r'^advancesearch/(?P<entity>\w+)/?$', AdvanceSearchView.as_view(), name="advance_search"),
     url(r'^(?P<language>\w{2})/search/(?P<index_name>\w+)/?$', GenericSearchView.as_view(), name="search"),
+    url(r'^(?P<language>\w{2})/export/(?P<entity>\w+)/?$', ExportView.as_view(), name="export"),
+    url(r'^(?P<language>\w{2})/bulk/(?P<entity>\w+)/?$', BulkView.as_view(), name="bulk"),
+    url(r'^(?P<language>\w{2})/coverage/(?P<entity>\w+)/?$', CitationCoverageView.as_view(), name="citation-coverage"),
 
     url(r'^(?P<language>\w{2})/posts/(?P<parent_pk>[-\w]+)/contact_details/(?P<child_pk>[-\w]+)/citations/(?P<field>\w+)/(?P<link_id>\w+)/?$',
         PostContactDetailCitationDetailView.as_view(), name="post-contact-detail-citation-detail-view"),
@@ -82,6 +86,7 @@ api_urls = [
     url(r'^(?P<language>\w{2})/posts/(?P<pk>[-\w]+)/citations/?$', PostFieldCitationView.as_view(),
         name="post-citation-field-view"),
 
+    url(r'^(?P<language>\w{2})/posts/(?P<pk>[-\w]+)/persons/?$', PostPersonList.as_view(), name="post-person-list"),
     url(r'^(?P<language>\w{2})/posts/(?P<pk>[-\w]+)/?$', PostDetail.as_view(), name="post-detail"),
     url(r'^(?P<language>\w{2})/posts/?$', PostList.as_view(), name="post-list"),
 
@@ -208,6 +213,8 @@ api_urls = [
     url(r'^(?P<language>\w{2})/organizations/(?P<parent_pk>[-\w]+)/identifiers/?$', OrganizationIdentifierList.as_view(),
         name="organization-identifier-list"),
 
+    url(r'^(?P<language>\w{2})/organizations/(?P<pk>[-\w]+)/persons/?$', OrganizationPersonList.as_view(),
+        name="organization-person-list"),
     url(r'^(?P<language>\w{2})/organizations/(?P<pk>[-\w]+)/?$', OrganizationDetail.as_view(), name="organization-detail"),
     url(r'^(?P<language>\w{2})/organizations/?$', OrganizationList.as_view(), name="organization-list"),
 
@@ -216,6 +223,7 @@ api_urls = [
     url(r'^(?P<language>\w{2})/areas/(?P<parent_pk>[-\w]+)/links/?$', AreaLinkList.as_view(), name="area-link-list"),
     url(r'^(?P<language>\w{2})/areas/(?P<pk>[-\w]+)/?$', AreaDetail.as_view(), name="area-detail"),
     url(r'^(?P<language>\w{2})/areas/?$', AreaList.as_view(), name="area-list"),
+    url(r'^(?P<language>\w{2})/deleted/?$', TombstoneList.as_view(), name="deleted-list"),
 
     url(r'^(?P<language>\w{2})/memberships/(?P<parent>[-\w]+)/citations/(?P<field>\w+)/(?P<pk>[-\w]+)/?$',
         MembershipCitationDetailView.as_view(), name="membership-citation-detail"),
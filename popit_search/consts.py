@@ -21,6 +21,7 @@ ES_MODEL_MAP = {
     "memberships": Membership,
     "identifiers": Identifier,
     "other_names": OtherName,
+    "othernames": OtherName,
     "links": Link,
     "contact_details": ContactDetail,
     "parent": Organization,
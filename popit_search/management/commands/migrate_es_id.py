@@ -0,0 +1,26 @@
+from popit_search.utils.search import migrate_es_ids
+from popit_search.utils import client
+from elasticsearch import helpers
+from django.core.management.base import BaseCommand
+from django.conf import settings
+import logging
+
+logging.getLogger().setLevel(logging.INFO)
+
+
+# Documents used to be indexed with an id generated by elasticsearch, this move them to the (entity, id, language) id
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--index", nargs="?", type=str, default=settings.ES_INDEX)
+        parser.add_argument("--chunk_size", nargs="?", type=int, default=500)
+
+    def handle(self, *args, **options):
+        index = options.get("index")
+        es = client.get_index_client(index)
+        # scan read from a snapshot, so the document we write are not read again
+        hits = helpers.scan(es, index=index)
+        moved, errors = migrate_es_ids(es, hits, index, chunk_size=options.get("chunk_size"))
+        es.indices.refresh(index=index)
+        logging.info("%s documents moved, %s failed" % (moved, len(errors)))
+        for error in errors:
+            logging.warn(error)
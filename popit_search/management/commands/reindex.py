@@ -4,6 +4,7 @@ from popit_search.utils.search import SerializerSearch
 from popit_search.utils.search import SerializerSearchInstanceExist
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
+from django.conf import settings
 from popit.models import *
 from popit.serializers import *
 import time
@@ -31,6 +32,7 @@ class Command(BaseCommand):
         parser.add_argument("--destroy", nargs="?", type=bool, default=True)
         parser.add_argument("--entity", nargs="?", type=str, default="")
         parser.add_argument("--entity_id", nargs="?", type=str, default="")
+        parser.add_argument("--chunk_size", nargs="?", type=int, default=settings.ES_INDEX_CHUNK_SIZE)
 
     def handle(self, *args, **options):
         entity = options.get("entity")
@@ -61,7 +63,6 @@ class Command(BaseCommand):
             logging.info("Nuclear option detected, executing. Thing could take some time")
             remove_popit_index()
 
-        time.sleep(10)
         # Now we add
         if entity:
             if entity_id:
@@ -75,6 +76,14 @@ class Command(BaseCommand):
                         logging.warn("Oops instance exist in db")
                         continue
             else:
-                popit_indexer(entity)
+                self.index_all(entity, options.get("chunk_size"))
         else:
-            popit_indexer(entity)
+            self.index_all(entity, options.get("chunk_size"))
+
+    def index_all(self, entity, chunk_size):
+        report = popit_indexer(entity, chunk_size=chunk_size)
+        for entity_name, result in report.items():
+            seconds = result["seconds"]
+            rate = result["indexed"] / seconds if seconds else 0
+            self.stdout.write("%s: %s indexed, %s errors in %.1fs, %.1f documents/s" % (
+                entity_name, result["indexed"], result["errors"], seconds, rate))
@@ -0,0 +1,11 @@
+from popit_search.utils.dependency import ReindexQueue
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Show how many reindex were coalesced by the reindex queue"
+
+    def handle(self, *args, **options):
+        stats = ReindexQueue().stats()
+        for key in ("received", "coalesced", "flushes", "roots", "nodes", "indexed", "avoided"):
+            self.stdout.write("%s: %s" % (key, stats[key]))
@@ -1,5 +1,8 @@
 from mock import patch
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.conf import settings
 from popit_search.utils import search
 from popit_search.consts import ES_SERIALIZER_MAP
 from popit_search.consts import ES_MODEL_MAP
@@ -65,4 +68,60 @@ class BulkIndexTestCase(TestCase):
         )
 
         self.assertEqual(entry["_op_type"], "index")
-        self.assertFalse("_id" in entry)
\ No newline at end of file
+        self.assertFalse("_id" in entry)
+
+
+class StreamingIndexTestCase(TestCase):
+    fixtures = ["api_request_test_data.yaml"]
+
+    def stream(self, actions):
+        return [(True, action) for action in actions]
+
+    @patch("elasticsearch.helpers.streaming_bulk")
+    @patch("elasticsearch.Elasticsearch")
+    def test_stream_same_documents(self, mock_es, mock_streaming_bulk):
+        streamed = {}
+
+        def streaming_bulk(es, actions, chunk_size, raise_on_error):
+            for action in actions:
+                streamed[action["_id"]] = action
+                yield True, action
+
+        mock_streaming_bulk.side_effect = streaming_bulk
+        progress = []
+        report = search.popit_indexer(chunk_size=2, progress=lambda *args: progress.append(args))
+
+        expected = {}
+        for entity_name in search.INDEX_ENTITIES:
+            for entity in ES_MODEL_MAP[entity_name].objects.language("all").all():
+                es_id = search.get_es_id(entity_name, entity.id, entity.language_code)
+                serializer = ES_SERIALIZER_MAP[entity_name](entity, language=entity.language_code)
+                expected[es_id] = search.sanitize_data(serializer.data)
+            self.assertEqual(report[entity_name]["errors"], 0)
+
+        self.assertEqual(set(streamed), set(expected))
+        for es_id, action in streamed.items():
+            self.assertEqual(action["_op_type"], "index")
+            self.assertEqual(action["_source"], expected[es_id])
+        self.assertEqual(sum(item["indexed"] for item in report.values()), len(expected))
+        self.assertTrue(progress)
+        mock_es.return_value.indices.refresh.assert_called_with(index=settings.ES_INDEX)
+
+    @patch("elasticsearch.helpers.streaming_bulk")
+    @patch("elasticsearch.Elasticsearch")
+    def test_chunk_query_count(self, mock_es, mock_streaming_bulk):
+        mock_streaming_bulk.side_effect = lambda es, actions, **kwargs: self.stream(actions)
+        bulk_indexer = search.BulkIndexer()
+        person = Person.objects.untranslated().get(id="8497ba86-7485-42d2-9596-2ab14520f1f4")
+        with CaptureQueriesContext(connection) as context:
+            bulk_indexer.stream_entity("persons", chunk_size=100)
+        before = len(context.captured_queries)
+
+        for i in range(5):
+            organization = Organization.objects.language("en").create(name="organization %s" % i)
+            Membership.objects.language("en").create(person=person, organization=organization)
+            Link.objects.language("en").create(url="http://sinarproject.org", content_object=person)
+
+        with CaptureQueriesContext(connection) as context:
+            bulk_indexer.stream_entity("persons", chunk_size=100)
+        self.assertEqual(before, len(context.captured_queries))
@@ -4,9 +4,43 @@
 from popit.models import *
 from popit_search.utils import dependency
 from django.test import TestCase
+from django.db import connection
+from django.db import models
+from django.test.utils import CaptureQueriesContext
 from popit_search import consts
 
 
+# The graph builder before it was set based, walking relationship one instance at a time. Kept as the reference for
+# the output, and to compare the query count.
+def instance_build_graph(entity, action):
+    graph = set()
+    graph.add((entity._meta.model_name + "s", entity.id, action))
+
+    for field in entity._meta.get_fields():
+        field_name = field.name
+        if field_name in ("organization", "on_behalf_of", "parent", "person", "post", "content_object"):
+            temp_entity = getattr(entity, field_name)
+            if not isinstance(temp_entity, models.Model):
+                continue
+            if temp_entity:
+                graph.add((temp_entity._meta.model_name + "s", temp_entity.id, "update"))
+
+        elif field_name == "memberships":
+            for temp_entity in getattr(entity, field_name).all():
+                graph.add(("memberships", temp_entity.id, action))
+                graph.add(("persons", temp_entity.person.id, "update"))
+                if temp_entity.organization:
+                    graph.add(("organizations", temp_entity.organization_id, "update"))
+                if temp_entity.post:
+                    graph.add(("posts", temp_entity.post_id, "update"))
+
+        elif field_name in ("posts", "children"):
+            for temp_entity in getattr(entity, field_name).all():
+                graph.add((temp_entity._meta.model_name + "s", temp_entity.id, action))
+
+    return list(graph)
+
+
 class DependencyGraphTestCase(TestCase):
     fixtures = [ "api_request_test_data.yaml" ]
 
@@ -49,4 +83,62 @@ class DependencyGraphTestCase(TestCase):
 
             if membership.post_id:
                 post = ("posts", membership.post_id, "delete")
-                self.assertTrue(post in memory)
\ No newline at end of file
+                self.assertTrue(post in memory)
+
+    def test_same_graph_as_instance_walk(self):
+        # Not area, the instance walk crash on the reverse relation from organization, named organization too
+        for model in (Person, Organization, Post, Membership, Link, ContactDetail, OtherName, Identifier):
+            for instance in model.objects.untranslated().all():
+                for action in ("update", "delete"):
+                    graph = dependency.build_graph(instance, action)
+                    self.assertEqual(len(graph), len(set(graph)))
+                    self.assertEqual(set(graph), set(instance_build_graph(instance, action)))
+
+    def test_area_graph(self):
+        area = Area.objects.untranslated().get(id="640c0f1d-2305-4d17-97fe-6aa59f079cc4")
+        graph = dependency.build_graph(area, "update")
+        self.assertTrue(("areas", area.id, "update") in graph)
+        for child in area.children.all():
+            self.assertTrue(("areas", child.id, "update") in graph)
+
+    def test_multi_root_graph(self):
+        organizations = list(Organization.objects.untranslated().all())
+        expected = set()
+        for organization in organizations:
+            expected.update(dependency.build_graph(organization, "update"))
+
+        roots = [("organizations", organization.id) for organization in organizations]
+        graph = dependency.build_graphs(roots, "update")
+        self.assertEqual(set(graph), expected)
+
+        graph_map = dependency.build_graph_map(roots, "update")
+        for organization in organizations:
+            nodes = graph_map[("organizations", organization.id, "update")]
+            self.assertEqual(nodes, set(dependency.build_graph(organization, "update")))
+
+    def count_graph_queries(self, build, organization_id):
+        organization = Organization.objects.untranslated().get(id=organization_id)
+        with CaptureQueriesContext(connection) as context:
+            graph = build(organization, "update")
+        return len(context.captured_queries), set(graph)
+
+    def test_query_count_benchmark(self):
+        organization_id = "3d62d9ea-0600-4f29-8ce6-f7720fd49aa3"
+        organization = Organization.objects.untranslated().get(id=organization_id)
+        person = Person.objects.untranslated().get(id="8497ba86-7485-42d2-9596-2ab14520f1f4")
+        post = organization.posts.all()[0]
+        before_queries, before_graph = self.count_graph_queries(dependency.build_graph, organization_id)
+        before_instance_queries, graph = self.count_graph_queries(instance_build_graph, organization_id)
+
+        for i in range(20):
+            Membership.objects.language("en").create(person=person, organization=organization, post=post)
+
+        after_queries, after_graph = self.count_graph_queries(dependency.build_graph, organization_id)
+        after_instance_queries, graph = self.count_graph_queries(instance_build_graph, organization_id)
+        self.assertEqual(after_graph, graph)
+        self.assertEqual(len(after_graph), len(before_graph) + 20)
+
+        # Walking instance cost more query for each membership, set based cost the same
+        self.assertEqual(before_queries, after_queries)
+        self.assertTrue(after_instance_queries >= before_instance_queries + 20 * 2)
+        self.assertTrue(after_queries < after_instance_queries)
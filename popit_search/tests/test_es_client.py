@@ -0,0 +1,55 @@
+from mock import patch
+from django.test import TestCase
+from popit_search.utils import client
+from popit_search.utils import search
+
+
+class ElasticsearchClientTestCase(TestCase):
+
+    def setUp(self):
+        client.reset_clients()
+
+    def tearDown(self):
+        client.reset_clients()
+
+    @patch("elasticsearch.Elasticsearch")
+    def test_client_shared(self, mock_es):
+        first = search.SerializerSearch("persons")
+        second = search.SerializerSearch("organizations")
+        bulk_indexer = search.BulkIndexer()
+
+        self.assertEqual(mock_es.call_count, 1)
+        self.assertIs(first.es, second.es)
+        self.assertIs(first.es, bulk_indexer.es)
+
+    @patch("elasticsearch.Elasticsearch")
+    def test_index_bootstrap_once(self, mock_es):
+        instance = mock_es.return_value
+        instance.indices.exists.return_value = False
+        search.SerializerSearch("persons")
+        search.SerializerSearch("persons")
+        search.BulkIndexer()
+
+        self.assertEqual(instance.indices.exists.call_count, 1)
+        self.assertEqual(instance.indices.create.call_count, 1)
+
+    @patch("elasticsearch.Elasticsearch")
+    def test_index_bootstrap_after_delete(self, mock_es):
+        instance = mock_es.return_value
+        s = search.SerializerSearch("persons")
+        s.delete_index()
+        search.SerializerSearch("persons")
+        self.assertEqual(instance.indices.exists.call_count, 2)
+
+    @patch("os.getpid")
+    @patch("elasticsearch.Elasticsearch")
+    def test_new_client_after_fork(self, mock_es, mock_getpid):
+        mock_es.side_effect = lambda **kwargs: object()
+        mock_getpid.return_value = 100
+        parent_client = client.get_client()
+        self.assertIs(parent_client, client.get_client())
+
+        mock_getpid.return_value = 101
+        child_client = client.get_client()
+        self.assertIsNot(parent_client, child_client)
+        self.assertEqual(mock_es.call_count, 2)
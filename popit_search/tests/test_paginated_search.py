@@ -2,6 +2,11 @@ from mock import patch
 from django.test import TestCase
 from django.test import override_settings
 from django.test.client import RequestFactory
+from django.http import QueryDict
+from django.conf import settings
+from elasticsearch.exceptions import NotFoundError
+from rest_framework.exceptions import ParseError
+from urlparse import urlparse
 from popit_search.utils import search
 from popit.models import Person
 from popit.serializers import PersonSerializer
@@ -93,3 +98,45 @@ class PaginatedSearch(TestCase):
         url = s.get_links(request, 5)
         self.assertEqual("http://testserver/en/search/persons/?q=name%3A%E1%80%A1%E1%80%B1%E1%80%AC%E1%80%84%E1%80%BA%2A&page=5", url)
 
+
+    def scroll_result(self, start, end, total):
+        hits = [{"_source": {"id": str(i)}} for i in range(start, end)]
+        return {"_scroll_id": "scroll%s" % start, "hits": {"total": total, "hits": hits}}
+
+    @patch("elasticsearch.Elasticsearch")
+    def test_cursor_search(self, mock_es):
+        instance = mock_es.return_value
+        instance.search.return_value = self.scroll_result(0, 10, 15)
+        instance.scroll.return_value = self.scroll_result(10, 15, 15)
+        s = search.SerializerSearch("persons")
+
+        request = self.factory.get("/en/search/persons/?q=name:joe&cursor=")
+        response = s.paginated_search("name:joe", request, "en")
+        self.assertEqual(instance.search.call_args[1]["scroll"], settings.ES_SCROLL_TIMEOUT)
+        self.assertFalse("from_" in instance.search.call_args[1])
+        self.assertTrue(response.data["has_more"])
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertFalse(instance.clear_scroll.called)
+
+        cursor = QueryDict(urlparse(response.data["next"]).query)["cursor"]
+        request = self.factory.get("/en/search/persons/", {"q": "name:joe", "cursor": cursor})
+        response = s.paginated_search("name:joe", request, "en")
+        self.assertEqual(instance.scroll.call_args[1]["scroll_id"], "scroll0")
+        self.assertEqual([item["id"] for item in response.data["results"]], [str(i) for i in range(10, 15)])
+        self.assertFalse(response.data["has_more"])
+        self.assertEqual(response.data["next"], None)
+        instance.clear_scroll.assert_called_with(scroll_id="scroll10")
+
+    @patch("elasticsearch.Elasticsearch")
+    def test_cursor_expired(self, mock_es):
+        instance = mock_es.return_value
+        instance.scroll.side_effect = NotFoundError(404, "search_context_missing_exception")
+        s = search.SerializerSearch("persons")
+        request = self.factory.get("/en/search/persons/", {"q": "name:joe", "cursor": s.encode_cursor("old", 10)})
+        self.assertRaises(ParseError, s.paginated_search, "name:joe", request, "en")
+
+    @patch("elasticsearch.Elasticsearch")
+    def test_invalid_cursor(self, mock_es):
+        s = search.SerializerSearch("persons")
+        request = self.factory.get("/en/search/persons/", {"q": "name:joe", "cursor": "notacursor"})
+        self.assertRaises(ParseError, s.paginated_search, "name:joe", request, "en")
@@ -0,0 +1,94 @@
+from mock import patch
+from mock import MagicMock
+from popit.models import *
+from popit.tests.base_testcase import BasePopitTestCase
+from popit.signals.handlers import entity_save_handler
+from popit.tasks import flush_reindex_queue
+from popit.tasks import reindex_entities
+from popit_search.utils import dependency
+from popit_search.consts import ES_SERIALIZER_MAP
+
+
+class ReindexQueueTestCase(BasePopitTestCase):
+
+    def test_mark_schedule_once(self):
+        store = MagicMock()
+        pipe = store.pipeline.return_value
+        queue = dependency.ReindexQueue(store)
+
+        pipe.execute.return_value = [1, True, 1]
+        self.assertTrue(queue.mark("persons", "8497ba86-7485-42d2-9596-2ab14520f1f4"))
+        self.assertFalse(store.hincrby.called)
+
+        # Same entity again, before the flush
+        pipe.execute.return_value = [0, None, 2]
+        self.assertFalse(queue.mark("persons", "8497ba86-7485-42d2-9596-2ab14520f1f4"))
+        store.hincrby.assert_called_with(queue.metrics_key, "coalesced", 1)
+
+    def test_stats(self):
+        store = MagicMock()
+        store.hgetall.return_value = {"received": "10", "coalesced": "6", "flushes": "1", "roots": "4",
+                                      "nodes": "12", "indexed": "5"}
+        queue = dependency.ReindexQueue(store)
+        stats = queue.stats()
+        self.assertEqual(stats["received"], 10)
+        self.assertEqual(stats["avoided"], 13)
+
+    @patch("django.db.transaction.on_commit")
+    @patch("popit.signals.handlers.flush_reindex_queue")
+    @patch("popit_search.utils.dependency.ReindexQueue")
+    def test_save_handler_schedule_flush(self, mock_queue, mock_flush, mock_on_commit):
+        person = Person.objects.language("en").get(id="8497ba86-7485-42d2-9596-2ab14520f1f4")
+        mock_queue.return_value.mark.side_effect = [True, False, False]
+        for i in range(3):
+            entity_save_handler(Person, person, False, False, "default", None)
+        # Nothing is queued before commit
+        self.assertFalse(mock_queue.return_value.mark.called)
+
+        for call in mock_on_commit.call_args_list:
+            call[0][0]()
+        self.assertEqual(mock_queue.return_value.mark.call_count, 3)
+        self.assertEqual(mock_flush.apply_async.call_count, 1)
+
+    @patch("popit_search.utils.search.BulkIndexer")
+    @patch("popit_search.utils.dependency.ReindexQueue")
+    def test_flush_deduplicate(self, mock_queue, mock_indexer):
+        person = Person.objects.language("en").get(id="8497ba86-7485-42d2-9596-2ab14520f1f4")
+        contact = ContactDetail.objects.language("en").create(type="email", value="test@sinarproject.org",
+                                                               content_object=person)
+        link = Link.objects.language("en").create(url="http://sinarproject.org", content_object=person)
+        mock_queue.return_value.take.return_value = [
+            ("persons", person.id), ("contactdetails", contact.id), ("links", link.id)
+        ]
+        flush_reindex_queue()
+
+        self.assertEqual(mock_indexer.return_value.index_data.call_count, 1)
+        graph = mock_indexer.return_value.index_data.call_args[0][0]
+        self.assertEqual(len(graph), len(set(graph)))
+        self.assertTrue(("persons", person.id, "update") in graph)
+        for entity, entity_id, action in graph:
+            self.assertTrue(entity in ES_SERIALIZER_MAP)
+
+        roots, nodes, indexed = mock_queue.return_value.record_flush.call_args[0]
+        self.assertEqual(roots, 3)
+        self.assertEqual(indexed, len(graph))
+        self.assertTrue(nodes > indexed)
+
+    @patch("popit_search.utils.search.SerializerSearch")
+    @patch("popit_search.utils.search.BulkIndexer")
+    @patch("popit_search.utils.dependency.ReindexQueue")
+    def test_reindex_deleted(self, mock_queue, mock_indexer, mock_search):
+        graph = [
+            ["persons", "deleted_person", "delete"],
+            ["memberships", "b351cdc2-6961-4fc7-9d61-08fca66e1d44", "delete"],
+            ["organizations", "3d62d9ea-0600-4f29-8ce6-f7720fd49aa3", "update"],
+        ]
+        reindex_entities([], [["persons", "deleted_person"]], graph)
+
+        mock_search.assert_called_with("persons")
+        mock_search.return_value.delete_by_id.assert_called_with("deleted_person")
+        graph = mock_indexer.return_value.index_data.call_args[0][0]
+        self.assertEqual(set(graph), set([
+            ("memberships", "b351cdc2-6961-4fc7-9d61-08fca66e1d44", "delete"),
+            ("organizations", "3d62d9ea-0600-4f29-8ce6-f7720fd49aa3", "update"),
+        ]))
@@ -4,6 +4,8 @@ from popit_search.utils import search
 from popit.models import Person
 from popit.serializers import PersonSerializer
 from mock import patch
+from elasticsearch.exceptions import ConflictError
+import time
 
 
 # I really don't like the idea of testing implementation
@@ -28,7 +30,10 @@ class SearchUtilTestCase(TestCase):
         serializer = PersonSerializer(person)
         result = popit_search.add(person, PersonSerializer)
         data=popit_search.sanitize_data(serializer.data)
-        instance.index.assert_called_with(index=popit_search.index, doc_type=popit_search.doc_type, body=data)
+        es_id = search.get_es_id("persons", person.id, "en")
+        instance.index.assert_called_with(index=popit_search.index, doc_type=popit_search.doc_type, id=es_id,
+                                          body=data, op_type="create", refresh=True)
+        self.assertFalse(instance.search.called)
 
     @patch("elasticsearch.Elasticsearch")
     def test_search_person(self, mock_es):
@@ -78,8 +83,9 @@ class SearchUtilTestCase(TestCase):
         person.save()
         result = popit_search.update(person, PersonSerializer)
         data = popit_search.sanitize_data(serializer.data)
-        instance.update.assert_called_with(index=popit_search.index, doc_type=popit_search.doc_type, id="random_key",
-                                           body={"doc":data})
+        es_id = search.get_es_id("persons", person.id, "en")
+        instance.update.assert_called_with(index=popit_search.index, doc_type=popit_search.doc_type, id=es_id,
+                                           body={"doc":data}, refresh=True)
 
     @patch("elasticsearch.Elasticsearch")
     def test_delete_person_search(self, mock_es):
@@ -104,7 +110,11 @@ class SearchUtilTestCase(TestCase):
         person = Person.objects.language('en').get(id='ab1a5788e5bae955c048748fa6af0e97')
 
         popit_search.delete(person)
-        instance.delete.assert_called_with(index=popit_search.index, doc_type=popit_search.doc_type, id="random_key")
+        for language_code in ("en", "ms"):
+            es_id = search.get_es_id("persons", person.id, language_code)
+            instance.delete.assert_any_call(index=popit_search.index, doc_type=popit_search.doc_type, id=es_id,
+                                            refresh=True)
+        self.assertFalse(instance.search.called)
 
     @patch("elasticsearch.Elasticsearch")
     def test_sanitize_data(self, mock_es):
@@ -132,3 +142,105 @@ class SearchUtilTestCase(TestCase):
         self.assertEqual(output["birth_date"], "1999-01-01T000000")
         self.assertEqual(output["contact_details"][0]["valid_from"], "1999-01-01T000000")
         self.assertEqual(output["other_names"][0]["start_date"], "2000-01-01T000000")
+
+    @patch("elasticsearch.Elasticsearch")
+    def test_sanitize_partial_date(self, mock_es):
+        data = {"birth_date": "1850-03", "death_date": None, "memberships": [{"start_date": "2010-02-03"}]}
+        output = search.sanitize_data(data)
+        self.assertEqual(output["birth_date"], "1850-03-01T000000")
+        self.assertEqual(output["death_date"], None)
+        self.assertEqual(output["memberships"][0]["start_date"], "2010-02-03T000000")
+
+    @patch("elasticsearch.Elasticsearch")
+    def test_index_does_not_wait(self, mock_es):
+        instance = mock_es.return_value
+        instance.search.return_value = {
+            "hits": {
+                "hits": []
+            }
+        }
+        popit_search = search.SerializerSearch("persons", index="test_popit")
+        persons = Person.objects.language("en").all()
+        start = time.time()
+        for person in persons:
+            popit_search.add(person, PersonSerializer)
+        elapsed = time.time() - start
+        # Used to sleep 0.5 second after each document
+        self.assertEqual(instance.index.call_count, len(persons))
+        self.assertLess(elapsed, len(persons) * 0.5)
+
+    @patch("elasticsearch.Elasticsearch")
+    def test_batch_refresh(self, mock_es):
+        instance = mock_es.return_value
+        instance.search.return_value = {
+            "hits": {
+                "hits": []
+            }
+        }
+        popit_search = search.SerializerSearch("persons", index="test_popit", refresh=False)
+        for person in Person.objects.language("en").all():
+            popit_search.add(person, PersonSerializer)
+        self.assertFalse(instance.indices.refresh.called)
+        self.assertEqual(instance.index.call_args[1]["refresh"], False)
+
+        popit_search.refresh()
+        instance.indices.refresh.assert_called_once_with(index="test_popit")
+
+    @patch("elasticsearch.Elasticsearch")
+    def test_upsert_person(self, mock_es):
+        instance = mock_es.return_value
+        popit_search = search.SerializerSearch("persons", index="test_popit")
+        person = Person.objects.language("ms").get(id="ab1a5788e5bae955c048748fa6af0e97")
+        popit_search.upsert(person, PersonSerializer)
+        data = popit_search.sanitize_data(PersonSerializer(person).data)
+        instance.index.assert_called_once_with(index="test_popit", doc_type="persons",
+                                               id="persons:ab1a5788e5bae955c048748fa6af0e97:ms", body=data,
+                                               refresh=True)
+        self.assertFalse(instance.search.called)
+
+    @patch("elasticsearch.Elasticsearch")
+    def test_add_existing_person(self, mock_es):
+        instance = mock_es.return_value
+        instance.index.side_effect = ConflictError(409, "document_already_exists_exception")
+        popit_search = search.SerializerSearch("persons", index="test_popit")
+        person = Person.objects.language("en").get(id="8497ba86-7485-42d2-9596-2ab14520f1f4")
+        with self.assertRaises(search.SerializerSearchInstanceExist):
+            popit_search.add(person, PersonSerializer)
+
+    def test_es_id_migration_actions(self):
+        hits = [
+            {"_id": "AVXyz", "_type": "persons", "_source": {"id": "8497ba86", "language_code": "en"}},
+            {"_id": "persons:8497ba86:ms", "_type": "persons", "_source": {"id": "8497ba86", "language_code": "ms"}},
+        ]
+        actions = list(search.es_id_migration_actions(hits, "test_popit"))
+        self.assertEqual(len(actions), 1)
+        create, delete = actions[0]
+        self.assertEqual(create["_op_type"], "create")
+        self.assertEqual(create["_id"], "persons:8497ba86:en")
+        self.assertEqual(create["_source"], hits[0]["_source"])
+        self.assertEqual(delete["_op_type"], "delete")
+        self.assertEqual(delete["_id"], "AVXyz")
+
+    @patch("popit_search.utils.search.helpers")
+    def test_migrate_es_ids(self, mock_helpers):
+        hits = [
+            {"_id": "AVXa", "_type": "persons", "_source": {"id": "a", "language_code": "en"}},
+            {"_id": "AVXb", "_type": "persons", "_source": {"id": "b", "language_code": "en"}},
+            {"_id": "AVXc", "_type": "persons", "_source": {"id": "c", "language_code": "en"}},
+        ]
+
+        def streaming_bulk(es, actions, **kwargs):
+            actions = list(actions)
+            self.assertEqual([action["_op_type"] for action in actions], ["create"] * 3)
+            yield True, {"create": {"_id": "persons:a:en", "status": 201}}
+            # Written after deploy, already fresher than the copy
+            yield False, {"create": {"_id": "persons:b:en", "status": 409}}
+            yield False, {"create": {"_id": "persons:c:en", "status": 503}}
+
+        mock_helpers.streaming_bulk.side_effect = streaming_bulk
+        mock_helpers.bulk.return_value = (2, [])
+        moved, errors = search.migrate_es_ids("es", hits, "test_popit")
+        deleted = mock_helpers.bulk.call_args[0][1]
+        self.assertEqual([action["_id"] for action in deleted], ["AVXa", "AVXb"])
+        self.assertEqual(moved, 2)
+        self.assertEqual(errors, [{"create": {"_id": "persons:c:en", "status": 503}}])
@@ -0,0 +1,81 @@
+import elasticsearch
+from elasticsearch import Urllib3HttpConnection
+import logging
+import os
+import threading
+from django.conf import settings
+from popit import profiling
+
+
+# Creating an Elasticsearch client is not free, it comes with its own connection pool, and we used to check the index
+# for every SerializerSearch. Instead every search and index code path share one client per process.
+# The registry is keyed on the process id because connection pool must not be shared across fork, i.e celery worker
+# and on the client class, so that test that patch elasticsearch.Elasticsearch still get their mock.
+_lock = threading.Lock()
+_pid = None
+_clients = {}
+_bootstrapped = set()
+
+
+class ProfiledConnection(Urllib3HttpConnection):
+    # Time spent talking to elasticsearch is part of the request profile, when there is one
+    def perform_request(self, *args, **kwargs):
+        with profiling.measure("es"):
+            return super(ProfiledConnection, self).perform_request(*args, **kwargs)
+
+
+def _check_pid():
+    # called with _lock held
+    global _pid
+    pid = os.getpid()
+    if _pid != pid:
+        if _pid is not None:
+            logging.info("Process forked from %s to %s, dropping elasticsearch clients" % (_pid, pid))
+        _clients.clear()
+        _bootstrapped.clear()
+        _pid = pid
+
+
+def get_client(hosts=None):
+    if not hosts:
+        hosts = settings.ES_HOST
+    client_class = elasticsearch.Elasticsearch
+    key = (client_class, tuple(hosts))
+    with _lock:
+        _check_pid()
+        client = _clients.get(key)
+        if client is None:
+            client = client_class(hosts=hosts, maxsize=settings.ES_CONNECTION_POOL_SIZE,
+                                  connection_class=ProfiledConnection)
+            _clients[key] = client
+        return client
+
+
+def ensure_index(client, index=settings.ES_INDEX):
+    # Only ask elasticsearch once per client and index
+    key = (id(client), index)
+    with _lock:
+        _check_pid()
+        if key in _bootstrapped:
+            return
+        if not client.indices.exists(index=index):
+            client.indices.create(index=index)
+        _bootstrapped.add(key)
+
+
+def get_index_client(index=settings.ES_INDEX, hosts=None):
+    client = get_client(hosts)
+    ensure_index(client, index)
+    return client
+
+
+def reset_clients():
+    with _lock:
+        _clients.clear()
+        _bootstrapped.clear()
+
+
+def discard_index(client, index=settings.ES_INDEX):
+    # Index is deleted, next user have to create it again
+    with _lock:
+        _bootstrapped.discard((id(client), index))
@@ -5,71 +5,141 @@ from urlparse import urlparse
 from django.conf import settings
 import json
 from django.db import models
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from popit_search.consts import ES_MODEL_MAP
+
+
+# Foreign key that point to an entity that embed this entity in its document
+GRAPH_FOREIGN_KEYS = ("organization", "on_behalf_of", "parent", "person", "post")
 
 
 # a dependency graph is essentially a list of tuple to show all entity
 def build_graph(entity, action):
+    return build_graphs([entity], action)
+
+
+def build_graphs(entities, action):
     graph = set()
+    for nodes in build_graph_map(entities, action).values():
+        graph.update(nodes)
+    return list(graph)
+
+
+def build_graph_map(entities, action):
+    """
+    Build the dependency graph of many entities at once. entities is a list of model instance, or of
+    (entity, entity_id) with entity named as in ES_MODEL_MAP. Return a dict of root node to the set of node in its
+    graph.
+
+    Relationship are read with a query per relation for all entities of the same model, instead of loading related
+    instance one by one, so the number of query do not grow with the number of membership.
+    """
+    grouped = {}
+    for entity in entities:
+        if isinstance(entity, models.Model):
+            model, entity_id = entity.__class__, entity.id
+        else:
+            model, entity_id = ES_MODEL_MAP[entity[0]], entity[1]
+        grouped.setdefault(model, set()).add(entity_id)
+
+    graph_map = {}
+    for model, ids in grouped.items():
+        graph_map.update(build_model_graph(model, ids, action))
+    return graph_map
 
-    current_object = entity._meta.model_name + "s"  # Pluralize the name, ES Refer object this way
-    current_id = entity.id
-    current_node = (current_object, current_id, action)
 
-    graph.add(current_node)
+def node_name(model):
+    return model._meta.model_name + "s"  # Pluralize the name, ES Refer object this way
+
+
+def build_model_graph(model, ids, action):
+    name = node_name(model)
+    graph = {}
+    for entity_id in ids:
+        graph[entity_id] = set([(name, entity_id, action)])
 
     # this should show all field that show relationship, foreign key and what not
     # I don't care about translated field, the goal is to traverse through relationship
-    fields = entity._meta.get_fields()
+    fields = model._meta.get_fields()
+    foreign_keys = [field for field in fields
+                    if field.name in GRAPH_FOREIGN_KEYS and field.concrete and field.many_to_one]
+    generic_keys = [field for field in fields if isinstance(field, GenericForeignKey)]
+
+    columns = ["id"] + [field.attname for field in foreign_keys]
+    for field in generic_keys:
+        columns.extend([field.ct_field + "_id", field.fk_field])
+
+    if len(columns) > 1:
+        generic_ids = {}
+        for row in model.objects.filter(id__in=ids).values_list(*columns):
+            entity_id = row[0]
+            for field, value in zip(foreign_keys, row[1:]):
+                if value:
+                    graph[entity_id].add((node_name(field.related_model), value, "update"))
+            if generic_keys:
+                content_type_id, object_id = row[-2:]
+                generic_ids.setdefault(content_type_id, []).append((entity_id, object_id))
+
+        # content_object can point to something already deleted
+        for content_type_id, pairs in generic_ids.items():
+            target = ContentType.objects.get_for_id(content_type_id).model_class()
+            object_ids = [object_id for entity_id, object_id in pairs]
+            existing = set(target.objects.filter(id__in=object_ids).values_list("id", flat=True))
+            for entity_id, object_id in pairs:
+                if object_id in existing:
+                    graph[entity_id].add((node_name(target), object_id, "update"))
 
     for field in fields:
-        field_name = field.name
-        if field_name in ("organization", "on_behalf_of", "parent", "person", "post", "content_object"):
-            temp_entity = getattr(entity, field_name)
-            if not isinstance(temp_entity, models.Model):
-                continue
-            if temp_entity:
-                current_node = (temp_entity._meta.model_name + "s", temp_entity.id, "update")
-                graph.add(current_node)
-
-        elif field_name == "memberships":
-            temp_entities = getattr(entity, field_name)
-            for temp_entity in temp_entities.all():
+        if not field.auto_created or field.concrete:
+            continue
+        related_name = field.field.attname
+
+        if field.name == "memberships":
+            rows = field.related_model.objects.filter(**{related_name + "__in": ids}).values_list(
+                related_name, "id", "person_id", "organization_id", "post_id"
+            )
+            for entity_id, membership_id, person_id, organization_id, post_id in rows:
+                nodes = graph[entity_id]
                 # add current item to be index
-                current_node = ("memberships", temp_entity.id, action)
-                graph.add(current_node)
+                nodes.add(("memberships", membership_id, action))
 
                 # Now membership have organization, person, post or both
-                person_node = ("persons", temp_entity.person.id, "update")
-                graph.add(person_node)
+                nodes.add(("persons", person_id, "update"))
 
                 # It might not have, because post have org. We kind of automatically populate it, except for old entry
-                if temp_entity.organization:
-                    org_node = ("organizations", temp_entity.organization_id, "update")
-                    graph.add(org_node)
+                if organization_id:
+                    nodes.add(("organizations", organization_id, "update"))
 
-                if temp_entity.post:
-                    post_node = ("posts", temp_entity.post_id, "update")
-                    graph.add(post_node)
+                if post_id:
+                    nodes.add(("posts", post_id, "update"))
 
-        elif field_name in ("posts", "children"): # For post and children org just index this post or org
-            temp_entities = getattr(entity, field_name)
-            for temp_entity in temp_entities.all():
-                current_node = (temp_entity._meta.model_name + "s", temp_entity.id, action)
-                graph.add(current_node)
+        elif field.name in ("posts", "children"): # For post and children org just index this post or org
+            rows = field.related_model.objects.filter(**{related_name + "__in": ids}).values_list(related_name, "id")
+            child_name = node_name(field.related_model)
+            for entity_id, child_id in rows:
+                graph[entity_id].add((child_name, child_id, action))
 
-    return list(graph)
+    output = {}
+    for entity_id, nodes in graph.items():
+        output[(name, entity_id, action)] = nodes
+    return output
+
+
+def get_data_bin():
+    uri = settings.ES_DATA_BIN
+    parsed_uri = urlparse(uri)
+
+    return Redis(
+        host = parsed_uri.hostname,
+        port = parsed_uri.port,
+        db=parsed_uri.path[1:], #because it returns in /:dbnumber
+    )
 
 
 class DependencyStore(object):
     def __init__(self):
-        uri = settings.ES_DATA_BIN
-        parsed_uri = urlparse(uri)
-
-        self.store = Redis(
-            host = parsed_uri.hostname,
-            port = parsed_uri.port,
-            db=parsed_uri.path[1:], #because it returns in /:dbnumber
-        )
+        self.store = get_data_bin()
 
     def store_graph(self, entity, entity_id, graph):
         data = json.dumps(graph)
@@ -88,13 +158,66 @@ class DependencyStore(object):
         return []
 
     def build_dependency(self, entity, action):
-        name = entity._meta.model_name
+        # Same name as the graph node, which is what perform_delete fetch with
+        name = entity._meta.model_name + "s"
         id_ = entity.id
         graph = build_graph(entity, action)
         self.store_graph(name, id_, graph)
 
     def fetch_dependency(self, entity):
-        name = entity._meta.model_name
+        name = entity._meta.model_name + "s"
         id_ = entity.id
         graph = self.fetch_graph(name, id_)
         return graph
+
+
+class ReindexQueue(object):
+    """
+    Collect entity that need to be reindexed, so that a burst of save on the same entity, e.g a person and all its
+    other names and links, is reindexed once. Caller schedule a flush when mark return True, the flush take all
+    pending entity at once.
+    """
+    pending_key = "reindex:pending"
+    scheduled_key = "reindex:scheduled"
+    metrics_key = "reindex:metrics"
+
+    def __init__(self, store=None):
+        self.store = store or get_data_bin()
+
+    def mark(self, entity, entity_id):
+        pipe = self.store.pipeline()
+        pipe.sadd(self.pending_key, json.dumps([entity, entity_id]))
+        # In case the flush never happen, e.g worker died, let the next mark schedule it again
+        pipe.set(self.scheduled_key, 1, nx=True, ex=settings.REINDEX_DEBOUNCE_TIME * 10)
+        pipe.hincrby(self.metrics_key, "received", 1)
+        added, scheduled, _ = pipe.execute()
+        if not added:
+            self.store.hincrby(self.metrics_key, "coalesced", 1)
+        return bool(scheduled)
+
+    def take(self):
+        # Atomically, so entity marked from now on go into the next flush
+        pipe = self.store.pipeline()
+        pipe.smembers(self.pending_key)
+        pipe.delete(self.pending_key)
+        pipe.delete(self.scheduled_key)
+        members, _, _ = pipe.execute()
+        return [tuple(json.loads(member)) for member in members]
+
+    def record_flush(self, roots, nodes, indexed):
+        # nodes is the size of every graph added up, indexed is after removing duplicates
+        pipe = self.store.pipeline()
+        pipe.hincrby(self.metrics_key, "flushes", 1)
+        pipe.hincrby(self.metrics_key, "roots", roots)
+        pipe.hincrby(self.metrics_key, "nodes", nodes)
+        pipe.hincrby(self.metrics_key, "indexed", indexed)
+        pipe.execute()
+
+    def stats(self):
+        data = self.store.hgetall(self.metrics_key)
+        output = {}
+        for key in ("received", "coalesced", "flushes", "roots", "nodes", "indexed"):
+            output[key] = int(data.get(key, 0))
+        # Reindex we did not do, either because the entity was marked twice, or it was in more than one graph
+        output["avoided"] = output["coalesced"] + output["nodes"] - output["indexed"]
+        return output
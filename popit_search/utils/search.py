@@ -1,46 +1,60 @@
 import elasticsearch
 from elasticsearch import helpers
 from elasticsearch.exceptions import NotFoundError
+from elasticsearch.exceptions import ConflictError
 from django.conf import settings
 from django.db import models
 from rest_framework.serializers import Serializer
 from rest_framework.settings import api_settings
+from rest_framework.exceptions import ParseError
 import logging
 import time
+from collections import OrderedDict
+from collections import deque
 from popit.models import *
 from popit.serializers import *
 import logging
 import os
 import re
-import datetime
-from dateutil.parser import *
 from rest_framework.response import Response
 from collections import OrderedDict
 from urllib import urlencode
 from django.core.urlresolvers import reverse
 import sys
 import json
+import base64
 from popit_search.consts import ES_MODEL_MAP
 from popit_search.consts import ES_SERIALIZER_MAP
+from popit_search.utils import client
+from popit.serializers.prefetch import prefetch_entities
+from popit.serializers.prefetch import iter_chunks
+from popit import dates
 
 MAX_DOC_SIZE = settings.MAX_DOC_SIZE
 
 log_path = os.path.join(settings.BASE_DIR, "log/popit_search.log")
 logging.basicConfig(filename=log_path, level=logging.DEBUG)
 
-default_date = datetime.datetime(1957, 01, 01)
+
+# Document id is derived from the entity so that we can write to it directly without searching for it first.
+def get_es_id(doc_type, entity_id, language_code):
+    return "%s:%s:%s" % (doc_type, entity_id, language_code)
+
+
+def get_languages():
+    return [language_code for language_code, language_name in settings.LANGUAGES]
 
 
 # Big idea, since serializer already have json docs
 class SerializerSearch(object):
 
-    def __init__(self, doc_type=None, index=settings.ES_INDEX):
-        self.es = elasticsearch.Elasticsearch(hosts=settings.ES_HOST)
+    def __init__(self, doc_type=None, index=settings.ES_INDEX, refresh=settings.ES_REFRESH_ON_WRITE):
         # The default parameter is for testing purposes.
         self.index = index
         self.doc_type = doc_type
-        if not self.es.indices.exists(index=self.index):
-            self.es.indices.create(index=self.index)
+        # With refresh, each write is searchable once it return. Without it, call refresh after a batch of writes.
+        self.refresh_on_write = refresh
+        self.es = client.get_index_client(self.index)
         self.page_size = api_settings.PAGE_SIZE
         self.result_count = 0
         self.start_from = 0
@@ -51,22 +65,30 @@ class SerializerSearch(object):
         assert issubclass(serializer, Serializer)
         if not self.doc_type:
             raise SerializerSearchDocNotSetException("doc_type parameter need to be defined for adding")
-        query = "id:%s AND language_code:%s" % (instance.id, instance.language_code)
-        logging.debug("Checking index")
-        result = self.es.search(index=self.index, doc_type=self.doc_type, q=query)
-
-        hits = result["hits"]["hits"]
-        if hits:
-            raise SerializerSearchInstanceExist("Instance exist")
         s = serializer(instance)
         to_index = self.sanitize_data(s.data)
+        es_id = get_es_id(self.doc_type, instance.id, instance.language_code)
 
-        result = self.es.index(index=self.index, doc_type=self.doc_type, body=to_index)
+        try:
+            result = self.es.index(index=self.index, doc_type=self.doc_type, id=es_id, body=to_index,
+                                   op_type="create", refresh=self.refresh_on_write)
+        except ConflictError:
+            raise SerializerSearchInstanceExist("Instance exist")
         logging.debug("Index created")
-        # Can be a bad idea,
-        time.sleep(settings.INDEX_PREPARATION_TIME)
         return result
 
+    def upsert(self, instance, serializer):
+        # Create or replace the document of instance in one request
+        assert isinstance(instance, models.Model)
+        assert issubclass(serializer, Serializer)
+        if not self.doc_type:
+            raise SerializerSearchDocNotSetException("doc_type parameter need to be defined for upsert")
+        s = serializer(instance)
+        to_index = self.sanitize_data(s.data)
+        es_id = get_es_id(self.doc_type, instance.id, instance.language_code)
+        return self.es.index(index=self.index, doc_type=self.doc_type, id=es_id, body=to_index,
+                             refresh=self.refresh_on_write)
+
     def search(self, query, language=None, start_from=0):
         # Support only query string query for now.
         # e.g https://www.elastic.co/guide/en/elasticsearch/reference/current/query-dsl-query-string-query.html#query-string-syntax
@@ -102,19 +124,15 @@ class SerializerSearch(object):
         assert issubclass(serializer, Serializer)
         if not self.doc_type:
             raise SerializerSearchDocNotSetException("doc_type parameter need to be defined for update")
-        query = "id:%s AND language_code:%s" % (instance.id, instance.language_code)
-        result = self.es.search(index=self.index, doc_type=self.doc_type, q=query)
-        hits = result["hits"]["hits"]
-        if not hits:
-            raise SerializerSearchNotFoundException("no result")
-        if len(hits) > 1:
-            raise SerializerSearchNotUniqueException("There should only have one result")
-        id = hits[0]["_id"]
+        es_id = get_es_id(self.doc_type, instance.id, instance.language_code)
         serializer = serializer(instance)
         data = self.sanitize_data(serializer.data)
 
-        result = self.es.update(index=self.index, doc_type=self.doc_type, id=id, body={"doc": data})
-        time.sleep(settings.INDEX_PREPARATION_TIME)
+        try:
+            result = self.es.update(index=self.index, doc_type=self.doc_type, id=es_id, body={"doc": data},
+                                    refresh=self.refresh_on_write)
+        except NotFoundError:
+            raise SerializerSearchNotFoundException("no result")
         return result
 
     # delete all instance of same id. Because in ES it is stored as 2 documents
@@ -122,29 +140,15 @@ class SerializerSearch(object):
         assert isinstance(instance, models.Model)
         if not self.doc_type:
             raise SerializerSearchDocNotSetException("doc_type parameter need to be defined for delete")
-        query = "id:%s" % instance.id
-        result = self.es.search(self.index, q=query)
-        hits = result["hits"]["hits"]
-        for hit in hits:
-            id = hit["_id"]
-            try:
-                self.es.delete(index=self.index, doc_type=self.doc_type, id=id)
-                time.sleep(settings.INDEX_PREPARATION_TIME)
-            except NotFoundError:
-                logging.warn("No index found, but it's fine")
-                continue
+        self.delete_by_id(instance.id)
 
     def delete_by_id(self, instance_id):
         if not self.doc_type:
             raise SerializerSearchDocNotSetException("doc_type parameter need to be defined for delete")
-        query = "id:%s" % instance_id
-        result = self.es.search(self.index, q=query)
-        hits = result["hits"]["hits"]
-        for hit in hits:
-            id = hit["_id"]
+        for language_code in get_languages():
+            es_id = get_es_id(self.doc_type, instance_id, language_code)
             try:
-                self.es.delete(index=self.index, doc_type=self.doc_type, id=id)
-                time.sleep(settings.INDEX_PREPARATION_TIME)
+                self.es.delete(index=self.index, doc_type=self.doc_type, id=es_id, refresh=self.refresh_on_write)
             except NotFoundError:
                 logging.warn("No index found, but it's fine")
 
@@ -167,8 +171,13 @@ class SerializerSearch(object):
                 result = self.es.search(self.index, size=size, from_=from_)
         return result
 
+    def refresh(self):
+        # Make every write so far searchable, for batch of writes done without refresh
+        self.es.indices.refresh(index=self.index)
+
     def delete_index(self):
         self.es.indices.delete(index=self.index)
+        client.discard_index(self.es, self.index)
 
     def delete_document(self):
         if not self.doc_type:
@@ -180,14 +189,12 @@ class SerializerSearch(object):
         for key in data:
             if re.match("\w+_date", key):
                 if data[key]:
-                    new_date = parse(data[key], default=default_date)
-                    output[key] = new_date.strftime("%Y-%m-%dT%H%M%S")
+                    output[key] = dates.index_date(data[key])
                 else:
                     output[key] = data[key]
 
             elif key == "valid_from" or key == "valid_until":
-                new_date = parse(data[key], default=default_date)
-                output[key] = new_date.strftime("%Y-%m-%dT%H%M%S")
+                output[key] = dates.index_date(data[key])
 
             elif isinstance(data[key], list):
                 temp = []
@@ -197,14 +204,12 @@ class SerializerSearch(object):
                     for sub_key in item:
                         if re.match("\w+_date", sub_key):
                             if item[sub_key]:
-                                new_date = parse(item[sub_key], default=default_date)
-                                temp_output[sub_key] = new_date.strftime("%Y-%m-%dT%H%M%S")
+                                temp_output[sub_key] = dates.index_date(item[sub_key])
                             else:
                                 temp_output[sub_key] = item[sub_key]
                         elif sub_key == "valid_from" or sub_key == "valid_until":
                             if item[sub_key]:
-                                new_date = parse(item[sub_key], default=default_date)
-                                temp_output[sub_key] = new_date.strftime("%Y-%m-%dT%H%M%S")
+                                temp_output[sub_key] = dates.index_date(item[sub_key])
                             else:
                                 temp_output[sub_key] = item[sub_key]
                         else:
@@ -227,6 +232,9 @@ class SerializerSearch(object):
         if not self.doc_type:
             raise SerializerSearchDocNotSetException("doc_type parameter need to be defined for search")
 
+        if "cursor" in request.GET:
+            return self.cursor_search(query, request)
+
         # Because page from view is 1 indexed, but start_from is best calculated starting with 0
         page = request.GET.get("page", 1)
         page = int(page)
@@ -244,6 +252,62 @@ class SerializerSearch(object):
             output.append(hit["_source"])
         return self.response(output, request, page)
 
+    def cursor_search(self, query, request):
+        """
+        Page through the result with a scroll instead of from/size, opt in with ?cursor= (empty for the first page).
+        Cost the same at any depth and is not limited by the max result window. The cursor carry the scroll id and
+        how many hits were returned so far, it only goes forward and expire after ES_SCROLL_TIMEOUT without use.
+        """
+        cursor = request.GET.get("cursor")
+        if cursor:
+            scroll_id, seen = self.decode_cursor(cursor)
+            try:
+                result = self.es.scroll(scroll_id=scroll_id, scroll=settings.ES_SCROLL_TIMEOUT)
+            except NotFoundError:
+                raise ParseError("Cursor expired, start again with an empty cursor")
+        else:
+            seen = 0
+            result = self.es.search(index=self.index, doc_type=self.doc_type, q=query, size=self.page_size,
+                                    scroll=settings.ES_SCROLL_TIMEOUT)
+
+        self.result_count = result["hits"]["total"]
+        hits = result["hits"]["hits"]
+        seen = seen + len(hits)
+        has_more = bool(hits) and seen < self.result_count
+
+        next_url = None
+        if has_more:
+            next_url = self.build_link(request, cursor=self.encode_cursor(result["_scroll_id"], seen))
+        else:
+            # Done with it, no need to keep it open until it expire
+            try:
+                self.es.clear_scroll(scroll_id=result["_scroll_id"])
+            except NotFoundError:
+                pass
+
+        output = []
+        for hit in hits:
+            output.append(hit["_source"])
+
+        return Response(OrderedDict([
+            ("total", self.result_count),
+            ("next", next_url),
+            ("previous", None),
+            ("results", output),
+            ("per_page", self.page_size),
+            ("has_more", has_more),
+        ]))
+
+    def encode_cursor(self, scroll_id, seen):
+        return base64.urlsafe_b64encode(json.dumps([scroll_id, seen]))
+
+    def decode_cursor(self, cursor):
+        try:
+            scroll_id, seen = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return scroll_id, int(seen)
+        except (TypeError, ValueError, UnicodeEncodeError):
+            raise ParseError("Invalid cursor")
+
     # uurrggghh I hate it when elasticsearch do their own pagination.
     def get_page(self, item_num):
         # round it down, we start from zero anyway
@@ -278,8 +342,11 @@ class SerializerSearch(object):
     def get_links(self, request, page):
         if not page:
             return None
+        return self.build_link(request, page=page)
+
+    def build_link(self, request, **kwargs):
         params = dict(request.GET)
-        params["page"] = page
+        params.update(kwargs)
         params["q"] = params["q"][0].encode("utf-8")
         url = "http://%s%s" % (request.get_host(), request.path)
 
@@ -354,11 +421,8 @@ class BulkIndexer(object):
      ('organizations', u'612943b1-864d-4188-8d79-ca387ed19b32', 'update')]
     '''
     def __init__(self, index=settings.ES_INDEX):
-        self.es = elasticsearch.Elasticsearch(hosts=settings.ES_HOST)
         self.index = index
-
-        if not self.es.indices.exists(index=self.index):
-            self.es.indices.create(index=self.index)
+        self.es = client.get_index_client(self.index)
 
     def index_data(self, data, max_size=MAX_DOC_SIZE):
         current_size = 0
@@ -374,6 +438,9 @@ class BulkIndexer(object):
                 es_id = self.fetch_es_id(entity, entity_name)
                 serializer = ES_SERIALIZER_MAP[entity_name](entity, language=entity.language_code)
                 body = serializer.data
+                # With a known id, create and update are both a replace of the whole document
+                if ops != "delete":
+                    ops = "index"
                 entry = self.create_bulk_entry(
                     es_id=es_id, doc_type=entity_name, ops=ops, body=body
                 )
@@ -391,6 +458,47 @@ class BulkIndexer(object):
         if to_index:
             helpers.bulk(self.es, to_index)
 
+        # One refresh for the whole batch, instead of one per document
+        self.es.indices.refresh(index=self.index)
+
+    def entity_actions(self, entity_name, chunk_size):
+        model = ES_MODEL_MAP[entity_name]
+        serializer_class = ES_SERIALIZER_MAP[entity_name]
+        for instances in iter_chunks(model.objects.untranslated(), chunk_size):
+            # Translations, children and related entity of the whole chunk in a few queries
+            prefetch_entities(instances)
+            for instance in instances:
+                for language_code in instance.get_available_languages():
+                    serializer = serializer_class(instance, language=language_code)
+                    es_id = get_es_id(entity_name, instance.id, language_code)
+                    yield self.create_bulk_entry(es_id=es_id, doc_type=entity_name, ops="index", body=serializer.data)
+
+    def stream_entity(self, entity_name, chunk_size=settings.ES_INDEX_CHUNK_SIZE, progress=None):
+        actions = self.entity_actions(entity_name, chunk_size)
+        start = time.time()
+        indexed = 0
+        errors = 0
+        for ok, item in helpers.streaming_bulk(self.es, actions, chunk_size=chunk_size, raise_on_error=False):
+            if ok:
+                indexed = indexed + 1
+            else:
+                errors = errors + 1
+                logging.warn("Failed to index %s" % item)
+
+            count = indexed + errors
+            if count % chunk_size == 0:
+                self.report_progress(entity_name, count, time.time() - start, progress)
+
+        seconds = time.time() - start
+        self.report_progress(entity_name, indexed + errors, seconds, progress)
+        return {"indexed": indexed, "errors": errors, "seconds": seconds}
+
+    def report_progress(self, entity_name, count, seconds, progress=None):
+        rate = count / seconds if seconds else 0
+        logging.info("%s: %s documents in %.1fs, %.1f documents/s" % (entity_name, count, seconds, rate))
+        if progress:
+            progress(entity_name, count, seconds)
+
     def create_bulk_entry(self, es_id, doc_type, ops, body=None):
         if body:
             body = sanitize_data(body)
@@ -422,16 +530,7 @@ class BulkIndexer(object):
         return data
 
     def fetch_es_id(self, entity, entity_name):
-        query = "id:%s AND language:%s" % (entity.id, entity.language_code)
-        result = self.es.search(index=self.index, doc_type=entity_name, q=query)
-        _id = None
-        hits = result["hits"]["hits"]
-
-        if hits:
-            # There should only be 1 instance of data with entity.id for 1 language.
-            # Only consider the first one if multiple exist, and fix the first
-            _id = hits[0]["_id"]
-        return _id
+        return get_es_id(entity_name, entity.id, entity.language_code)
 
 
 class SerializerSearchNotFoundException(Exception):
@@ -450,37 +549,78 @@ class SerializerSearchDocNotSetException(Exception):
     pass
 
 
-def popit_indexer(entity=""):
-    count = 0
-    bulk_indexer = BulkIndexer()
-    to_index = []
-    if not entity or entity == "persons":
-        persons = Person.objects.untranslated().all()
-
-        for person in persons:
-            to_index.append(("persons", person.id, "create"))
-
-    if not entity or entity == "organizations":
-        organizations = Organization.objects.untranslated().all()
-        for organization in organizations:
-            to_index.append(("organizations", organization.id, "create"))
-
-    if not entity or entity == "posts":
-        posts = Post.objects.untranslated().all()
-        for post in posts:
-            to_index.append(("posts", post.id, "create"))
+INDEX_ENTITIES = ("persons", "organizations", "posts", "memberships", "areas")
 
-    if not entity or entity == "memberships":
-        memberships = Membership.objects.untranslated().all()
-        for membership in memberships:
-            to_index.append(("memberships", membership.id, "create"))
 
-    if not entity or entity == "areas":
-        areas = Area.objects.untranslated().all()
-        for area in areas:
-            to_index.append(("areas", area.id, "create"))
+def popit_indexer(entity="", chunk_size=settings.ES_INDEX_CHUNK_SIZE, progress=None):
+    """
+    Reindex every entity, or only entity, streaming documents into elasticsearch chunk by chunk. progress is called
+    with entity name, document count and seconds spent after each chunk. Return the count and time for each entity.
+    """
+    bulk_indexer = BulkIndexer()
+    report = OrderedDict()
+    for entity_name in INDEX_ENTITIES:
+        if entity and entity != entity_name:
+            continue
+        report[entity_name] = bulk_indexer.stream_entity(entity_name, chunk_size, progress)
+    bulk_indexer.es.indices.refresh(index=bulk_indexer.index)
+    return report
+
+
+def es_id_migration_actions(hits, index=settings.ES_INDEX):
+    """
+    Take hits from a scan of the index and generate (create, delete) bulk action pairs that move documents with a
+    generated id to get_es_id. Create never overwrite a document already at get_es_id, it was written since deploy
+    and is fresher than the copy. Duplicate of the same document ends up in one document.
+    """
+    for hit in hits:
+        source = hit["_source"]
+        es_id = get_es_id(hit["_type"], source["id"], source["language_code"])
+        if hit["_id"] == es_id:
+            continue
+        create = {
+            "_op_type": "create",
+            "_index": index,
+            "_type": hit["_type"],
+            "_id": es_id,
+            "_source": source,
+        }
+        delete = {
+            "_op_type": "delete",
+            "_index": index,
+            "_type": hit["_type"],
+            "_id": hit["_id"],
+        }
+        yield create, delete
+
+
+def migrate_es_ids(es, hits, index=settings.ES_INDEX, chunk_size=500):
+    """
+    Move the documents in hits to their get_es_id. A document is deleted only once it is copied, or when there is a
+    document at its new id already (409). Return (number of documents moved, errors).
+    """
+    # Bulk results come in the order of the actions, delete of each create sent waits here
+    deletes = deque()
+
+    def creates():
+        for create, delete in es_id_migration_actions(hits, index):
+            deletes.append(delete)
+            yield create
+
+    copied = []
+    errors = []
+    results = helpers.streaming_bulk(es, creates(), chunk_size=chunk_size, raise_on_error=False,
+                                     raise_on_exception=False)
+    for ok, result in results:
+        delete = deletes.popleft()
+        if ok or result.values()[0].get("status") == 409:
+            copied.append(delete)
+        else:
+            errors.append(result)
 
-    bulk_indexer.index_data(to_index)
+    moved, delete_errors = helpers.bulk(es, copied, chunk_size=chunk_size, raise_on_error=False)
+    errors.extend(delete_errors)
+    return moved, errors
 
 
 def remove_popit_index():
@@ -493,14 +633,12 @@ def sanitize_data(data):
     for key in data:
         if re.match("\w+_date", key):
             if data[key]:
-                new_date = parse(data[key], default=default_date)
-                output[key] = new_date.strftime("%Y-%m-%dT%H%M%S")
+                output[key] = dates.index_date(data[key])
             else:
                 output[key] = data[key]
 
         elif key == "valid_from" or key == "valid_until":
-            new_date = parse(data[key], default=default_date)
-            output[key] = new_date.strftime("%Y-%m-%dT%H%M%S")
+            output[key] = dates.index_date(data[key])
 
         elif isinstance(data[key], list):
             temp = []
@@ -510,14 +648,12 @@ def sanitize_data(data):
                 for sub_key in item:
                     if re.match("\w+_date", sub_key):
                         if item[sub_key]:
-                            new_date = parse(item[sub_key], default=default_date)
-                            temp_output[sub_key] = new_date.strftime("%Y-%m-%dT%H%M%S")
+                            temp_output[sub_key] = dates.index_date(item[sub_key])
                         else:
                             temp_output[sub_key] = item[sub_key]
                     elif sub_key == "valid_from" or sub_key == "valid_until":
                         if item[sub_key]:
-                            new_date = parse(item[sub_key], default=default_date)
-                            temp_output[sub_key] = new_date.strftime("%Y-%m-%dT%H%M%S")
+                            temp_output[sub_key] = dates.index_date(item[sub_key])
                         else:
                             temp_output[sub_key] = item[sub_key]
                     else:
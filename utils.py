@@ -1,21 +1,122 @@
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.urls import replace_query_param
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 from collections import OrderedDict
+import base64
+import json
 
 
 class PopitPaginator(PageNumberPagination):
     page_number = 1
 
+    # Opt in keyset pagination with ?cursor= (empty for the first page). Instead of COUNT and OFFSET, a page start
+    # right after the (created_at, id) of the last entity of the previous page, so it cost the same at any depth.
+    # Total is only counted with ?count=true, a COUNT over the whole table is what this is here to avoid.
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor"
+    use_cursor = False
+
     def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if self.use_cursor:
+            return self.paginate_cursor(queryset, request)
         self.page_number = request.query_params.get(self.page_query_param, 1)
         result = super(PopitPaginator, self).paginate_queryset(queryset, request, view)
         return result
 
+    def paginate_cursor(self, queryset, request):
+        self.page_size = self.get_page_size(request)
+        self.total = None
+        if request.query_params.get(self.count_query_param, "").lower() in ("true", "1"):
+            self.total = queryset.count()
+
+        position = self.decode_cursor(request.query_params[self.cursor_query_param])
+        reverse = False
+        if position:
+            reverse, created_at, entity_id = position
+            if reverse:
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=entity_id))
+            else:
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=entity_id))
+
+        if reverse:
+            queryset = queryset.order_by("-created_at", "-id")
+        else:
+            queryset = queryset.order_by("created_at", "id")
+
+        # One more to know if there is anything after this page
+        results = list(queryset[:self.page_size + 1])
+        more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = more
+        else:
+            self.has_next = more
+            self.has_previous = position is not None
+        self.results = results
+        return results
+
+    def encode_cursor(self, reverse, instance):
+        data = json.dumps([reverse, instance.created_at.isoformat(), instance.id])
+        return base64.urlsafe_b64encode(data)
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            reverse, created_at, entity_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            created_at = parse_datetime(created_at)
+        except (TypeError, ValueError, UnicodeEncodeError):
+            raise ParseError(self.invalid_cursor_message)
+        if created_at is None:
+            raise ParseError(self.invalid_cursor_message)
+        return bool(reverse), created_at, entity_id
+
+    def get_cursor_link(self, reverse, instance):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(reverse, instance))
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super(PopitPaginator, self).get_next_link()
+        if not self.has_next or not self.results:
+            return None
+        return self.get_cursor_link(False, self.results[-1])
+
+    def get_previous_link(self):
+        if not self.use_cursor:
+            return super(PopitPaginator, self).get_previous_link()
+        if not self.has_previous or not self.results:
+            return None
+        return self.get_cursor_link(True, self.results[0])
+
+    def get_page_state(self):
+        # What the envelope depends on besides the entities in the page
+        if self.use_cursor:
+            return [self.total, self.has_next, self.has_previous]
+        return [self.page.paginator.count]
+
     def get_paginated_response(self, data):
         if self.get_next_link():
             has_more = True
         else:
             has_more = False
+        if self.use_cursor:
+            return Response(OrderedDict([
+                ('total', self.total),
+                ('next', self.get_next_link()),
+                ('previous', self.get_previous_link()),
+                ('results', data),
+                ('per_page', self.page_size),
+                ('has_more', has_more)
+            ]))
         return Response(OrderedDict([
             ('page', int(self.page_number)),
             ('total', self.page.paginator.count),